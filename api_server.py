@@ -0,0 +1,316 @@
+#api_server.py
+"""
+Headless JSON API for the holistic medicine chatbot.
+
+Serves symptom analysis, autocomplete, treatment lookup and LLM enhancement over
+HTTP/1.1 with keep-alive, from a single in-memory knowledge base and index set
+shared by all connections. KB-bound work runs on a thread pool so the event
+loop only does I/O; LLM calls use a separate pool so they cannot starve it.
+
+Endpoints:
+    GET  /health
+    POST /analyze    {"symptoms": ["fever", "cough"], "top_k": 5}
+    GET  /suggest?q=head&limit=5
+    GET  /treatment?disease=Migraine
+    POST /enhance    {"disease": "Migraine", "treatment_type": "Ayurvedic"}
+
+Usage:
+    python api_server.py --host 127.0.0.1 --port 8080
+"""
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from urllib.parse import urlsplit, parse_qs
+
+from utils.config import (
+    AZURE_API_KEY, AZURE_ENDPOINT, AZURE_DEPLOYMENT, AZURE_API_VERSION,
+    LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_MAX_MB, LLM_CACHE_MEMORY_ENTRIES, ENHANCEMENT_STORE_PATH,
+    KB_RELOAD_INTERVAL
+)
+from utils.kb_manager import suggest_symptoms
+from utils.kb_reload import KnowledgeBaseWatcher
+from utils.kb_shards import ShardedKnowledgeBase
+from utils.kb_stream import StreamedKnowledgeBase
+from utils.symptom_analyzer import find_diseases
+from utils.llm_interface import initialize_azure_client, enhance_treatment_description
+from utils.llm_cache import LLMResponseCache
+from utils.enhancement_store import load_enhancement_store
+from utils.llm_telemetry import TELEMETRY
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+KEEP_ALIVE_TIMEOUT = 30.0
+
+TREATMENT_TYPES = ('Ayurvedic', 'Homeopathic', 'Allopathic')
+
+_REASONS = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'
+}
+
+class HTTPError(Exception):
+    """Error that maps directly to an HTTP status code."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+class ServiceState:
+    """
+    Knowledge base, indexes and LLM client shared by every request.
+
+    The knowledge base is hot reloaded; each request reads one generation of it.
+    """
+
+    def __init__(self, kb_path, artifact_path, kb_workers=4, llm_workers=8, reload_interval=KB_RELOAD_INTERVAL):
+        self.kb = KnowledgeBaseWatcher(kb_path, artifact_path)
+        if self.kb.last_error:
+            raise RuntimeError(self.kb.last_error)
+        if reload_interval > 0:
+            self.kb.start(reload_interval)
+        self.client = initialize_azure_client(AZURE_API_KEY, AZURE_ENDPOINT, AZURE_API_VERSION)
+        self.llm_cache = LLMResponseCache(
+            path=LLM_CACHE_PATH or None,
+            ttl=LLM_CACHE_TTL,
+            max_bytes=LLM_CACHE_MAX_MB * 1024 * 1024,
+            memory_entries=LLM_CACHE_MEMORY_ENTRIES
+        )
+        self.enhancement_store = load_enhancement_store(ENHANCEMENT_STORE_PATH)
+        self.kb_pool = ThreadPoolExecutor(max_workers=kb_workers, thread_name_prefix='kb')
+        self.llm_pool = ThreadPoolExecutor(max_workers=llm_workers, thread_name_prefix='llm')
+
+    def analyze(self, symptoms, top_k):
+        generation = self.kb.current
+        results = find_diseases(
+            generation.kb_data, symptoms, generation.symptom_index, generation.fuzzy_matcher, generation.vector_scorer()
+        )
+        return {
+            'results': [
+                {'disease': disease, 'score': details['score'], 'category': details['category'],
+                 'full_symptoms': details['full_symptoms']}
+                for disease, details in islice(results.items(), top_k)
+            ]
+        }
+
+    def suggest(self, partial_input, limit):
+        generation = self.kb.current
+        return {
+            'suggestions': suggest_symptoms(
+                generation.autocomplete_index.symptoms, partial_input, generation.autocomplete_index,
+                limit, fuzzy_matcher=generation.fuzzy_matcher
+            )
+        }
+
+    def treatment(self, disease_name):
+        treatment_info = self.kb.current.disease_lookup.get(disease_name)
+        if treatment_info is None:
+            raise HTTPError(404, f"Unknown disease: {disease_name}")
+        return {'disease': treatment_info.disease, **treatment_info}
+
+    def enhance(self, disease_name, treatment_type):
+        treatment_info = self.kb.current.disease_lookup.get(disease_name)
+        if treatment_info is None:
+            raise HTTPError(404, f"Unknown disease: {disease_name}")
+        if self.enhancement_store is not None:
+            enhanced = self.enhancement_store.get(
+                treatment_info.disease, treatment_type, treatment_info[treatment_type], treatment_info['Symptoms']
+            )
+            if enhanced:
+                return {'disease': treatment_info.disease, 'treatment_type': treatment_type, 'text': enhanced,
+                        'enhanced': True}
+        enhanced = enhance_treatment_description(
+            self.client,
+            AZURE_DEPLOYMENT,
+            treatment_type,
+            treatment_info[treatment_type],
+            treatment_info.disease,
+            treatment_info['Symptoms'],
+            cache=self.llm_cache
+        )
+        return {'disease': treatment_info.disease, 'treatment_type': treatment_type, 'text': enhanced,
+                'enhanced': self.client is not None}
+
+def _first(query, name, default=None):
+    values = query.get(name)
+    return values[0] if values else default
+
+def _int_param(value, name, default, upper):
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"'{name}' must be an integer")
+    if not 1 <= number <= upper:
+        raise HTTPError(400, f"'{name}' must be between 1 and {upper}")
+    return number
+
+async def dispatch(state, method, target, body):
+    """
+    Route one request to its handler.
+
+    Args:
+        state (ServiceState): Shared service state
+        method (str): HTTP method
+        target (str): Request target (path and query)
+        body (bytes): Request body
+
+    Returns:
+        dict: JSON-serializable response payload
+    """
+    loop = asyncio.get_running_loop()
+    url = urlsplit(target)
+    query = parse_qs(url.query)
+    path = url.path.rstrip('/') or '/'
+
+    def json_body():
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            raise HTTPError(400, "Request body must be JSON")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "Request body must be a JSON object")
+        return payload
+
+    routes = {'/health': 'GET', '/analyze': 'POST', '/suggest': 'GET', '/treatment': 'GET', '/enhance': 'POST'}
+    if path not in routes:
+        raise HTTPError(404, f"No route for {path}")
+    if method != routes[path]:
+        raise HTTPError(405, f"{path} only supports {routes[path]}")
+
+    if path == '/health':
+        generation = state.kb.current
+        kb_data = generation.kb_data
+        return {'status': 'ok', 'diseases': len(kb_data), 'kb_generation': generation.number,
+                'kb_reload_error': state.kb.last_error,
+                'kb_shards': kb_data.stats() if isinstance(kb_data, ShardedKnowledgeBase) else None,
+                'kb_pages': kb_data.stats() if isinstance(kb_data, StreamedKnowledgeBase) else None,
+                'llm_cache': state.llm_cache.stats(), 'llm_calls': TELEMETRY.aggregates()}
+
+    if path == '/analyze':
+        payload = json_body()
+        symptoms = payload.get('symptoms')
+        if not isinstance(symptoms, list) or not all(isinstance(s, str) for s in symptoms):
+            raise HTTPError(400, "'symptoms' must be a list of strings")
+        top_k = _int_param(payload.get('top_k'), 'top_k', 10, 1000)
+        return await loop.run_in_executor(state.kb_pool, state.analyze, symptoms, top_k)
+
+    if path == '/suggest':
+        partial_input = _first(query, 'q', '')
+        limit = _int_param(_first(query, 'limit'), 'limit', 5, 50)
+        return await loop.run_in_executor(state.kb_pool, state.suggest, partial_input, limit)
+
+    if path == '/treatment':
+        disease_name = _first(query, 'disease')
+        if not disease_name:
+            raise HTTPError(400, "'disease' query parameter is required")
+        return await loop.run_in_executor(state.kb_pool, state.treatment, disease_name)
+
+    payload = json_body()
+    disease_name = payload.get('disease')
+    treatment_type = payload.get('treatment_type')
+    if not isinstance(disease_name, str) or treatment_type not in TREATMENT_TYPES:
+        raise HTTPError(400, f"'disease' and 'treatment_type' ({', '.join(TREATMENT_TYPES)}) are required")
+    return await loop.run_in_executor(state.llm_pool, state.enhance, disease_name, treatment_type)
+
+def _response(status, payload, keep_alive):
+    body = json.dumps(payload).encode('utf-8')
+    head = (
+        f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode('latin-1') + body
+
+async def handle_connection(state, reader, writer):
+    """Serve requests on one connection until the client closes it or asks to."""
+    try:
+        while True:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), KEEP_ALIVE_TIMEOUT)
+            except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                return
+            except asyncio.LimitOverrunError:
+                writer.write(_response(413, {'error': "Request headers too large"}, False))
+                await writer.drain()
+                return
+
+            lines = head.decode('latin-1').split('\r\n')
+            try:
+                method, target, version = lines[0].split(' ', 2)
+            except ValueError:
+                writer.write(_response(400, {'error': "Malformed request line"}, False))
+                await writer.drain()
+                return
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(':')
+                if name:
+                    headers[name.strip().lower()] = value.strip()
+
+            connection = headers.get('connection', '').lower()
+            keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+            try:
+                length = int(headers.get('content-length', 0))
+            except ValueError:
+                length = -1
+            if length < 0 or length > MAX_BODY_BYTES:
+                writer.write(_response(413 if length > 0 else 400, {'error': "Invalid Content-Length"}, False))
+                await writer.drain()
+                return
+            try:
+                body = await reader.readexactly(length) if length else b''
+            except (asyncio.IncompleteReadError, ConnectionError):
+                return
+
+            try:
+                status, payload = 200, await dispatch(state, method, target, body)
+            except HTTPError as e:
+                status, payload = e.status, {'error': e.message}
+            except Exception as e:
+                status, payload = 500, {'error': f"{type(e).__name__}: {str(e)}"}
+
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                return
+    finally:
+        writer.close()
+
+async def serve(state, host, port):
+    """Run the API server until cancelled."""
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_connection(state, reader, writer),
+        host, port, limit=MAX_HEADER_BYTES
+    )
+    addresses = ', '.join(str(sock.getsockname()) for sock in server.sockets)
+    print(f"Serving {len(state.kb.current.kb_data)} diseases on {addresses}")
+    async with server:
+        await server.serve_forever()
+
+def main(argv=None):
+    """Start the API server from the command line."""
+    parser = argparse.ArgumentParser(description="Headless JSON API for the holistic medicine chatbot.")
+    parser.add_argument('--host', default='127.0.0.1', help="Interface to bind")
+    parser.add_argument('--port', type=int, default=8080, help="Port to listen on")
+    parser.add_argument('--kb', default='data/kb.json', help="Knowledge base file")
+    parser.add_argument('--artifact', default='data/kb.bin', help="Compiled knowledge base, used when fresh")
+    parser.add_argument('--kb-workers', type=int, default=4, help="Threads for KB-bound work")
+    parser.add_argument('--llm-workers', type=int, default=8, help="Threads for LLM calls")
+    parser.add_argument('--reload-interval', type=float, default=KB_RELOAD_INTERVAL,
+                        help="Seconds between checks of the knowledge base for edits (0 disables hot reload)")
+    args = parser.parse_args(argv)
+
+    state = ServiceState(args.kb, args.artifact, args.kb_workers, args.llm_workers, args.reload_interval)
+    try:
+        asyncio.run(serve(state, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -4,71 +4,103 @@
 """
 Main file for the Holistic Medicine Chatbot application.
 """
+from functools import partial
 import streamlit as st
 
 # Import modules
-from utils.config import setup_page, AZURE_API_KEY, AZURE_ENDPOINT, AZURE_DEPLOYMENT, AZURE_API_VERSION
-from utils.kb_manager import load_knowledge_base, create_symptom_mapping, get_treatment_info
+from utils.config import (
+    setup_page, AZURE_API_KEY, AZURE_ENDPOINT, AZURE_DEPLOYMENT, AZURE_API_VERSION, METRICS_DEBUG_OVERLAY,
+    CHAT_RETRIEVAL_TOP_K, CHAT_RETRIEVAL_TOKENS
+)
+from utils.kb_manager import (
+    get_knowledge_base, get_kb_generation, start_kb_snapshot, get_treatment_info, load_disease_lookup, load_kb_retriever,
+    load_symptom_extractor
+)
 from utils.symptom_analyzer import find_diseases
-from utils.llm_interface import initialize_azure_client, process_natural_language_symptoms, enhance_treatment_description
+from utils.llm_interface import initialize_azure_client, process_natural_language_symptoms, enhance_treatment_descriptions, get_llm_cache, get_enhancement_store
 from utils.session_manager import initialize_session_state
+from utils.rerun_metrics import get_metrics_registry
 import utils.ui_components as ui
 
 def main():
+    # Time every stage of this rerun
+    metrics = get_metrics_registry()
+    trace = metrics.start_rerun()
+    failed = False
+    try:
+        render_app(trace)
+    except Exception:
+        failed = True
+        raise
+    finally:
+        # Also reached when st.rerun() or st.stop() end the script early
+        metrics.finish_rerun(trace, failed)
+
+def render_app(trace):
     # Set up the page
-    setup_page()
+    with trace.stage("page_setup"):
+        setup_page()
     
     # Initialize session state
-    initialize_session_state()
+    with trace.stage("session_init"):
+        initialize_session_state()
     
     # Initialize Azure OpenAI client
-    client = initialize_azure_client(AZURE_API_KEY, AZURE_ENDPOINT, AZURE_API_VERSION)
+    with trace.stage("client_init"):
+        client = initialize_azure_client(AZURE_API_KEY, AZURE_ENDPOINT, AZURE_API_VERSION)
     
-    # Load knowledge base
-    kb_data = load_knowledge_base()
-    symptom_map, all_symptoms, disease_symptoms = create_symptom_mapping(kb_data)
+    # Load knowledge base, pinning its newest generation for the rest of this rerun
+    with trace.stage("kb_load"):
+        start_kb_snapshot()
+        kb_data = get_knowledge_base()
+    with trace.stage("symptom_mapping"):
+        symptom_map, all_symptoms, disease_symptoms = get_kb_generation().symptom_mapping()
     
     # Render UI header
     ui.render_header()
     
     # Render sidebar
-    ui.render_sidebar(
-        st.session_state.llm_mode, 
-        client, 
-        AZURE_DEPLOYMENT, 
-        all_symptoms, 
-        process_natural_language_symptoms
-    )
+    with trace.stage("sidebar"):
+        ui.render_sidebar(
+            st.session_state.llm_mode, 
+            client, 
+            AZURE_DEPLOYMENT, 
+            all_symptoms, 
+            partial(process_natural_language_symptoms, cache=get_llm_cache(), extractor=load_symptom_extractor())
+        )
     
     # Main content area
-    if st.session_state.selected_symptoms:
-        # Show analysis results
-        ui.render_analysis_results()
-    else:
-        # Welcome screen
-        ui.render_welcome_screen()
+    with trace.stage("analysis"):
+        if st.session_state.selected_symptoms:
+            # Show analysis results
+            ui.render_analysis_results()
+        else:
+            # Welcome screen
+            ui.render_welcome_screen()
     
     # Display treatment information if a disease is selected
     if st.session_state.selected_disease:
-        treatment_info = get_treatment_info(kb_data, st.session_state.selected_disease)
-        
-        if treatment_info:
-            # Render treatment options
-            ui.render_treatment_options(treatment_info, st.session_state.llm_mode, client, AZURE_DEPLOYMENT)
-            
-            # Display treatments based on selected view
-            render_treatment_details(treatment_info, st.session_state.llm_mode, client, AZURE_DEPLOYMENT)
-            
+        with trace.stage("treatment"):
+            treatment_info = get_treatment_info(kb_data, st.session_state.selected_disease, load_disease_lookup())
             
-            # Back button
-            if st.button("← Back to Disease List"):
-                st.session_state.selected_disease = None
-                st.session_state.treatment_view = None
-                st.rerun()
+            if treatment_info:
+                # Render treatment options
+                ui.render_treatment_options(treatment_info, st.session_state.llm_mode, client, AZURE_DEPLOYMENT)
+                
+                # Display treatments based on selected view
+                render_treatment_details(treatment_info, st.session_state.llm_mode, client, AZURE_DEPLOYMENT)
+                
+                
+                # Back button
+                if st.button("← Back to Disease List"):
+                    st.session_state.selected_disease = None
+                    st.session_state.treatment_view = None
+                    st.rerun()
     
     # Add AI chat section if LLM mode is enabled
     if st.session_state.llm_mode:
-        render_ai_chat(client, AZURE_DEPLOYMENT)
+        with trace.stage("chat"):
+            render_ai_chat(client, AZURE_DEPLOYMENT)
     
     # Footer
     st.markdown("---")
@@ -77,6 +109,26 @@ def main():
         <p>Holistic Medicine Chatbot | Powered by AI</p>
     </div>
     """, unsafe_allow_html=True)
+    
+    # Stage timings for debugging slow reruns
+    if METRICS_DEBUG_OVERLAY:
+        ui.render_metrics_overlay(trace, get_metrics_registry())
+
+# Treatment cards: (treatment type, view key, icon, CSS class)
+TREATMENT_CARDS = [
+    ("Ayurvedic", "ayurvedic", "🌿", "ayurvedic"),
+    ("Homeopathic", "homeopathic", "💧", "homeopathic"),
+    ("Allopathic", "allopathic", "💊", "allopathic"),
+]
+
+def render_treatment_card(placeholder, treatment_type, icon, css_class, text):
+    """Render a treatment card into its placeholder."""
+    placeholder.markdown("""
+        <div class='treatment-card {}'>
+            <h3 class='treatment-header'>{} {} Treatment</h3>
+            <p>{}</p>
+        </div>
+        """.format(css_class, icon, treatment_type, text), unsafe_allow_html=True)
 
 def render_treatment_details(treatment_info, llm_mode, client, deployment):
     """Render the details of treatments based on the view selection."""
@@ -86,90 +138,69 @@ def render_treatment_details(treatment_info, llm_mode, client, deployment):
     # Add the CSS for disclaimers once at the top
     st.markdown(DISCLAIMER_CSS, unsafe_allow_html=True)
     
-    if st.session_state.treatment_view == "all" or st.session_state.treatment_view == "ayurvedic":
-        # Get enhanced description if LLM mode is on
-        if llm_mode and client:
-            with st.spinner("Enhancing Ayurvedic treatment information..."):
-                ayurvedic_treatment = enhance_treatment_description(
-                    client,
-                    deployment,
-                    "Ayurvedic", 
-                    treatment_info['Ayurvedic'],
-                    st.session_state.selected_disease,
-                    treatment_info['Symptoms']
-                )
-        else:
-            ayurvedic_treatment = treatment_info['Ayurvedic']
-            
-        st.markdown("""
-        <div class='treatment-card ayurvedic'>
-            <h3 class='treatment-header'>🌿 Ayurvedic Treatment</h3>
-            <p>{}</p>
-        </div>
-        """.format(ayurvedic_treatment), unsafe_allow_html=True)
-        
-        # Add the Ayurvedic-specific disclaimer
-        st.markdown(get_disclaimer("Ayurvedic"), unsafe_allow_html=True)
-        
-    if st.session_state.treatment_view == "all" or st.session_state.treatment_view == "homeopathic":
-        # Get enhanced description if LLM mode is on
-        if llm_mode and client:
-            with st.spinner("Enhancing Homeopathic treatment information..."):
-                homeopathic_treatment = enhance_treatment_description(
-                    client,
-                    deployment,
-                    "Homeopathic", 
-                    treatment_info['Homeopathic'],
-                    st.session_state.selected_disease,
-                    treatment_info['Symptoms']
-                )
-        else:
-            homeopathic_treatment = treatment_info['Homeopathic']
-            
-        st.markdown("""
-        <div class='treatment-card homeopathic'>
-            <h3 class='treatment-header'>💧 Homeopathic Treatment</h3>
-            <p>{}</p>
-        </div>
-        """.format(homeopathic_treatment), unsafe_allow_html=True)
-        
-        # Add the Homeopathic-specific disclaimer
-        st.markdown(get_disclaimer("Homeopathic"), unsafe_allow_html=True)
-        
-    if st.session_state.treatment_view == "all" or st.session_state.treatment_view == "allopathic":
-        # Get enhanced description if LLM mode is on
-        if llm_mode and client:
-            with st.spinner("Enhancing Allopathic treatment information..."):
-                allopathic_treatment = enhance_treatment_description(
-                    client,
-                    deployment,
-                    "Allopathic", 
-                    treatment_info['Allopathic'],
-                    st.session_state.selected_disease,
-                    treatment_info['Symptoms']
-                )
+    cards = [
+        card for card in TREATMENT_CARDS
+        if st.session_state.treatment_view in ("all", card[1])
+    ]
+    
+    # Serve fresh precomputed enhancements without calling the LLM
+    enhanced = {}
+    if llm_mode:
+        store = get_enhancement_store()
+        if store is not None:
+            for treatment_type, _, _, _ in cards:
+                text = store.get(treatment_info.disease, treatment_type, treatment_info[treatment_type], treatment_info['Symptoms'])
+                if text:
+                    enhanced[treatment_type] = text
+    pending = [card[0] for card in cards if card[0] not in enhanced] if llm_mode and client else []
+    
+    # Lay out every card with its disclaimer first, so results can fill them in any order
+    placeholders = {}
+    for treatment_type, _, icon, css_class in cards:
+        placeholders[treatment_type] = st.empty()
+        if treatment_type in pending:
+            placeholders[treatment_type].info(f"Enhancing {treatment_type} treatment information...")
         else:
-            allopathic_treatment = treatment_info['Allopathic']
-            
-        st.markdown("""
-        <div class='treatment-card allopathic'>
-            <h3 class='treatment-header'>💊 Allopathic Treatment</h3>
-            <p>{}</p>
-        </div>
-        """.format(allopathic_treatment), unsafe_allow_html=True)
+            text = enhanced.get(treatment_type, treatment_info[treatment_type])
+            render_treatment_card(placeholders[treatment_type], treatment_type, icon, css_class, text)
         
-        # Add the Allopathic-specific disclaimer
-        st.markdown(get_disclaimer("Allopathic"), unsafe_allow_html=True)
+        # Add the treatment-specific disclaimer
+        st.markdown(get_disclaimer(treatment_type), unsafe_allow_html=True)
+    
+    # Get the remaining enhanced descriptions concurrently, rendering each as it arrives
+    if pending:
+        card_styles = {treatment_type: (icon, css_class) for treatment_type, _, icon, css_class in cards}
+        for treatment_type, text in enhance_treatment_descriptions(
+            client,
+            deployment,
+            treatment_info,
+            st.session_state.selected_disease,
+            pending,
+            cache=get_llm_cache()
+        ):
+            icon, css_class = card_styles[treatment_type]
+            render_treatment_card(placeholders[treatment_type], treatment_type, icon, css_class, text)
     
     # If showing all treatments, add the general disclaimer at the bottom
     if st.session_state.treatment_view == "all":
         st.markdown("---")
         st.markdown(get_disclaimer("General"), unsafe_allow_html=True)
 
+# Minimum seconds between redraws of a streaming chat message
+STREAM_REDRAW_INTERVAL = 0.05
+
+def render_chat_message(container, role, content):
+    """Render a chat message bubble into a container."""
+    if role == "user":
+        container.markdown(f"<div style='background-color: #f0f2f6; padding: 10px; border-radius: 10px; margin-bottom: 10px;'><strong>You:</strong> {content}</div>", unsafe_allow_html=True)
+    else:
+        container.markdown(f"<div style='background-color: #e3f0ff; padding: 10px; border-radius: 10px; margin-bottom: 10px;'><strong>Assistant:</strong> {content}</div>", unsafe_allow_html=True)
+
 def render_ai_chat(client, deployment):
     """Render the AI chat section for follow-up questions."""
-    from utils.llm_interface import get_llm_response
-    from utils.kb_manager import get_treatment_info
+    from contextlib import closing
+    import time
+    from utils.llm_interface import stream_llm_response, summarize_conversation
     from utils.session_manager import add_to_chat_history
     
     st.markdown("---")
@@ -177,51 +208,85 @@ def render_ai_chat(client, deployment):
     
     # Display chat history
     for message in st.session_state.chat_history:
-        if message["role"] == "user":
-            st.markdown(f"<div style='background-color: #f0f2f6; padding: 10px; border-radius: 10px; margin-bottom: 10px;'><strong>You:</strong> {message['content']}</div>", unsafe_allow_html=True)
-        else:
-            st.markdown(f"<div style='background-color: #e3f0ff; padding: 10px; border-radius: 10px; margin-bottom: 10px;'><strong>Assistant:</strong> {message['content']}</div>", unsafe_allow_html=True)
+        render_chat_message(st, message["role"], message["content"])
+    
+    # Container for the question being answered, so it appears above the input
+    live_messages = st.container()
     
     # Chat input
     user_question = st.text_input("Ask a question about your condition, treatments, or health:", key="chat_input")
     
     if user_question and st.button("Ask Assistant"):
-        # Add user message to chat history
-        add_to_chat_history("user", user_question)
+        # The question joins the chat history together with its answer
+        render_chat_message(live_messages, "user", user_question)
         
         # Create context from session state
         context = ""
         if st.session_state.selected_symptoms:
             context += f"User Symptoms: {', '.join(st.session_state.selected_symptoms)}\n"
         
+        viewed_ids = ()
         if st.session_state.selected_disease:
-            kb_data = load_knowledge_base()
             context += f"Currently Viewing: {st.session_state.selected_disease}\n"
-            treatment_info = get_treatment_info(kb_data, st.session_state.selected_disease)
+            treatment_info = load_disease_lookup().get(st.session_state.selected_disease)
             if treatment_info:
+                viewed_ids = (treatment_info.disease_id,)
                 context += f"Category: {treatment_info['Category']}\n"
                 context += f"Symptoms: {treatment_info['Symptoms']}\n"
                 context += f"Ayurvedic Treatment: {treatment_info['Ayurvedic']}\n"
                 context += f"Homeopathic Treatment: {treatment_info['Homeopathic']}\n"
                 context += f"Allopathic Treatment: {treatment_info['Allopathic']}\n"
         
+        # Knowledge base entries relevant to the question, as short snippets
+        if CHAT_RETRIEVAL_TOP_K > 0:
+            query = ' '.join([user_question, *st.session_state.selected_symptoms])
+            related = load_kb_retriever().context(query, CHAT_RETRIEVAL_TOP_K, CHAT_RETRIEVAL_TOKENS, viewed_ids)
+            if related:
+                context += f"\nRelated Knowledge Base Entries:\n{related}\n"
+        
+        # Earlier turns, within the chat memory's token budget
+        memory = st.session_state.chat_memory
+        summarize = partial(summarize_conversation, client, deployment, cache=get_llm_cache())
+        conversation = memory.render(st.session_state.chat_history, summarize)
+        if conversation:
+            context += f"\nConversation so far:\n{conversation}\n"
+        
         # Generate AI response
-        with st.spinner("Generating response..."):
-            prompt = f"""
-            You are a knowledgeable health assistant specializing in holistic medicine. Use the following context to answer the user's question.
-            Provide helpful, accurate information while maintaining appropriate medical disclaimers.
-            
-            Context:
-            {context}
-            
-            User's question: {user_question}
-            
-            Provide a clear, informative response. If you don't have enough information or if the question is beyond your capabilities,
-            suggest that the user consult with a healthcare professional.
-            """
-            
-            ai_response = get_llm_response(client, deployment, prompt)
-            add_to_chat_history("assistant", ai_response)
+        prompt = f"""
+        You are a knowledgeable health assistant specializing in holistic medicine. Use the following context to answer the user's question.
+        Provide helpful, accurate information while maintaining appropriate medical disclaimers.
+        
+        Context:
+        {context}
+        
+        User's question: {user_question}
+        
+        Provide a clear, informative response. If you don't have enough information or if the question is beyond your capabilities,
+        suggest that the user consult with a healthcare professional.
+        """
+        
+        # Stream tokens into the assistant bubble as they arrive. If the user
+        # interacts mid-stream, Streamlit interrupts this script, closing()
+        # closes the HTTP stream and neither the question nor a partial
+        # answer is committed.
+        bubble = live_messages.empty()
+        render_chat_message(bubble, "assistant", "▌")
+        ai_response = ""
+        last_redraw = 0.0
+        with closing(stream_llm_response(client, deployment, prompt)) as tokens:
+            for token in tokens:
+                ai_response += token
+                now = time.monotonic()
+                if now - last_redraw >= STREAM_REDRAW_INTERVAL:
+                    render_chat_message(bubble, "assistant", ai_response + "▌")
+                    last_redraw = now
+        
+        ai_response = ai_response.strip()
+        render_chat_message(bubble, "assistant", ai_response)
+        add_to_chat_history("user", user_question)
+        add_to_chat_history("assistant", ai_response)
+        # Fold old turns now, while the answer is already on screen, rather than before the next one
+        memory.update(st.session_state.chat_history, summarize)
         
         # Force a rerun to display the new messages
         st.rerun()
@@ -0,0 +1,35 @@
+#conftest.py
+"""
+Shared fixtures for the holistic medicine chatbot tests.
+
+Tests run from the repository root against the bundled data/kb.json.
+"""
+import json
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KB_PATH = os.path.join(REPO_ROOT, 'data', 'kb.json')
+
+# The utils and tools packages are imported from the repository root
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+@pytest.fixture(scope='session')
+def kb_path():
+    """Path of the bundled knowledge base."""
+    return KB_PATH
+
+@pytest.fixture(scope='session')
+def kb_data():
+    """The bundled knowledge base as a list of disease entries."""
+    with open(KB_PATH, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+@pytest.fixture(scope='session')
+def symptom_index(kb_data):
+    """Inverted symptom index over the bundled knowledge base."""
+    from utils.symptom_index import build_symptom_index
+    return build_symptom_index(kb_data)
@@ -0,0 +1,89 @@
+#test_api_server.py
+"""
+Tests for the headless JSON API.
+"""
+import asyncio
+import json
+from urllib.parse import quote
+
+import pytest
+
+import api_server
+from utils.symptom_analyzer import find_diseases
+
+@pytest.fixture(scope='module')
+def state(kb_path, tmp_path_factory):
+    patch = pytest.MonkeyPatch()
+    # Memory-only LLM cache, no precomputed enhancements and no Azure client
+    patch.setattr(api_server, 'LLM_CACHE_PATH', '')
+    patch.setattr(api_server, 'ENHANCEMENT_STORE_PATH', str(tmp_path_factory.mktemp('store') / 'none.json'))
+    patch.setattr(api_server, 'AZURE_API_KEY', None)
+    artifact = str(tmp_path_factory.mktemp('artifact') / 'kb.bin')
+    yield api_server.ServiceState(kb_path, artifact, kb_workers=2, llm_workers=2, reload_interval=0)
+    patch.undo()
+
+def request(state, *raw_requests):
+    """Send raw HTTP requests over one connection and return the (status, payload) responses."""
+    async def run():
+        server = await asyncio.start_server(
+            lambda reader, writer: api_server.handle_connection(state, reader, writer), '127.0.0.1', 0
+        )
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        responses = []
+        for raw in raw_requests:
+            writer.write(raw)
+            await writer.drain()
+            head = await reader.readuntil(b'\r\n\r\n')
+            status = int(head.split(b' ', 2)[1])
+            length = int(next(line.split(b':')[1] for line in head.split(b'\r\n') if line.lower().startswith(b'content-length')))
+            responses.append((status, json.loads(await reader.readexactly(length))))
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return responses
+    return asyncio.run(run())
+
+def get(target):
+    return f"GET {target} HTTP/1.1\r\nHost: test\r\n\r\n".encode()
+
+def post(target, payload):
+    body = json.dumps(payload).encode()
+    return f"POST {target} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+
+def test_analyze_matches_find_diseases(state, kb_data):
+    (status, payload), = request(state, post('/analyze', {'symptoms': ['fever', 'cough'], 'top_k': 5}))
+    assert status == 200
+    expected = list(find_diseases(kb_data, ['fever', 'cough']).items())[:5]
+    assert [(r['disease'], r['score']) for r in payload['results']] == [(name, d['score']) for name, d in expected]
+
+def test_keep_alive_serves_several_requests(state, kb_data):
+    name = kb_data[0]['Disease']
+    responses = request(state, get('/health'), get('/suggest?q=head&limit=3'), get(f'/treatment?disease={quote(name)}'))
+    assert [status for status, _ in responses] == [200, 200, 200]
+    health, suggest, treatment = (payload for _, payload in responses)
+    assert health['status'] == 'ok' and health['diseases'] == len(kb_data)
+    assert health['kb_shards'] is None and health['kb_pages']['pages'] > 0
+    assert 0 < len(suggest['suggestions']) <= 3
+    assert treatment['disease'] == name and treatment['Ayurvedic'] == kb_data[0]['Ayurvedic_Treatment']
+
+def test_enhance_without_client_returns_the_kb_text(state, kb_data):
+    entry = kb_data[0]
+    (status, payload), = request(state, post('/enhance', {'disease': entry['Disease'], 'treatment_type': 'Allopathic'}))
+    assert status == 200
+    assert payload['enhanced'] is False and payload['text'] == entry['Allopathic_Treatment']
+
+@pytest.mark.parametrize('raw, status', [
+    (get('/nowhere'), 404),
+    (get('/analyze'), 405),
+    (get('/treatment'), 400),
+    (get('/treatment?disease=No%20Such%20Disease'), 404),
+    (get('/suggest?q=head&limit=0'), 400),
+    (post('/analyze', {'symptoms': 'fever'}), 400),
+    (post('/analyze', {'symptoms': ['fever'], 'top_k': 'many'}), 400),
+    (post('/enhance', {'disease': 'Migraine', 'treatment_type': 'Other'}), 400),
+    (b"POST /analyze HTTP/1.1\r\nContent-Length: 3\r\n\r\n[1]", 400),
+])
+def test_errors_map_to_status_codes(state, raw, status):
+    (got, payload), = request(state, raw)
+    assert got == status and payload['error']
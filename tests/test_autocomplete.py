@@ -0,0 +1,81 @@
+#test_autocomplete.py
+"""
+Tests for the ranked symptom autocomplete index.
+"""
+import pytest
+
+from utils.autocomplete import POPULARITY_HALF_LIFE, SymptomPopularity, build_autocomplete_index
+
+SYMPTOM_MAP = {
+    'headache': ['Migraine', 'Flu', 'Sinusitis'],
+    'head injury': ['Concussion'],
+    'heartburn': ['GERD', 'Ulcer'],
+    'heat rash': ['Miliaria'],
+    'severe headache': ['Meningitis'],
+    'chest pain': ['Angina', 'GERD'],
+    'ear pain': ['Otitis'],
+    'pain': ['Flu', 'Flu'],
+}
+
+@pytest.fixture
+def index():
+    return build_autocomplete_index(SYMPTOM_MAP)
+
+def test_prefix_matches_rank_before_substring_matches(index):
+    assert index.suggest('pain', 5) == ['pain', 'chest pain', 'ear pain']
+    assert index.suggest('head', 5) == ['headache', 'head injury', 'severe headache']
+
+def test_prefix_matches_rank_by_disease_count_then_length_then_name(index):
+    # headache (3) > heartburn (2) > head injury, heat rash (1, shorter first, then alphabetical)
+    assert index.suggest('he', 4) == ['headache', 'heartburn', 'heat rash', 'head injury']
+    # Infix matches only fill the remaining slots
+    assert index.suggest('he', 10)[4:] == ['chest pain', 'severe headache']
+    assert index.suggest('HE ', 2) == ['headache', 'heartburn']
+
+def test_ordering_is_deterministic(index):
+    shuffled = build_autocomplete_index(dict(reversed(list(SYMPTOM_MAP.items()))))
+    for text in ('he', 'pain', 'a', 'ea', 'xyz', ''):
+        assert shuffled.suggest(text, 10) == index.suggest(text, 10)
+
+def test_popularity_breaks_ties_and_decays():
+    popularity = SymptomPopularity()
+    popularity.record(1, now=0.0)
+    popularity.record(1, now=0.0)
+    assert popularity.get(1, now=0.0) == pytest.approx(2.0)
+    assert popularity.get(1, now=POPULARITY_HALF_LIFE) == pytest.approx(1.0)
+    assert popularity.get(1, now=3 * POPULARITY_HALF_LIFE) == pytest.approx(0.25)
+    # A new selection adds to the decayed score
+    popularity.record(1, now=POPULARITY_HALF_LIFE)
+    assert popularity.get(1, now=POPULARITY_HALF_LIFE) == pytest.approx(2.0)
+    assert popularity.get(2) == 0.0
+
+def test_selections_lift_a_symptom(index):
+    assert index.suggest('hea', 4)[2:] == ['heat rash', 'head injury']
+    index.record_selection(' Head Injury ')
+    index.record_selection('not a symptom')
+    assert index.suggest('hea', 4)[2:] == ['head injury', 'heat rash']
+
+def test_updated_matches_a_fresh_build_and_keeps_popularity(index):
+    index.record_selection('ear pain')
+    symptom_map = {symptom: diseases for symptom, diseases in SYMPTOM_MAP.items() if symptom != 'heartburn'}
+    symptom_map['earache'] = ['Otitis']
+    symptom_map['heavy legs'] = ['Varicose veins']
+
+    updated = index.updated(symptom_map, added=['earache', 'heavy legs'], removed=['heartburn'])
+    fresh = build_autocomplete_index(symptom_map, index)
+    for text in ('he', 'ear', 'pain', 'ache', 'burn', 'leg'):
+        assert updated.suggest(text, 10) == fresh.suggest(text, 10), text
+    assert 'heartburn' not in updated.suggest('heart', 10)
+    # Existing ids are kept, so the recorded selection still counts
+    assert updated.symptom_ids['ear pain'] == index.symptom_ids['ear pain']
+    assert updated.popularity.get(updated.symptom_ids['ear pain']) > 0
+
+    revived = updated.updated(SYMPTOM_MAP, added=['heartburn'], removed=['earache', 'heavy legs'])
+    assert revived.suggest('he', 10) == index.suggest('he', 10)
+    assert revived.symptom_ids['heartburn'] == index.symptom_ids['heartburn']
+
+def test_updated_compacts_once_most_symptoms_are_retired(index):
+    symptom_map = {'fever': ['Flu']}
+    updated = index.updated(symptom_map, added=['fever'], removed=list(SYMPTOM_MAP))
+    assert updated.names == ('fever',)
+    assert updated.suggest('e', 5) == ['fever']
@@ -0,0 +1,21 @@
+#test_benchmark.py
+"""
+Smoke test for the performance benchmark suite at a tiny KB size.
+"""
+import json
+
+from tools.benchmark import main
+
+def test_benchmark_runs_and_compares_against_its_own_baseline(tmp_path, kb_path):
+    output = tmp_path / 'results.json'
+    baseline = tmp_path / 'baseline.json'
+    argv = ['--sizes', '30', '--source', kb_path, '--queries', '5', '--repeats', '2']
+    main(argv + ['-o', str(output), '--save-baseline', str(baseline)])
+
+    results = json.loads(output.read_text())['results']['30']
+    for name in ('load_knowledge_base[cold]', 'create_symptom_mapping[cached]', 'find_diseases[exact]', 'get_treatment_info[exact]'):
+        assert results[name]['p50_ms'] >= 0
+    assert all(set(stats) >= {'p50_ms', 'p99_ms', 'ops_per_second', 'peak_memory_kb'} for stats in results.values())
+
+    # A generous threshold keeps timing noise from failing the comparison
+    main(argv + ['-o', '', '--baseline', str(baseline), '--threshold', '1000', '--p99-threshold', '1000'])
@@ -0,0 +1,97 @@
+#test_conversation_memory.py
+"""
+Tests for the token-budgeted conversation memory.
+"""
+from utils.conversation_memory import ConversationMemory, clip_to_tokens, extractive_summary, message_tokens
+from utils.llm_telemetry import estimate_tokens
+
+def chat(turns, words=10):
+    history = []
+    for turn in range(turns):
+        history.append({'role': 'user', 'content': f"question {turn} " + 'word ' * words})
+        history.append({'role': 'assistant', 'content': f"answer {turn} " + 'word ' * words})
+    return history
+
+class RecordingSummarizer:
+    """Summarizes to a fixed line, remembering what it was asked to fold."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, summary, messages, max_tokens):
+        self.calls.append((summary, [message['content'].split()[:2] for message in messages]))
+        return f"summary {len(self.calls)}"
+
+def test_short_conversation_is_verbatim():
+    memory = ConversationMemory(500, 100)
+    history = chat(1, words=3)
+    rendered = memory.render(history)
+    assert memory.summarized == 0 and not memory.summary
+    assert rendered == f"Recent messages:\nUser: {history[0]['content']}\nAssistant: {history[1]['content']}"
+
+def test_rendered_block_stays_within_the_token_budget():
+    memory = ConversationMemory(370, 150)
+    history = []
+    for turns in range(1, 40):
+        history[:] = chat(turns)
+        rendered = memory.render(history)
+        recent = history[memory.summarized:]
+        assert sum(message_tokens(message) for message in recent) <= memory.window_tokens
+        assert estimate_tokens(memory.summary) <= memory.summary_tokens
+        assert estimate_tokens(rendered) <= memory.token_budget + 20  # Section headers
+
+def test_folding_is_incremental_and_advances_the_offset():
+    memory = ConversationMemory(370, 150)
+    summarize = RecordingSummarizer()
+    history = chat(3)
+    assert not memory.update(history, summarize)
+
+    history = chat(6)
+    assert memory.update(history, summarize)
+    first = memory.summarized
+    assert first > 0 and memory.summary == "summary 1"
+    assert summarize.calls[0][0] == ""
+    assert summarize.calls[0][1][0] == ['question', '0']
+    # Folding frees half the window
+    assert sum(message_tokens(message) for message in history[first:]) <= memory.window_tokens // 2
+
+    assert not memory.update(history, summarize)
+    history = chat(12)
+    assert memory.update(history, summarize)
+    # The second update reads only messages after the first fold, plus the previous summary
+    assert summarize.calls[1][0] == "summary 1"
+    assert summarize.calls[1][1][0] == history[first]['content'].split()[:2]
+    assert memory.summarized > first
+    assert memory.summary_updates == 2
+
+def test_failing_summarizer_falls_back_to_an_extractive_summary():
+    memory = ConversationMemory(370, 150)
+
+    def fail(summary, messages, max_tokens):
+        raise RuntimeError("service unavailable")
+
+    history = chat(6)
+    assert memory.update(history, fail)
+    assert memory.summary.startswith("User: question 0")
+    assert "Assistant: answer 0" in memory.summary
+    assert memory.summary == clip_to_tokens(extractive_summary("", history[:memory.summarized], 150), 150)
+
+def test_blank_summary_also_falls_back():
+    memory = ConversationMemory(370, 150)
+    assert memory.update(chat(6), lambda summary, messages, max_tokens: "  ")
+    assert memory.summary.startswith("User: question 0")
+
+def test_shrunk_history_resets_the_memory():
+    memory = ConversationMemory(370, 150)
+    memory.update(chat(12))
+    assert memory.summarized > 4 and memory.summary
+
+    history = chat(1, words=3)
+    rendered = memory.render(history)
+    assert memory.summarized == 0 and memory.summary == ""
+    assert not rendered.startswith("Summary")
+
+def test_extractive_summary_drops_the_oldest_lines_over_budget():
+    summary = extractive_summary("", chat(10), 60)
+    assert estimate_tokens(summary) <= 60
+    assert "answer 9" in summary and "question 0" not in summary
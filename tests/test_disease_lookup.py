@@ -0,0 +1,67 @@
+#test_disease_lookup.py
+"""
+Tests for the constant-time disease lookup used by get_treatment_info.
+"""
+import pytest
+
+from utils.disease_lookup import build_disease_lookup, disease_aliases, normalize_disease_name
+from utils.kb_manager import get_treatment_info
+
+def scan_treatment_info(kb_data, disease_name):
+    """The original linear-scan get_treatment_info, kept as the reference."""
+    for entry in kb_data:
+        if entry['Disease'] == disease_name:
+            return {
+                'Ayurvedic': entry['Ayurvedic_Treatment'],
+                'Homeopathic': entry['Homeopathic_Treatment'],
+                'Allopathic': entry['Allopathic_Treatment'],
+                'Category': entry['Category'],
+                'Symptoms': entry['Symptoms']
+            }
+    return None
+
+@pytest.fixture(scope='module')
+def lookup(kb_data):
+    return build_disease_lookup(kb_data)
+
+def test_every_disease_matches_the_scan(kb_data, lookup):
+    for entry in kb_data:
+        name = entry['Disease']
+        view = get_treatment_info(kb_data, name, lookup)
+        assert dict(view) == scan_treatment_info(kb_data, name)
+        assert view.disease == name
+        assert dict(get_treatment_info(kb_data, name)) == dict(view)
+
+def test_case_whitespace_and_aliases(kb_data, lookup):
+    name = next(entry['Disease'] for entry in kb_data if '(' in entry['Disease'])
+    assert lookup.get(f"  {name.upper()} ").disease == name
+    for alias in disease_aliases(name):
+        assert lookup.get(alias).disease in {entry['Disease'] for entry in kb_data}
+
+def test_aliases_and_normalization():
+    assert normalize_disease_name("  Influenza \t (Flu) ") == "influenza (flu)"
+    assert disease_aliases("Influenza (Flu)") == ["influenza", "flu"]
+    assert disease_aliases("Asthma") == []
+
+def test_unknown_names(kb_data, lookup):
+    assert lookup.get("No Such Disease") is None
+    assert lookup.get("") is None
+    assert "No Such Disease" not in lookup
+    assert get_treatment_info(kb_data, "No Such Disease", lookup) is None
+
+def test_views_are_read_only(lookup, kb_data):
+    view = lookup.by_id(0)
+    assert view['Ayurvedic'] == kb_data[0]['Ayurvedic_Treatment']
+    with pytest.raises(TypeError):
+        view['Ayurvedic'] = 'changed'
+
+def test_reload_reuses_tables_for_unchanged_names(kb_data, lookup):
+    edited = [dict(entry) for entry in kb_data]
+    edited[0]['Ayurvedic_Treatment'] = 'Edited'
+    reloaded = build_disease_lookup(edited, previous=lookup)
+    assert reloaded._exact is lookup._exact
+    assert reloaded.get(edited[0]['Disease'])['Ayurvedic'] == 'Edited'
+
+    edited.append(dict(edited[0], Disease='Brand New Disease'))
+    grown = build_disease_lookup(edited, previous=lookup)
+    assert grown.get('brand new disease').disease == 'Brand New Disease'
@@ -0,0 +1,83 @@
+#test_fuzzy_matcher.py
+"""
+Tests for typo-tolerant symptom matching.
+"""
+import difflib
+import random
+import string
+
+import pytest
+
+from utils.fuzzy_matcher import bounded_edit_distance, build_fuzzy_matcher
+from utils.symptom_analyzer import find_diseases
+
+def edit_distance(a, b):
+    """Plain Levenshtein distance, the reference for bounded_edit_distance."""
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+def misspell(rnd, text, edits):
+    """Apply random single-character edits to a string."""
+    for _ in range(edits):
+        position = rnd.randrange(len(text) + 1)
+        kind = rnd.choice('ids') if text else 'i'
+        if kind == 'i':
+            text = text[:position] + rnd.choice(string.ascii_lowercase) + text[position:]
+        elif kind == 'd' and position < len(text):
+            text = text[:position] + text[position + 1:]
+        elif position < len(text):
+            text = text[:position] + rnd.choice(string.ascii_lowercase) + text[position + 1:]
+    return text
+
+@pytest.fixture(scope='module')
+def matcher(symptom_index):
+    return build_fuzzy_matcher(symptom_index.terms)
+
+def test_bounded_edit_distance_matches_levenshtein():
+    rnd = random.Random(0)
+    for _ in range(500):
+        a = ''.join(rnd.choice('abcde') for _ in range(rnd.randrange(8)))
+        b = misspell(rnd, a, rnd.randrange(4))
+        distance = edit_distance(a, b)
+        for max_distance in (0, 1, 2, 3):
+            expected = distance if distance <= max_distance else max_distance + 1
+            assert bounded_edit_distance(a, b, max_distance) == expected, (a, b, max_distance)
+
+def test_trigram_filter_loses_no_match(matcher):
+    """The trigram index finds every entry a brute-force scan accepts."""
+    rnd = random.Random(1)
+    entries = [entry for entry in matcher.vocabulary if len(entry) > 3]
+    for _ in range(300):
+        text = misspell(rnd, rnd.choice(entries), rnd.randrange(1, 3))
+        allowed = matcher._allowed_distance(text, None)
+        expected = set()
+        for entry in matcher.vocabulary:
+            distance = bounded_edit_distance(text, entry, allowed)
+            if distance > allowed:
+                continue
+            if distance and difflib.SequenceMatcher(None, text, entry).ratio() < matcher.min_similarity:
+                continue
+            expected.add(entry)
+        assert {entry for entry, _ in matcher.match(text, limit=len(matcher.vocabulary))} == expected, text
+
+def test_corrects_phrases_and_words(matcher):
+    assert matcher.correct('hedache') == 'headache'
+    assert matcher.correct('HEADACHE') == 'headache'
+    corrected = matcher.correct('sever hedache')
+    assert corrected is not None and 'headache' in corrected
+    assert matcher.correct('qwxzv') is None
+
+def test_short_words_allow_one_edit(matcher):
+    assert all(distance <= 1 for _, distance in matcher.match('cogh', max_distance=2, limit=50))
+
+def test_misspelled_symptoms_score_like_the_correct_spelling(kb_data, symptom_index, matcher):
+    assert find_diseases(kb_data, ['hedache'], symptom_index) == {}
+    assert find_diseases(kb_data, ['hedache'], symptom_index, matcher) == \
+        find_diseases(kb_data, ['headache'], symptom_index)
+    # Symptoms that already match are never corrected
+    assert find_diseases(kb_data, ['rash'], symptom_index, matcher) == find_diseases(kb_data, ['rash'], symptom_index)
@@ -0,0 +1,55 @@
+#test_incremental_scorer.py
+"""
+Tests for per-session incremental disease scoring.
+"""
+import random
+
+import pytest
+
+from utils.fuzzy_matcher import build_fuzzy_matcher
+from utils.incremental_scorer import IncrementalScorer
+from utils.symptom_analyzer import find_diseases, match_symptom
+from utils.vector_scorer import build_vector_scorer
+
+@pytest.fixture(scope='module')
+def fuzzy_matcher(symptom_index):
+    return build_fuzzy_matcher(symptom_index.terms)
+
+@pytest.fixture(scope='module', params=['index', 'vector'])
+def make_scorer(request, symptom_index, fuzzy_matcher):
+    vector_scorer = build_vector_scorer(symptom_index) if request.param == 'vector' else None
+    return lambda: IncrementalScorer(symptom_index, fuzzy_matcher, vector_scorer)
+
+def test_random_edits_match_find_diseases(kb_data, symptom_index, fuzzy_matcher, make_scorer):
+    rnd = random.Random(0)
+    pool = [term for term in symptom_index.terms if term][:200] + ['hedache', 'cough, fever', 'Fever', 'head']
+    scorer = make_scorer()
+    selected = []
+    for _ in range(300):
+        if selected and rnd.random() < 0.4:
+            symptom = rnd.choice(selected)
+            selected.remove(symptom)
+            assert scorer.remove(symptom)
+        else:
+            symptom = rnd.choice(pool)
+            selected.append(symptom)
+            scorer.add(symptom)
+        expected = list(find_diseases(kb_data, selected, symptom_index, fuzzy_matcher).items())
+        assert list(scorer.top().items()) == expected, selected
+        assert list(scorer.top(7).items()) == expected[:7], selected
+
+def test_remove_unknown_and_clear(make_scorer):
+    scorer = make_scorer()
+    assert scorer.top() == {}
+    assert not scorer.remove('fever')
+    scorer.add('fever')
+    scorer.add('fever')
+    assert scorer.remove('FEVER ')
+    assert len(scorer) == 1 and scorer.top()
+    scorer.clear()
+    assert len(scorer) == 0 and scorer.top() == {} and not scorer.counts
+
+def test_vector_match_equals_match_symptom(symptom_index, fuzzy_matcher):
+    vector_scorer = build_vector_scorer(symptom_index)
+    for symptom in list(symptom_index.terms[:300]) + ['', 'head', 'hedache', 'cough, fever', 'no such symptom']:
+        assert vector_scorer.match(symptom, fuzzy_matcher) == match_symptom(symptom_index, symptom, fuzzy_matcher), symptom
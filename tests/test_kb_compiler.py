@@ -0,0 +1,74 @@
+#test_kb_compiler.py
+"""
+Tests for the compiled binary knowledge base artifact.
+"""
+import os
+import pickle
+
+import pytest
+
+from utils.kb_compiler import RECORD_FIELDS, KBArtifactError, compile_knowledge_base, main, open_compiled_kb
+from utils.symptom_analyzer import find_diseases
+from utils.symptom_index import build_symptom_index, split_symptom_terms
+
+@pytest.fixture
+def artifact(tmp_path, kb_data):
+    path = str(tmp_path / 'kb.bin')
+    compile_knowledge_base(kb_data, path)
+    return path
+
+def test_round_trip_preserves_every_field(artifact, kb_data):
+    compiled = open_compiled_kb(artifact)
+    assert len(compiled) == len(kb_data)
+    for disease_id, entry in enumerate(kb_data):
+        assert dict(compiled[disease_id]) == {field: entry[field] for field in RECORD_FIELDS}
+    assert dict(compiled[-1]) == dict(compiled[len(kb_data) - 1])
+    with pytest.raises(IndexError):
+        compiled[len(kb_data)]
+
+def test_precomputed_symptom_terms(artifact, kb_data):
+    compiled = open_compiled_kb(artifact)
+    for disease_id, entry in enumerate(kb_data):
+        expected = list(dict.fromkeys(split_symptom_terms(entry['Symptoms'].lower())))
+        assert compiled.symptom_terms(disease_id) == expected
+
+def test_compiled_kb_scores_like_the_json(artifact, kb_data):
+    compiled = open_compiled_kb(artifact)
+    index = build_symptom_index(compiled)
+    for query in (['fever'], ['headache', 'nausea'], ['cough', 'sore throat', 'fatigue']):
+        assert find_diseases(compiled, query, index) == find_diseases(kb_data, query)
+
+def test_pickle_reopens_by_path(artifact):
+    compiled = pickle.loads(pickle.dumps(open_compiled_kb(artifact)))
+    assert compiled.checksum == open_compiled_kb(artifact).checksum
+    assert compiled[0]['Disease'] == open_compiled_kb(artifact)[0]['Disease']
+
+def test_freshness_follows_the_source(tmp_path, kb_data):
+    source = tmp_path / 'kb.json'
+    source.write_text('[]', encoding='utf-8')
+    path = str(tmp_path / 'kb.bin')
+    compile_knowledge_base(kb_data, path, str(source))
+    assert open_compiled_kb(path).is_fresh(str(source))
+    assert open_compiled_kb(path).is_fresh(str(tmp_path / 'missing.json'))
+    source.write_text('[ ]', encoding='utf-8')
+    assert not open_compiled_kb(path).is_fresh(str(source))
+
+def test_corrupt_artifacts_are_rejected(artifact, tmp_path):
+    data = bytearray(open(artifact, 'rb').read())
+    data[-1] ^= 0xFF
+    corrupt = tmp_path / 'corrupt.bin'
+    corrupt.write_bytes(bytes(data))
+    with pytest.raises(KBArtifactError, match="Checksum"):
+        open_compiled_kb(str(corrupt))
+    assert len(open_compiled_kb(str(corrupt), verify=False)) == len(open_compiled_kb(artifact))
+
+    for name, content in (('empty.bin', b''), ('short.bin', b'HMKB'), ('other.bin', b'X' * 200)):
+        (tmp_path / name).write_bytes(content)
+        with pytest.raises(KBArtifactError):
+            open_compiled_kb(str(tmp_path / name))
+
+def test_cli_compiles_json(tmp_path, kb_path, capsys):
+    path = tmp_path / 'kb.bin'
+    main([kb_path, str(path)])
+    assert os.path.exists(path)
+    assert 'Compiled' in capsys.readouterr().out
@@ -0,0 +1,149 @@
+#test_kb_reload.py
+"""
+Tests for diff-based reindexing and hot reload of the knowledge base.
+"""
+import json
+import os
+import random
+
+import pytest
+
+from utils.fuzzy_matcher import build_fuzzy_matcher
+from utils.kb_manager import suggest_symptoms
+from utils.kb_reload import KnowledgeBaseWatcher, build_generation
+from utils.symptom_analyzer import find_diseases
+from utils.symptom_index import build_symptom_index, update_symptom_index
+
+def copy_kb(kb_data):
+    return [dict(entry) for entry in kb_data]
+
+def assert_same_as_fresh(generation):
+    """Every index of an updated generation answers like one built from scratch."""
+    kb_data = generation.kb_data
+    fresh = build_generation(kb_data, 'fresh')
+    rnd = random.Random(len(kb_data))
+    terms = [term for term in fresh.symptom_index.terms if term]
+    queries = [[term] for term in rnd.sample(terms, 30)] + [rnd.sample(terms, 3) for _ in range(30)]
+    queries += [['hedache'], ['purple toe'], ['zebra strip rash'], ['loss of appetite']]
+    for query in queries:
+        assert list(find_diseases(kb_data, query, generation.symptom_index, generation.fuzzy_matcher).items()) == \
+            list(find_diseases(kb_data, query, fresh.symptom_index, fresh.fuzzy_matcher).items()), query
+    for text in ['hea', 'pain', 'purp', 'zebr', 'ras', 'cough']:
+        assert suggest_symptoms([], text, generation.autocomplete_index, fuzzy_matcher=generation.fuzzy_matcher) == \
+            suggest_symptoms([], text, fresh.autocomplete_index, fuzzy_matcher=fresh.fuzzy_matcher), text
+    assert sorted(generation.symptom_mapping()[1]) == sorted(fresh.symptom_mapping()[1])
+    description = "I have a headache, purple toes and no fever"
+    assert generation.symptom_extractor().extract(description).symptoms == \
+        fresh.symptom_extractor().extract(description).symptoms
+
+@pytest.fixture(scope='module')
+def base_generation(kb_data):
+    return build_generation(copy_kb(kb_data), 'base')
+
+def test_treatment_edit_reuses_every_index(base_generation):
+    kb = copy_kb(base_generation.kb_data)
+    kb[0]['Ayurvedic_Treatment'] = 'Edited'
+    generation = build_generation(kb, 'edited', base_generation)
+    assert generation.changes == {'added': 0, 'removed': 0, 'changed': 1, 'rebuilt': 'none'}
+    assert generation.symptom_index is base_generation.symptom_index
+    assert generation.fuzzy_matcher is base_generation.fuzzy_matcher
+    assert generation.disease_lookup.get(kb[0]['Disease'])['Ayurvedic'] == 'Edited'
+
+def test_existing_terms_rebuild_only_postings(base_generation):
+    kb = copy_kb(base_generation.kb_data)
+    kb[1]['Symptoms'], kb[2]['Symptoms'] = kb[2]['Symptoms'], kb[1]['Symptoms']
+    kb.insert(0, dict(kb[3], Disease='Copied Disease'))
+    generation = build_generation(kb, 'postings', base_generation)
+    assert generation.changes['rebuilt'] == 'postings'
+    assert generation.symptom_index.term_ids is base_generation.symptom_index.term_ids
+    assert generation.fuzzy_matcher is base_generation.fuzzy_matcher
+    assert_same_as_fresh(generation)
+
+def test_new_terms_are_appended(base_generation):
+    kb = copy_kb(base_generation.kb_data)
+    kb.append(dict(kb[0], Disease='Zebra Fever', Symptoms='Zebra stripe rash, purple toes, headache'))
+    generation = build_generation(kb, 'terms', base_generation)
+    index, previous = generation.symptom_index, base_generation.symptom_index
+    assert generation.changes['rebuilt'] == 'terms' and generation.changes['added'] == 1
+    assert index.terms[:len(previous.terms)] == previous.terms
+    assert index.terms[len(previous.terms):] == ('zebra stripe rash', 'purple toes')
+    assert 'Zebra Fever' in find_diseases(kb, ['purple toe'], index)
+    assert_same_as_fresh(generation)
+
+def test_retired_terms_become_tombstones(base_generation):
+    kb = copy_kb(base_generation.kb_data)
+    previous = base_generation.symptom_index
+    retired = next(term for term, postings in zip(previous.terms, previous.postings) if len(postings) == 1 and term)
+    owner = previous.postings[previous.term_ids[retired]][0]
+    del kb[owner]
+    generation = build_generation(kb, 'retired', base_generation)
+    index = generation.symptom_index
+    assert generation.changes['rebuilt'] == 'terms' and generation.changes['removed'] == 1
+    assert index.terms == previous.terms
+    assert previous.term_ids[retired] in index.tombstones
+    assert retired not in generation.fuzzy_matcher.terms
+    assert retired not in generation.symptom_mapping()[0]
+    assert_same_as_fresh(generation)
+
+    # Bringing the disease back revives the term under its old id
+    revived = build_generation(copy_kb(base_generation.kb_data), 'revived', generation)
+    assert revived.changes['rebuilt'] == 'terms'
+    assert not revived.symptom_index.tombstones
+    assert revived.symptom_index.terms == previous.terms
+    assert_same_as_fresh(revived)
+
+def test_mostly_retired_index_is_compacted(kb_data):
+    previous = build_symptom_index(kb_data)
+    index, rebuilt = update_symptom_index(previous, kb_data[:3])
+    assert rebuilt == 'full'
+    assert not index.tombstones
+    assert index.terms == build_symptom_index(kb_data[:3]).terms
+
+def test_edit_sequences_stay_equivalent(base_generation):
+    rnd = random.Random(7)
+    generation = base_generation
+    kb = copy_kb(base_generation.kb_data)
+    for step in range(12):
+        kb = copy_kb(kb)
+        choice = rnd.random()
+        if choice < 0.35:
+            kb.append(dict(rnd.choice(kb), Disease=f'New {step}', Symptoms=f'odd symptom {step}, headache'))
+        elif choice < 0.7:
+            del kb[rnd.randrange(len(kb))]
+        else:
+            entry = rnd.choice(kb)
+            entry['Symptoms'] = ', '.join(entry['Symptoms'].split(', ')[:-1]) or 'fever'
+        generation = build_generation(kb, f'step {step}', generation)
+    assert generation.number == base_generation.number + 12
+    assert_same_as_fresh(generation)
+
+def test_watcher_publishes_edits_and_skips_broken_files(tmp_path, kb_data):
+    path = tmp_path / 'kb.json'
+    path.write_text(json.dumps(kb_data), encoding='utf-8')
+    watcher = KnowledgeBaseWatcher(str(path), None, None)
+    first = watcher.current
+    assert first.number == 1 and len(first.kb_data) == len(kb_data)
+    assert not watcher.check()
+
+    edited = copy_kb(kb_data) + [dict(kb_data[0], Disease='Zebra Fever', Symptoms='Zebra stripe rash')]
+    path.write_text(json.dumps(edited), encoding='utf-8')
+    os.utime(path, ns=(1, 1))
+    assert watcher.check()
+    assert watcher.current.number == 2 and watcher.current.changes['rebuilt'] == 'terms'
+    assert 'Zebra Fever' in watcher.current.disease_lookup
+
+    path.write_text('[{"Disease": ', encoding='utf-8')
+    assert not watcher.check()
+    assert watcher.last_error and watcher.current.number == 2
+
+def test_fuzzy_matcher_update_matches_a_fresh_build(symptom_index):
+    matcher = build_fuzzy_matcher(symptom_index.terms)
+    terms = set(symptom_index.terms)
+    removed = sorted(terms)[:40]
+    added = ['zebra stripe rash', 'purple toes']
+    updated = matcher.updated(added, removed)
+    fresh = build_fuzzy_matcher((terms - set(removed)) | set(added))
+    assert updated.terms == fresh.terms and updated.words == fresh.words
+    for text in ['purpel toes', 'zebra strip rash', removed[5], 'hedache', 'feverr']:
+        assert updated.match(text) == fresh.match(text), text
+        assert updated.correct(text) == fresh.correct(text), text
@@ -0,0 +1,57 @@
+#test_kb_shards.py
+"""
+Tests for the category-sharded knowledge base and the retriever built over it.
+"""
+import json
+import os
+
+import numpy as np
+
+from utils.kb_retriever import build_kb_retriever
+from utils.kb_shards import MANIFEST_NAME, open_sharded_kb, write_kb_shards
+
+QUERIES = ('ginger for nausea', 'headache and fever', 'joint pain turmeric', 'cough')
+
+def test_shards_round_trip(tmp_path, kb_data):
+    totals = write_kb_shards(kb_data, str(tmp_path))
+    kb = open_sharded_kb(str(tmp_path))
+    assert totals['diseases'] == len(kb) == len(kb_data)
+    assert [entry['Disease'] for entry in kb] == [entry['Disease'] for entry in kb_data]
+    assert kb[7]['Allopathic_Treatment'] == kb_data[7]['Allopathic_Treatment']
+
+def test_retriever_is_built_from_saved_counts_without_loading_shards(tmp_path, kb_data):
+    write_kb_shards(kb_data, str(tmp_path))
+    kb = open_sharded_kb(str(tmp_path))
+    sharded = build_kb_retriever(kb)
+    assert kb.stats()['loads'] == 0
+
+    scanned = build_kb_retriever(kb_data)
+    for query in QUERIES:
+        expected = scanned.search(query, k=5)
+        found = sharded.search(query, k=5)
+        assert [disease_id for disease_id, _ in found] == [disease_id for disease_id, _ in expected]
+        np.testing.assert_allclose([score for _, score in found], [score for _, score in expected], rtol=1e-6)
+    disease_id = sharded.search(QUERIES[0], k=1)[0][0]
+    assert sharded.snippet(disease_id, QUERIES[0]) == scanned.snippet(disease_id, QUERIES[0])
+
+def test_manifest_without_counts_falls_back_to_a_scan(tmp_path, kb_data):
+    write_kb_shards(kb_data, str(tmp_path))
+    manifest_path = tmp_path / MANIFEST_NAME
+    manifest = json.loads(manifest_path.read_text())
+    del manifest['word_counts']
+    manifest_path.write_text(json.dumps(manifest))
+    kb = open_sharded_kb(str(tmp_path))
+    assert kb.word_counts() is None
+    assert build_kb_retriever(kb).search('cough', k=3) == build_kb_retriever(kb_data).search('cough', k=3)
+    assert kb.stats()['loads'] == kb.stats()['shards']
+
+def test_rewrite_keeps_the_previous_version_only(tmp_path, kb_data):
+    write_kb_shards(kb_data[:10], str(tmp_path))
+    first = json.loads((tmp_path / MANIFEST_NAME).read_text())['word_counts']
+    write_kb_shards(kb_data[:20], str(tmp_path))
+    second = json.loads((tmp_path / MANIFEST_NAME).read_text())['word_counts']
+    write_kb_shards(kb_data, str(tmp_path))
+    third = json.loads((tmp_path / MANIFEST_NAME).read_text())['word_counts']
+    counts_files = {name for name in os.listdir(tmp_path) if name.endswith('.npz')}
+    assert counts_files == {second, third}
+    assert first not in counts_files
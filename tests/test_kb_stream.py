@@ -0,0 +1,141 @@
+#test_kb_stream.py
+"""
+Tests for the streaming JSON array and JSONL knowledge base reader.
+"""
+import json
+import pickle
+
+import pytest
+
+from utils.kb_compiler import RECORD_FIELDS
+from utils.kb_stream import PAGE_RECORDS, KBRecordError, StreamedKnowledgeBase, iter_kb_records
+
+def record(name, **fields):
+    entry = {field: f"{field} of {name}" for field in RECORD_FIELDS}
+    entry['Disease'] = name
+    entry.update(fields)
+    return entry
+
+@pytest.fixture
+def write(tmp_path):
+    def write(text, name='kb.json'):
+        path = tmp_path / name
+        path.write_text(text, encoding='utf-8')
+        return str(path)
+    return write
+
+def reduced(kb_data):
+    return [{field: entry[field] for field in RECORD_FIELDS} for entry in kb_data]
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 64, 1 << 20])
+def test_array_matches_json_load(kb_path, kb_data, chunk_size):
+    assert list(iter_kb_records(kb_path, chunk_size=chunk_size)) == reduced(kb_data)
+
+def test_jsonl_matches_the_array(write, kb_data):
+    path = write('\n'.join(json.dumps(entry) for entry in kb_data) + '\n\n', 'kb.jsonl')
+    assert list(iter_kb_records(path)) == reduced(kb_data)
+
+def test_numbers_and_escapes_across_chunk_boundaries(write):
+    entries = [record(f"D{i} é\\\"", Extra=12345678901234567890) for i in range(20)]
+    path = write(json.dumps(entries, indent=2))
+    for chunk_size in (1, 3, 5, 11):
+        assert [entry['Disease'] for entry in iter_kb_records(path, chunk_size=chunk_size)] == \
+            [entry['Disease'] for entry in entries]
+
+def test_records_are_reduced_to_the_known_fields(write):
+    path = write(json.dumps([record('A', Extra='dropped')]))
+    assert list(iter_kb_records(path)) == [{field: record('A')[field] for field in RECORD_FIELDS}]
+
+def test_empty_array_and_whitespace(write):
+    assert list(iter_kb_records(write(' \n [ \n ] \n'))) == []
+    assert list(iter_kb_records(write(''))) == []
+
+def test_invalid_records_are_skipped_with_their_line(write):
+    text = '[\n' + ',\n'.join([
+        json.dumps(record('A')),
+        json.dumps({'Disease': 'B'}),
+        json.dumps(record('C', Symptoms=3)),
+        json.dumps(record(' ')),
+        '"not an object"',
+        json.dumps(record('F'))
+    ]) + '\n]'
+    errors = []
+    path = write(text)
+    assert [entry['Disease'] for entry in iter_kb_records(path, errors)] == ['A', 'F']
+    assert [(error.line_no, error.message.split(',')[0]) for error in errors] == [
+        (3, 'missing Category'), (4, 'Symptoms must be a string'), (5, 'empty Disease'),
+        (6, 'expected a disease object')
+    ]
+    with pytest.raises(KBRecordError, match="line 3"):
+        list(iter_kb_records(path))
+
+@pytest.mark.parametrize('text, line_no', [
+    ('[\n' + json.dumps(record('A')) + ',\n{"Disease": "B",', 3),
+    ('[\n' + json.dumps(record('A')) + '\n' + json.dumps(record('B')) + ']', 3),
+    ('[\n' + json.dumps(record('A')) + ',\n{"Disease" "B"}\n]', 3),
+    ('[\n' + json.dumps(record('A')) + '\n]\n[]', 4),
+    ('[\n' + json.dumps(record('A')) + ',\n', 3),
+])
+def test_array_syntax_errors_end_the_stream(write, text, line_no):
+    errors = []
+    records = iter_kb_records(write(text), errors, chunk_size=16)
+    assert next(records)['Disease'] == 'A'
+    with pytest.raises(KBRecordError) as raised:
+        list(records)
+    assert raised.value.line_no == line_no
+
+def test_jsonl_skips_malformed_lines_only(write):
+    text = '\n'.join([json.dumps(record('A')), '{"Disease": ', '', json.dumps([1]), json.dumps(record('D'))])
+    errors = []
+    path = write(text, 'kb.jsonl')
+    assert [entry['Disease'] for entry in iter_kb_records(path, errors)] == ['A', 'D']
+    assert [error.line_no for error in errors] == [2, 4]
+    with pytest.raises(KBRecordError, match="line 2"):
+        list(iter_kb_records(path))
+
+def test_missing_file_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        list(iter_kb_records(str(tmp_path / 'missing.json')))
+
+def test_streamed_kb_matches_the_file(kb_path, kb_data):
+    kb = StreamedKnowledgeBase(kb_path, chunk_size=64)
+    assert len(kb) == len(kb_data)
+    assert reduced(kb) == reduced(kb_data)
+    assert dict(kb[-1]) == reduced(kb_data)[-1]
+    assert kb.stats()['loads'] == kb.stats()['pages']
+
+def test_streamed_kb_reads_spans_of_multibyte_crlf_and_jsonl_files(write):
+    entries = [record(f"D{i} é ✓", Ayurvedic_Treatment=f"\u00e9 {i}\r\n") for i in range(PAGE_RECORDS + 5)]
+    array_path = write(json.dumps(entries, indent=2, ensure_ascii=False).replace('\n', '\r\n'))
+    jsonl_path = write('\r\n'.join(json.dumps(entry, ensure_ascii=False) for entry in entries), 'kb.jsonl')
+    for path in (array_path, jsonl_path):
+        kb = StreamedKnowledgeBase(path, chunk_size=7)
+        assert [kb[i]['Ayurvedic_Treatment'] for i in (PAGE_RECORDS + 4, 0, 3)] == \
+            [entries[i]['Ayurvedic_Treatment'] for i in (PAGE_RECORDS + 4, 0, 3)]
+        assert reduced(kb) == reduced(entries)
+
+def test_streamed_kb_serves_indexed_fields_without_decompressing(write):
+    kb = StreamedKnowledgeBase(write(json.dumps([record('A'), record('B')])))
+    assert [(entry['Disease'], entry['Category'], entry['Symptoms']) for entry in kb] == \
+        [('A', 'Category of A', 'Symptoms of A'), ('B', 'Category of B', 'Symptoms of B')]
+    assert kb.stats()['loads'] == 0
+    assert sorted(kb.record_fingerprints()) == ['A', 'B']
+
+def test_streamed_kb_pickles_without_its_pages(write):
+    kb = StreamedKnowledgeBase(write(json.dumps([record('A')])))
+    kb[0]['Homeopathic_Treatment']
+    copy = pickle.loads(pickle.dumps(kb))
+    assert copy.stats()['resident'] == 0
+    assert dict(copy[0]) == dict(kb[0])
+
+def test_streamed_kb_is_unaffected_by_later_edits(write):
+    path = write(json.dumps([record('A'), record('B')]))
+    kb = StreamedKnowledgeBase(path)
+    write('[{"Disease": "A", "Categ')
+    assert [entry['Allopathic_Treatment'] for entry in kb] == ['Allopathic_Treatment of A', 'Allopathic_Treatment of B']
+
+def test_streamed_kb_version_follows_the_content(write):
+    first = StreamedKnowledgeBase(write(json.dumps([record('A')]), 'a.json'))
+    same = StreamedKnowledgeBase(write(json.dumps([record('A')], indent=2), 'b.json'))
+    changed = StreamedKnowledgeBase(write(json.dumps([record('A', Homeopathic_Treatment='Arnica')]), 'c.json'))
+    assert first.version == same.version != changed.version
@@ -0,0 +1,49 @@
+#test_llm_cache.py
+"""
+Tests for the two-tier LLM response cache.
+"""
+import pytest
+
+from utils import llm_cache
+from utils.llm_cache import LLMResponseCache, make_cache_key
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, 'time', lambda: now[0])
+    return now
+
+def test_keys_depend_on_every_input():
+    key = make_cache_key('gpt', 'prompt', max_tokens=10)
+    assert key == make_cache_key('gpt', 'prompt', max_tokens=10)
+    assert len({key, make_cache_key('gpt2', 'prompt', max_tokens=10), make_cache_key('gpt', 'prompt2', max_tokens=10),
+                make_cache_key('gpt', 'prompt', max_tokens=11)}) == 4
+
+def test_memory_then_disk_hits(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    LLMResponseCache(path).set('k', 'answer')
+    cache = LLMResponseCache(path)
+    assert cache.get('k') == 'answer'
+    assert cache.get('k') == 'answer'
+    assert cache.get('other') is None
+    stats = cache.stats()
+    assert (stats['disk_hits'], stats['memory_hits'], stats['misses']) == (1, 1, 1)
+
+def test_memory_entries_expire_without_a_disk_tier(clock):
+    cache = LLMResponseCache(ttl=60)
+    cache.set('k', 'answer')
+    clock[0] += 60
+    assert cache.get('k') == 'answer'
+    clock[0] += 1
+    assert cache.get('k') is None
+    assert cache.stats()['memory_entries'] == 0
+
+def test_memory_copy_of_a_disk_entry_expires_with_it(tmp_path, clock):
+    path = str(tmp_path / 'cache.sqlite')
+    LLMResponseCache(path, ttl=60).set('k', 'answer')
+    clock[0] += 30
+    cache = LLMResponseCache(path, ttl=60)
+    assert cache.get('k') == 'answer'  # Loaded into memory from disk
+    clock[0] += 31
+    assert cache.get('k') is None
+    assert cache.stats()['misses'] == 1
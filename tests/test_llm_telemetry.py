@@ -0,0 +1,126 @@
+#test_llm_telemetry.py
+"""
+Tests for LLM call telemetry, recorded through llm_interface with a fake client.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+import utils.llm_interface as llm_interface
+import utils.llm_telemetry as llm_telemetry
+from utils.llm_cache import LLMResponseCache
+from utils.llm_telemetry import LLMCallRecord, LLMTelemetry, estimate_tokens
+
+class FakeCompletions:
+    """Stands in for client.chat.completions, returning canned responses."""
+
+    def __init__(self, text="Rest and fluids.", usage=True, error=None):
+        self.text = text
+        self.usage = usage
+        self.error = error
+        self.calls = 0
+
+    def create(self, stream=False, **kwargs):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        usage = SimpleNamespace(prompt_tokens=30, completion_tokens=7) if self.usage else None
+        if not stream:
+            message = SimpleNamespace(content=self.text)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+        chunks = [
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word + ' '))], usage=None)
+            for word in self.text.split()
+        ]
+        if usage:
+            chunks.append(SimpleNamespace(choices=[], usage=usage))
+        return FakeStream(chunks)
+
+class FakeStream:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self):
+        self.closed = True
+
+def fake_client(**kwargs):
+    return SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions(**kwargs)))
+
+@pytest.fixture
+def telemetry(monkeypatch):
+    telemetry = LLMTelemetry(window=900)
+    monkeypatch.setattr(llm_interface, 'TELEMETRY', telemetry)
+    return telemetry
+
+def test_completion_records_usage_and_cache_hits(telemetry):
+    client = fake_client()
+    cache = LLMResponseCache(path=None)
+    for _ in range(2):
+        assert llm_interface.request_completion(client, 'dep', 'prompt', 50, cache, call_site='enhancement') == \
+            "Rest and fluids."
+    assert client.chat.completions.calls == 1
+    live, hit = telemetry.records
+    assert (live.call_site, live.prompt_tokens, live.completion_tokens, live.cache_hit) == ('enhancement', 30, 7, False)
+    assert live.ttft == live.wall_time and not live.usage_estimated
+    assert hit.cache_hit and hit.total_tokens == 0
+    summary = telemetry.aggregates()['enhancement']
+    assert summary['calls'] == 2 and summary['cache_hit_rate'] == 0.5 and summary['prompt_tokens'] == 30
+
+def test_missing_usage_is_estimated(telemetry):
+    llm_interface.request_completion(fake_client(usage=False), 'dep', 'prompt', call_site='chat')
+    record, = telemetry.records
+    assert record.usage_estimated
+    assert record.completion_tokens == estimate_tokens("Rest and fluids.")
+
+def test_errors_are_recorded_by_class(telemetry):
+    with pytest.raises(TimeoutError):
+        llm_interface.request_completion(fake_client(error=TimeoutError("slow")), 'dep', 'prompt', call_site='chat')
+    assert llm_interface.get_llm_response(fake_client(error=ValueError("bad")), 'dep', 'prompt').startswith("Error")
+    assert [record.error for record in telemetry.records] == ['TimeoutError', 'ValueError']
+    assert telemetry.aggregates()['chat']['error_classes'] == {'TimeoutError': 1}
+    assert 'error="TimeoutError"' in telemetry.render_prometheus()
+
+def test_streaming_records_ttft_and_usage(telemetry):
+    client = fake_client()
+    assert ''.join(llm_interface.stream_llm_response(client, 'dep', 'prompt')).strip() == "Rest and fluids."
+    record, = telemetry.records
+    assert record.call_site == 'chat' and record.completion_tokens == 7
+    assert 0 <= record.ttft <= record.wall_time
+
+def test_abandoned_stream_is_closed_and_estimated(telemetry):
+    client = fake_client(text="one two three four", usage=False)
+    stream = llm_interface.stream_llm_response(client, 'dep', 'prompt')
+    assert next(stream) == 'one '
+    stream.close()
+    record, = telemetry.records
+    assert record.usage_estimated and record.completion_tokens == estimate_tokens('one ')
+
+def test_budget_alarms_fire_once_per_cooldown():
+    telemetry = LLMTelemetry(session_tokens_per_minute=100, tokens_per_minute=150)
+    for _ in range(3):
+        record = LLMCallRecord('chat', session_id='s1')
+        record.prompt_tokens, record.completion_tokens = 40, 20
+        telemetry.record(record)
+    assert [alarm['kind'] for alarm in telemetry.alarms] == ['session_tokens_per_minute', 'tokens_per_minute']
+    assert telemetry.session_tokens_last_minute('s1') == 180
+    assert telemetry.session_tokens_last_minute('s2') == 0
+    assert 'budget="session_tokens_per_minute"} 1' in telemetry.render_prometheus()
+
+def test_budgets_only_count_the_last_minute(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_telemetry.time, 'time', lambda: now[0])
+    telemetry = LLMTelemetry(session_tokens_per_minute=100)
+    for step in range(10):
+        now[0] = 1000.0 + 31 * step
+        record = LLMCallRecord('chat', session_id='s1')
+        record.prompt_tokens = 40
+        telemetry.record(record)
+    # Calls 31 s apart: only the current one and the one before are in the last minute
+    assert telemetry.session_tokens_last_minute('s1') == 80
+    assert len(telemetry._last_minute) <= 3
+    assert len(telemetry.records) == 10
+    assert not telemetry.alarms
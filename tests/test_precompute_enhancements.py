@@ -0,0 +1,65 @@
+#test_precompute_enhancements.py
+"""
+Tests for the offline enhancement job with a fake client.
+"""
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from tools.precompute_enhancements import read_checkpoint, run
+from utils.enhancement_store import load_enhancement_store
+
+class FlakyCompletions:
+    """Answers every prompt except those containing the failing text."""
+
+    def __init__(self, failing):
+        self.failing = failing
+        self.calls = 0
+
+    def create(self, messages, **kwargs):
+        self.calls += 1
+        prompt = messages[-1]['content']
+        if self.failing is not None and self.failing in prompt:
+            raise ConnectionError("service unavailable")
+        message = SimpleNamespace(content=f"Enhanced {self.calls}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / 'kb.enhancements.json'), str(tmp_path / 'kb.enhancements.json.partial.jsonl')
+
+def test_failures_keep_the_checkpoint_until_a_clean_rerun(kb_data, paths):
+    kb_data = kb_data[:3]
+    failing = kb_data[1]['Disease']
+    artifact_path, checkpoint_path = paths
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=FlakyCompletions(failing)))
+    totals = run(kb_data, client, 'test', artifact_path, checkpoint_path, workers=2, retries=0)
+    assert (totals['planned'], totals['generated'], totals['failed']) == (9, 6, 3)
+    assert os.path.exists(checkpoint_path)
+    assert len(read_checkpoint(checkpoint_path)) == 6
+    assert failing not in load_enhancement_store(artifact_path).entries
+
+    completions = FlakyCompletions(None)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    totals = run(kb_data, client, 'test', artifact_path, checkpoint_path, workers=2, retries=0)
+    assert (totals['reused'], totals['generated'], totals['failed']) == (6, 3, 0)
+    assert completions.calls == 3
+    assert not os.path.exists(checkpoint_path)
+    assert len(load_enhancement_store(artifact_path).entries) == 3
+
+def test_main_exits_non_zero_on_failures(monkeypatch, kb_path, paths):
+    import tools.precompute_enhancements as precompute
+    artifact_path, _ = paths
+    clients = []
+
+    def initialize(api_key, endpoint, api_version, max_retries=None):
+        clients.append(max_retries)
+        return SimpleNamespace(chat=SimpleNamespace(completions=FlakyCompletions('')))
+
+    monkeypatch.setattr(precompute, 'initialize_azure_client', initialize)
+    with pytest.raises(SystemExit) as exited:
+        precompute.main(['--kb', kb_path, '--artifact', '', '--output', artifact_path, '--retries', '0', '--limit', '2'])
+    assert exited.value.code == 1
+    assert clients == [0]
@@ -0,0 +1,23 @@
+#test_session_load.py
+"""
+Tests for the load harness's command-line options.
+"""
+import argparse
+
+import pytest
+
+from tools.session_load import latency_spec
+
+@pytest.mark.parametrize('value, spec', [
+    ('5', 'fixed:5'),
+    ('12.5', 'fixed:12.5'),
+    ('fixed:50', 'fixed:50'),
+    ('lognormal:200,0.3', 'lognormal:200,0.3'),
+])
+def test_latency_spec_accepts_milliseconds_and_distributions(value, spec):
+    assert latency_spec(value) == spec
+
+@pytest.mark.parametrize('value', ['fast', 'fixed:', 'uniform:5'])
+def test_latency_spec_rejects_malformed_values(value):
+    with pytest.raises(argparse.ArgumentTypeError):
+        latency_spec(value)
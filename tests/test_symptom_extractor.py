@@ -0,0 +1,36 @@
+#test_symptom_extractor.py
+"""
+Tests for local symptom extraction ahead of the LLM.
+"""
+import pytest
+
+from utils.llm_interface import process_natural_language_symptoms
+from utils.symptom_extractor import build_symptom_extractor
+
+@pytest.fixture(scope='session')
+def extractor(symptom_index):
+    return build_symptom_extractor(symptom_index.vocabulary)
+
+def test_known_symptoms_are_found_without_a_client(extractor):
+    symptoms, error = process_natural_language_symptoms(None, None, "I have a headache and a fever", extractor=extractor)
+    assert error is None
+    assert {'headache', 'fever'} <= {symptom.lower() for symptom in symptoms}
+
+def test_negated_symptoms_are_left_out(extractor):
+    symptoms, _ = process_natural_language_symptoms(None, None, "headache but no fever", extractor=extractor)
+    assert 'fever' not in {symptom.lower() for symptom in symptoms}
+
+def test_nothing_found_without_a_client_reports_the_configuration(extractor):
+    symptoms, error = process_natural_language_symptoms(None, None, "qwertyuiop", extractor=extractor)
+    assert symptoms == []
+    assert error == "Azure OpenAI not configured. Please set the required environment variables."
+
+def test_phrases_do_not_match_across_punctuation(extractor):
+    extraction = extractor.extract("pain in my head, ache in my legs")
+    assert 'headache' not in {symptom.lower() for symptom in extraction.symptoms}
+    assert 'headache' in {symptom.lower() for symptom in extractor.extract("head ache").symptoms}
+
+def test_a_symptom_denied_first_and_reported_later_is_kept(extractor):
+    extraction = extractor.extract("No fever yesterday. Now I have a fever")
+    assert 'fever' in {symptom.lower() for symptom in extraction.symptoms}
+    assert 'fever' in {symptom.lower() for symptom in extraction.negated}
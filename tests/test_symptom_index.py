@@ -0,0 +1,83 @@
+#test_symptom_index.py
+"""
+Tests for the inverted symptom index behind find_diseases.
+"""
+import random
+import re
+
+from utils.symptom_analyzer import find_diseases
+from utils.symptom_index import build_symptom_index
+
+def scan_find_diseases(kb_data, input_symptoms):
+    """The original full-scan find_diseases, kept as the reference for the index."""
+    input_symptoms = [s.lower().strip() for s in input_symptoms]
+    potential_diseases = {}
+    for disease in kb_data:
+        disease_symptoms = disease['Symptoms'].lower()
+        disease_symptom_list = [symptom.strip() for symptom in re.split(r'[,;]', disease_symptoms)]
+        match_count = 0
+        for user_symptom in input_symptoms:
+            if user_symptom in disease_symptoms:
+                match_count += 1
+                continue
+            for disease_symptom in disease_symptom_list:
+                if user_symptom in disease_symptom or disease_symptom in user_symptom:
+                    match_count += 1
+                    break
+        if input_symptoms:
+            match_percentage = (match_count / len(input_symptoms)) * 100
+            if match_percentage > 0:
+                potential_diseases[disease['Disease']] = {
+                    'score': match_percentage,
+                    'category': disease['Category'],
+                    'full_symptoms': disease['Symptoms']
+                }
+    return dict(sorted(potential_diseases.items(), key=lambda item: item[1]['score'], reverse=True))
+
+def test_terms_without_synonyms_match_the_scan(kb_data, symptom_index):
+    vocabulary = symptom_index.vocabulary
+    checked = 0
+    for term in symptom_index.terms:
+        symptom_id = vocabulary.lookup(term)
+        if symptom_id is not None and len(vocabulary.surface_forms[symptom_id]) > 1:
+            continue
+        assert list(find_diseases(kb_data, [term], symptom_index).items()) == \
+            list(scan_find_diseases(kb_data, [term]).items()), term
+        checked += 1
+    assert checked > 100
+
+def test_synonym_terms_extend_the_scan_with_equivalent_terms_only(kb_data, symptom_index):
+    vocabulary = symptom_index.vocabulary
+    for term in symptom_index.terms:
+        symptom_id = vocabulary.lookup(term)
+        if symptom_id is None:
+            continue
+        found = find_diseases(kb_data, [term], symptom_index)
+        expected = scan_find_diseases(kb_data, [term])
+        assert expected.keys() <= found.keys(), term
+        extra = found.keys() - expected.keys()
+        forms = vocabulary.surface_forms[symptom_id]
+        for disease in extra:
+            assert any(form in found[disease]['full_symptoms'].lower() for form in forms), (term, disease)
+
+def test_partial_and_compound_queries_match_the_scan(kb_data, symptom_index):
+    rnd = random.Random(0)
+    terms = [term for term in symptom_index.terms if len(term) > 5]
+    queries = [['head'], ['ache'], ['pain', 'fev'], ['cough, fever'], ['sore throat; runny nose'], ['']]
+    for _ in range(200):
+        picked = rnd.sample(terms, 3)
+        queries.append([term[1:-1] for term in picked])
+    for query in queries:
+        if any(symptom_index.vocabulary.lookup(symptom) is not None for symptom in query if symptom.strip()):
+            continue
+        assert list(find_diseases(kb_data, query, symptom_index).items()) == \
+            list(scan_find_diseases(kb_data, query).items()), query
+
+def test_synonym_forms_do_not_substring_match(kb_data, symptom_index):
+    appetite = set(find_diseases(kb_data, ['loss of appetite'], symptom_index))
+    assert {'Chickenpox', 'Mumps'} <= appetite
+    assert not appetite & {'Psoriasis', 'Urticaria', 'Fungal Skin Infections', 'Diaper Rash'}
+    assert 'Deep Vein Thrombosis' not in find_diseases(kb_data, ['stomach ache'], symptom_index)
+
+def test_index_is_built_on_the_fly(kb_data):
+    assert find_diseases(kb_data, ['fever']) == find_diseases(kb_data, ['fever'], build_symptom_index(kb_data))
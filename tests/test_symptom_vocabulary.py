@@ -0,0 +1,97 @@
+#test_symptom_vocabulary.py
+"""
+Tests for symptom normalization, tokenization and the session's symptom dedupe.
+"""
+import pytest
+
+from utils.symptom_analyzer import symptom_preprocess
+from utils.symptom_vocabulary import (
+    SYMPTOM_SYNONYMS, build_symptom_vocabulary, normalize_symptom, singularize, tokenize_symptoms
+)
+
+@pytest.mark.parametrize('word, singular', [
+    ('headaches', 'headache'),
+    ('allergies', 'allergy'),
+    ('rashes', 'rash'),
+    ('boxes', 'box'),
+    ('stitches', 'stitch'),
+    ('joints', 'joint'),
+    ('eyes', 'eye'),
+    ('gas', 'gas'),
+    ('loss', 'loss'),
+])
+def test_singularize_strips_regular_plurals(word, singular):
+    assert singularize(word) == singular
+
+@pytest.mark.parametrize('word', ['diabetes', 'measles', 'mumps', 'herpes', 'arthritis', 'dizziness', 'mucus', 'sepsis'])
+def test_singularize_keeps_invariant_words(word):
+    assert singularize(word) == word
+
+@pytest.mark.parametrize('symptom, key', [
+    ('  Sore   Throat ', 'sore throat'),
+    ('Sore-throat!', 'sore throat'),
+    ('Joint Pains', 'joint pain'),
+    ('Measles', 'measles'),
+    ('Rhinorrhea', 'runny nose'),
+    ('Head Ache', 'headache'),
+    ('throwing up', 'vomiting'),
+    ('Nasal discharges', 'runny nose'),
+    ('', ''),
+    (' ,; ', ''),
+])
+def test_normalize_symptom(symptom, key):
+    assert normalize_symptom(symptom) == key
+
+def test_every_synonym_normalizes_to_its_canonical_key():
+    for canonical, names in SYMPTOM_SYNONYMS.items():
+        assert normalize_symptom(canonical) == canonical
+        for name in names:
+            assert normalize_symptom(name) == canonical, name
+
+def test_custom_synonym_table():
+    vocabulary = build_symptom_vocabulary(['Fever', 'Chills'], synonyms={'chill': ('rigor',)})
+    assert vocabulary.lookup('Rigors') == vocabulary.lookup('chills') == 1
+    assert vocabulary.lookup('pyrexia') is None
+
+def test_vocabulary_shares_ids_between_surface_forms():
+    vocabulary = build_symptom_vocabulary(['Headache', 'headaches', 'Fever', 'head ache', 'Cough'])
+    assert len(vocabulary) == 3
+    assert vocabulary.surface_forms[0] == ('Headache', 'headaches', 'head ache')
+    assert vocabulary.key('HEADACHES') == vocabulary.key('cephalalgia') == 0
+    assert vocabulary.key('Itchy skin') == 'itching'
+
+@pytest.mark.parametrize('text, symptoms', [
+    ('cough, fever;chills / sore throat', ['cough', 'fever', 'chills', 'sore throat']),
+    ('CoughFeverSore throat', ['Cough', 'Fever', 'Sore throat']),
+    ('Headache, NauseaVomiting', ['Headache', 'Nausea', 'Vomiting']),
+    (' , ;; / ', []),
+    ('single symptom', ['single symptom']),
+])
+def test_tokenize_symptoms_mixed_separators(text, symptoms):
+    assert tokenize_symptoms(text) == symptoms
+
+@pytest.mark.parametrize('text, symptoms', [
+    # Examples handled by the original symptom_preprocess
+    ('Cough, Fever, Sore throat', ['Cough', 'Fever', 'Sore throat']),
+    ('Cough; Fever', ['Cough', 'Fever']),
+    ('Cough/Fever', ['Cough', 'Fever']),
+    ('CoughFeverSore throat', ['Cough', 'Fever', 'Sore throat']),
+    ('Headache', ['Headache']),
+])
+def test_symptom_preprocess_examples(text, symptoms):
+    assert symptom_preprocess(text) == symptoms
+
+@pytest.fixture
+def session():
+    import streamlit as st
+    from utils.session_manager import initialize_session_state
+    st.session_state.clear()
+    initialize_session_state()
+    yield st.session_state
+    st.session_state.clear()
+
+def test_session_skips_symptoms_that_normalize_to_a_selected_one(session):
+    from utils.session_manager import add_symptoms
+    assert add_symptoms(['Headaches', 'headache', 'head pain', 'Fever', 'pyrexia', '']) == ['Headaches', 'Fever']
+    assert add_symptoms(['FEVER', 'Cough']) == ['Cough']
+    assert session.selected_symptoms == ['Headaches', 'Fever', 'Cough']
@@ -0,0 +1,49 @@
+#test_vector_scorer.py
+"""
+Tests for the sparse-matrix scoring backend.
+"""
+import random
+
+import pytest
+
+from utils.fuzzy_matcher import build_fuzzy_matcher
+from utils.symptom_analyzer import find_diseases, find_diseases_batch
+from utils.vector_scorer import build_vector_scorer
+
+@pytest.fixture(scope='module')
+def vector_scorer(symptom_index):
+    return build_vector_scorer(symptom_index)
+
+@pytest.fixture(scope='module')
+def symptom_sets(symptom_index):
+    rnd = random.Random(0)
+    terms = [term for term in symptom_index.terms if term]
+    sets = [rnd.sample(terms, rnd.randint(1, 4)) for _ in range(150)]
+    sets += [[], [''], ['head'], ['cough, fever'], ['hedache', 'fevr'], ['no such symptom'], ['Fever', 'fever']]
+    return sets
+
+def test_single_sets_match_find_diseases(kb_data, symptom_index, vector_scorer, symptom_sets):
+    for symptoms in symptom_sets:
+        expected = find_diseases(kb_data, symptoms, symptom_index)
+        assert list(vector_scorer.score(symptoms).items()) == list(expected.items()), symptoms
+        assert list(find_diseases(kb_data, symptoms, vector_scorer=vector_scorer).items()) == list(expected.items())
+
+def test_batch_matches_find_diseases(kb_data, symptom_index, vector_scorer, symptom_sets):
+    results = vector_scorer.score_batch(symptom_sets)
+    assert len(results) == len(symptom_sets)
+    for symptoms, result in zip(symptom_sets, results):
+        assert list(result.items()) == list(find_diseases(kb_data, symptoms, symptom_index).items()), symptoms
+
+def test_batch_top_k(kb_data, symptom_index, vector_scorer, symptom_sets):
+    for symptoms, result in zip(symptom_sets, vector_scorer.score_batch(symptom_sets, top_k=5)):
+        expected = list(find_diseases(kb_data, symptoms, symptom_index).items())[:5]
+        assert list(result.items()) == expected, symptoms
+
+def test_fuzzy_correction_matches_the_index(kb_data, symptom_index, vector_scorer):
+    matcher = build_fuzzy_matcher(symptom_index.terms)
+    for symptoms in (['hedache'], ['sever hedache', 'nausea'], ['fevr', 'cogh']):
+        assert vector_scorer.score(symptoms, matcher) == find_diseases(kb_data, symptoms, symptom_index, matcher)
+
+def test_find_diseases_batch_builds_a_scorer(kb_data, symptom_index):
+    sets = [['fever'], ['rash', 'itching']]
+    assert find_diseases_batch(kb_data, sets) == [find_diseases(kb_data, symptoms, symptom_index) for symptoms in sets]
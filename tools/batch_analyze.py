@@ -0,0 +1,245 @@
+#batch_analyze.py
+"""
+Offline batch analysis of symptom sets for the holistic medicine chatbot.
+
+Streams a JSONL file of symptom sets through find_diseases on a process pool and
+writes ranked results as JSONL or CSV, without going through Streamlit.
+
+Each input line is either a JSON list of symptoms or an object with a
+"symptoms" list and an optional "id":
+
+    ["fever", "cough"]
+    {"id": "session-42", "symptoms": ["headache", "nausea"]}
+
+Usage:
+    python -m tools.batch_analyze sessions.jsonl -o results.jsonl --workers 8
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from utils.kb_manager import read_knowledge_base
+from utils.symptom_index import build_symptom_index
+from utils.symptom_analyzer import find_diseases
+
+# Per-process analysis state, loaded once by _init_worker
+_WORKER = {}
+
+def _init_worker(kb_path, artifact_path, backend, fuzzy):
+    """Load the knowledge base and build the indexes once per worker process."""
+    kb_data = read_knowledge_base(kb_path, artifact_path)
+    symptom_index = build_symptom_index(kb_data)
+    _WORKER['kb_data'] = kb_data
+    _WORKER['symptom_index'] = symptom_index
+    _WORKER['fuzzy_matcher'] = None
+    _WORKER['vector_scorer'] = None
+    if fuzzy:
+        from utils.fuzzy_matcher import build_fuzzy_matcher
+        _WORKER['fuzzy_matcher'] = build_fuzzy_matcher(symptom_index.terms)
+    if backend == 'vector':
+        from utils.vector_scorer import build_vector_scorer
+        _WORKER['vector_scorer'] = build_vector_scorer(symptom_index)
+
+def parse_line(line_no, line):
+    """
+    Parse one input line into (record id, symptoms).
+
+    Args:
+        line_no (int): 1-based line number, used as the id when none is given
+        line (str): Raw JSONL line
+
+    Returns:
+        tuple: (record_id, symptoms)
+
+    Raises:
+        ValueError: If the line is not a symptom list or symptom object
+    """
+    record = json.loads(line)
+    if isinstance(record, dict):
+        record_id = record.get('id', line_no)
+        symptoms = record.get('symptoms')
+    else:
+        record_id, symptoms = line_no, record
+    if not isinstance(symptoms, list) or not all(isinstance(s, str) for s in symptoms):
+        raise ValueError("expected a list of symptom strings")
+    return record_id, symptoms
+
+def analyze_chunk(chunk, top_k):
+    """
+    Analyze a chunk of raw input lines in a worker process.
+
+    Args:
+        chunk (list): (line_no, line) tuples
+        top_k (int): Number of ranked diseases to keep per symptom set
+
+    Returns:
+        list: Output records, one per input line
+    """
+    parsed = []
+    outputs = []
+    for line_no, line in chunk:
+        try:
+            record_id, symptoms = parse_line(line_no, line)
+        except ValueError as e:
+            outputs.append({'line': line_no, 'error': str(e)})
+            continue
+        parsed.append(len(outputs))
+        outputs.append({'line': line_no, 'id': record_id, 'symptoms': symptoms})
+
+    if _WORKER['vector_scorer'] is not None:
+        # Score the whole chunk with one batch of sparse products
+        symptom_sets = [outputs[i]['symptoms'] for i in parsed]
+        all_results = _WORKER['vector_scorer'].score_batch(symptom_sets, _WORKER['fuzzy_matcher'], top_k)
+    else:
+        all_results = [
+            find_diseases(
+                _WORKER['kb_data'],
+                outputs[i]['symptoms'],
+                _WORKER['symptom_index'],
+                _WORKER['fuzzy_matcher']
+            )
+            for i in parsed
+        ]
+
+    for i, results in zip(parsed, all_results):
+        outputs[i]['results'] = [
+            {'disease': disease, 'score': details['score'], 'category': details['category']}
+            for disease, details in islice(results.items(), top_k)
+        ]
+        del outputs[i]['symptoms']
+    return outputs
+
+def read_chunks(file, chunk_size):
+    """Yield (line_no, line) chunks from a JSONL file, skipping blank lines."""
+    chunk = []
+    for line_no, line in enumerate(file, 1):
+        if line.strip():
+            chunk.append((line_no, line))
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+class ResultWriter:
+    """Streams output records as JSONL or CSV."""
+
+    def __init__(self, file, output_format):
+        self.file = file
+        self.output_format = output_format
+        if output_format == 'csv':
+            self.csv = csv.writer(file)
+            self.csv.writerow(['line', 'id', 'rank', 'disease', 'category', 'score', 'error'])
+
+    def write(self, record):
+        if self.output_format == 'jsonl':
+            self.file.write(json.dumps(record) + "\n")
+        elif 'error' in record:
+            self.csv.writerow([record['line'], '', '', '', '', '', record['error']])
+        else:
+            for rank, result in enumerate(record['results'], 1):
+                self.csv.writerow([
+                    record['line'], record['id'], rank,
+                    result['disease'], result['category'], f"{result['score']:.2f}", ''
+                ])
+
+def run(input_file, writer, workers, chunk_size, top_k, init_args, progress_every=5.0):
+    """
+    Analyze every symptom set in input_file and stream results to writer.
+
+    At most two chunks per worker are in flight, so memory stays bounded
+    regardless of input size, and results are written in input order.
+
+    Args:
+        input_file (file): Open JSONL input
+        writer (ResultWriter): Output writer
+        workers (int): Number of worker processes; 0 analyzes in-process
+        chunk_size (int): Lines per task
+        top_k (int): Number of ranked diseases to keep per symptom set
+        init_args (tuple): Arguments for _init_worker
+        progress_every (float): Seconds between progress reports on stderr
+
+    Returns:
+        dict: Totals: lines, errors, seconds, lines_per_second
+    """
+    start = time.perf_counter()
+    last_report = start
+    totals = {'lines': 0, 'errors': 0}
+
+    def emit(outputs):
+        nonlocal last_report
+        for record in outputs:
+            writer.write(record)
+            totals['lines'] += 1
+            totals['errors'] += 'error' in record
+        now = time.perf_counter()
+        if now - last_report >= progress_every:
+            last_report = now
+            print(f"{totals['lines']} symptom sets, {totals['lines'] / (now - start):.0f}/s", file=sys.stderr)
+
+    chunks = read_chunks(input_file, chunk_size)
+    if workers == 0:
+        _init_worker(*init_args)
+        for chunk in chunks:
+            emit(analyze_chunk(chunk, top_k))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+            in_flight = deque()
+            for chunk in chunks:
+                in_flight.append(pool.submit(analyze_chunk, chunk, top_k))
+                if len(in_flight) >= 2 * workers:
+                    emit(in_flight.popleft().result())
+            while in_flight:
+                emit(in_flight.popleft().result())
+
+    seconds = time.perf_counter() - start
+    totals['seconds'] = seconds
+    totals['lines_per_second'] = totals['lines'] / seconds if seconds else 0.0
+    return totals
+
+def main(argv=None):
+    """Run batch analysis from the command line."""
+    parser = argparse.ArgumentParser(description="Analyze a JSONL file of symptom sets.")
+    parser.add_argument('input', help="JSONL file of symptom sets ('-' for stdin)")
+    parser.add_argument('-o', '--output', default='-', help="Output file ('-' for stdout)")
+    parser.add_argument('--format', choices=('jsonl', 'csv'), default='jsonl', help="Output format")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Worker processes; 0 runs in-process")
+    parser.add_argument('--chunk-size', type=int, default=500, help="Symptom sets per task")
+    parser.add_argument('--top-k', type=int, default=5, help="Ranked diseases kept per symptom set")
+    parser.add_argument('--kb', default='data/kb.json', help="Knowledge base file")
+    parser.add_argument('--artifact', default='data/kb.bin', help="Compiled knowledge base, used when fresh")
+    parser.add_argument('--backend', choices=('index', 'vector'), default='index', help="Scoring backend")
+    parser.add_argument('--fuzzy', action='store_true', help="Resolve misspelled symptoms")
+    args = parser.parse_args(argv)
+
+    input_file = sys.stdin if args.input == '-' else open(args.input, 'r')
+    output_file = sys.stdout if args.output == '-' else open(args.output, 'w', newline='')
+    try:
+        totals = run(
+            input_file,
+            ResultWriter(output_file, args.format),
+            args.workers,
+            args.chunk_size,
+            args.top_k,
+            (args.kb, args.artifact, args.backend, args.fuzzy)
+        )
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+    print(
+        f"Analyzed {totals['lines']} symptom sets ({totals['errors']} errors) in {totals['seconds']:.2f}s, "
+        f"{totals['lines_per_second']:.0f} sets/s",
+        file=sys.stderr
+    )
+
+if __name__ == "__main__":
+    main()
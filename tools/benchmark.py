@@ -0,0 +1,282 @@
+#benchmark.py
+"""
+Benchmark suite for the knowledge base and symptom matching code paths.
+
+Generates synthetic knowledge bases (see tools/synthetic_kb.py) at each
+requested size and times load_knowledge_base, create_symptom_mapping,
+find_diseases, suggest_symptoms, get_treatment_info and symptom_preprocess
+across query mixes. For every benchmark it reports p50/p99 latency, throughput
+and peak traced memory, and emits the results as JSON.
+
+With --baseline, the run is compared against a stored result file and the
+process exits with status 1 if any benchmark's p50 latency or peak memory
+regressed by more than --threshold (p99 gets the looser --p99-threshold).
+
+Usage:
+    python -m tools.benchmark --sizes 100,1000,10000 --save-baseline baseline.json
+    python -m tools.benchmark --sizes 100,1000,10000 --baseline baseline.json --threshold 0.25
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from utils.kb_manager import load_knowledge_base, create_symptom_mapping, get_treatment_info, suggest_symptoms
+from utils.symptom_analyzer import find_diseases, symptom_preprocess
+from utils.symptom_index import build_symptom_index
+from utils.disease_lookup import build_disease_lookup
+from utils.autocomplete import build_autocomplete_index
+from utils.fuzzy_matcher import build_fuzzy_matcher
+from tools.synthetic_kb import generate_kb
+
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+
+def percentile(sorted_values, fraction):
+    """Return the nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(fraction * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+def measure(operation, inputs, setup=None, memory_samples=20):
+    """
+    Time an operation over a list of inputs and measure its peak memory.
+
+    Latencies are taken without tracing; peak memory is measured in a
+    separate traced pass over the first memory_samples inputs.
+
+    Args:
+        operation (callable): Function of one input
+        inputs (list): Inputs, one call each
+        setup (callable): Optional function run untimed before every call (e.g. cache clearing)
+        memory_samples (int): Number of inputs replayed under tracemalloc
+
+    Returns:
+        dict: calls, p50_ms, p99_ms, mean_ms, ops_per_second, peak_memory_kb
+    """
+    latencies = []
+    gc.collect()
+    for value in inputs:
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        operation(value)
+        latencies.append(time.perf_counter() - start)
+
+    gc.collect()
+    peak_memory = 0
+    tracemalloc.start()
+    try:
+        for value in inputs[:memory_samples]:
+            if setup is not None:
+                setup()
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            operation(value)
+            peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+
+    total = sum(latencies)
+    latencies.sort()
+    return {
+        'calls': len(latencies),
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'mean_ms': total / len(latencies) * 1000 if latencies else 0.0,
+        'ops_per_second': len(latencies) / total if total else 0.0,
+        'peak_memory_kb': peak_memory / 1024
+    }
+
+def build_query_mixes(kb_data, terms, rng, queries):
+    """
+    Build benchmark inputs from a knowledge base.
+
+    Args:
+        kb_data (list): Disease entries
+        terms (list): Symptom vocabulary
+        rng (random.Random): Random generator
+        queries (int): Inputs per mix
+
+    Returns:
+        dict: Mix name -> list of inputs
+    """
+    def typo(term):
+        position = rng.randrange(len(term))
+        return term[:position] + term[position + 1:] if len(term) > 4 else term
+
+    names = [entry['Disease'] for entry in kb_data]
+    symptom_strings = [entry['Symptoms'] for entry in kb_data]
+    return {
+        'find_diseases[exact]': [rng.sample(terms, rng.randint(1, 4)) for _ in range(queries)],
+        'find_diseases[partial]': [
+            [term[:rng.randint(3, max(len(term), 3))] for term in rng.sample(terms, rng.randint(1, 3))]
+            for _ in range(queries)
+        ],
+        'find_diseases[typo]': [[typo(term) for term in rng.sample(terms, rng.randint(1, 3))] for _ in range(queries)],
+        'suggest_symptoms[prefix]': [rng.choice(terms)[:rng.randint(1, 6)] for _ in range(queries)],
+        'suggest_symptoms[infix]': [rng.choice(terms)[1:rng.randint(4, 8)] for _ in range(queries)],
+        'suggest_symptoms[typo]': [typo(rng.choice(terms)) for _ in range(queries)],
+        'get_treatment_info[exact]': [rng.choice(names) for _ in range(queries)],
+        'get_treatment_info[case]': [rng.choice(names).lower() for _ in range(queries)],
+        'symptom_preprocess[list]': [rng.choice(symptom_strings) for _ in range(queries)],
+        'symptom_preprocess[camel]': [
+            ''.join(term.capitalize() for term in rng.sample(terms, rng.randint(2, 4))) for _ in range(queries)
+        ],
+        'symptom_preprocess[single]': [rng.choice(terms) for _ in range(queries)]
+    }
+
+def benchmark_size(size, source_kb, seed, queries, repeats):
+    """
+    Run every benchmark against one synthetic knowledge base.
+
+    Args:
+        size (int): Number of diseases
+        source_kb (list): Knowledge base whose distributions are reproduced
+        seed (int): Random seed
+        queries (int): Calls per query benchmark
+        repeats (int): Calls per load/build benchmark
+
+    Returns:
+        dict: Benchmark name -> measurements
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        kb_path = os.path.join(directory, 'kb.json')
+        with open(kb_path, 'w') as file:
+            json.dump(generate_kb(size, source_kb, seed), file)
+
+        # Streamlit-cached loaders: cold (cache cleared before every call) and warm
+        results['load_knowledge_base[cold]'] = measure(load_knowledge_base, [kb_path] * repeats, load_knowledge_base.clear)
+        results['load_knowledge_base[cached]'] = measure(load_knowledge_base, [kb_path] * repeats)
+        kb_data = load_knowledge_base(kb_path)
+        results['create_symptom_mapping[cold]'] = measure(
+            create_symptom_mapping, [kb_data] * repeats, create_symptom_mapping.clear
+        )
+        results['create_symptom_mapping[cached]'] = measure(create_symptom_mapping, [kb_data] * repeats)
+        symptom_map, all_symptoms, _ = create_symptom_mapping(kb_data)
+
+        symptom_index = build_symptom_index(kb_data)
+        fuzzy_matcher = build_fuzzy_matcher(all_symptoms)
+        autocomplete_index = build_autocomplete_index(symptom_map)
+        disease_lookup = build_disease_lookup(kb_data)
+
+        operations = {
+            'find_diseases': lambda symptoms: find_diseases(kb_data, symptoms, symptom_index, fuzzy_matcher),
+            'suggest_symptoms': lambda partial_input: suggest_symptoms(
+                all_symptoms, partial_input, autocomplete_index, fuzzy_matcher=fuzzy_matcher
+            ),
+            'get_treatment_info': lambda name: get_treatment_info(kb_data, name, disease_lookup),
+            'symptom_preprocess': symptom_preprocess
+        }
+        terms = sorted(term for term in all_symptoms if term)
+        mixes = build_query_mixes(kb_data, terms, random.Random(seed), queries)
+        for name, inputs in mixes.items():
+            results[name] = measure(operations[name.split('[')[0]], inputs)
+
+        load_knowledge_base.clear()
+        create_symptom_mapping.clear()
+    return results
+
+def compare(results, baseline, threshold, p99_threshold):
+    """
+    Compare results with a baseline.
+
+    Args:
+        results (dict): Current run ("results" section)
+        baseline (dict): Baseline run ("results" section)
+        threshold (float): Allowed fractional increase of p50 latency and peak memory
+        p99_threshold (float): Allowed fractional increase of p99 latency
+
+    Returns:
+        list: Regression descriptions, empty if none
+    """
+    regressions = []
+    limits = (('p50_ms', threshold), ('p99_ms', p99_threshold), ('peak_memory_kb', threshold))
+    for size, benchmarks in results.items():
+        for name, current in benchmarks.items():
+            previous = baseline.get(size, {}).get(name)
+            if previous is None:
+                continue
+            for metric, limit in limits:
+                # Ignore sub-microsecond timings and tiny allocations, which are noise
+                floor = 0.001 if metric.endswith('_ms') else 1.0
+                if current[metric] > max(previous[metric], floor) * (1 + limit):
+                    regressions.append(
+                        f"{name}@{size}: {metric} {previous[metric]:.4g} -> {current[metric]:.4g} "
+                        f"(+{(current[metric] / max(previous[metric], floor) - 1) * 100:.0f}%)"
+                    )
+    return regressions
+
+def main(argv=None):
+    """Run the benchmark suite from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark KB loading and symptom matching at increasing scale.")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)), help="Comma-separated KB sizes")
+    parser.add_argument('--source', default='data/kb.json', help="Knowledge base whose distributions are reproduced")
+    parser.add_argument('--queries', type=int, default=500, help="Calls per query benchmark")
+    parser.add_argument('--repeats', type=int, default=5, help="Calls per load/build benchmark")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    parser.add_argument('-o', '--output', default='-', help="Result file ('-' for stdout)")
+    parser.add_argument('--baseline', default=None, help="Baseline result file to compare against")
+    parser.add_argument('--save-baseline', default=None, help="Also write the results to this baseline file")
+    parser.add_argument('--threshold', type=float, default=0.25, help="Allowed p50/memory regression (0.25 = 25%%)")
+    parser.add_argument('--p99-threshold', type=float, default=1.0, help="Allowed p99 regression")
+    args = parser.parse_args(argv)
+
+    with open(args.source, 'r') as file:
+        source_kb = json.load(file)
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'seed': args.seed,
+            'queries': args.queries,
+            'repeats': args.repeats
+        },
+        'results': {}
+    }
+    for size in sizes:
+        print(f"Benchmarking {size} diseases...", file=sys.stderr)
+        report['results'][str(size)] = benchmark_size(size, source_kb, args.seed, args.queries, args.repeats)
+
+    for path in (args.output, args.save_baseline):
+        if path == '-':
+            json.dump(report, sys.stdout, indent=2)
+            print()
+        elif path:
+            with open(path, 'w') as file:
+                json.dump(report, file, indent=2)
+
+    for size, benchmarks in report['results'].items():
+        print(f"\n{size} diseases", file=sys.stderr)
+        print(f"{'benchmark':<32} {'p50 ms':>9} {'p99 ms':>9} {'ops/s':>10} {'peak KB':>10}", file=sys.stderr)
+        for name, stats in benchmarks.items():
+            print(
+                f"{name:<32} {stats['p50_ms']:>9.3f} {stats['p99_ms']:>9.3f} "
+                f"{stats['ops_per_second']:>10.0f} {stats['peak_memory_kb']:>10.1f}",
+                file=sys.stderr
+            )
+
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)
+        regressions = compare(report['results'], baseline['results'], args.threshold, args.p99_threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:", file=sys.stderr)
+            for regression in regressions:
+                print(f"  {regression}", file=sys.stderr)
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#load_test.py
+"""
+Local load test for the headless JSON API.
+
+Opens a number of keep-alive connections to api_server.py and replays a mix of
+analysis, autocomplete and treatment requests for a fixed duration, then reports
+throughput and latency percentiles per endpoint.
+
+Usage:
+    python api_server.py --port 8080 &
+    python -m tools.load_test --port 8080 --connections 32 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from urllib.parse import quote
+
+from utils.kb_manager import read_knowledge_base
+from utils.symptom_index import build_symptom_index
+
+def percentile(sorted_values, fraction):
+    """Return the nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(fraction * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+def build_requests(kb_path, artifact_path, seed):
+    """Build request factories from the knowledge base vocabulary."""
+    symptom_index = build_symptom_index(read_knowledge_base(kb_path, artifact_path))
+    terms = [term for term in symptom_index.terms if term]
+    names = list(symptom_index.names)
+    rng = random.Random(seed)
+
+    def analyze():
+        body = json.dumps({'symptoms': rng.sample(terms, rng.randint(1, 4))})
+        return 'analyze', 'POST', '/analyze', body.encode('utf-8')
+
+    def suggest():
+        term = rng.choice(terms)
+        return 'suggest', 'GET', f"/suggest?q={quote(term[:rng.randint(3, max(len(term), 3))])}", b''
+
+    def treatment():
+        return 'treatment', 'GET', f"/treatment?disease={quote(rng.choice(names))}", b''
+
+    return rng, [(analyze, 0.4), (suggest, 0.5), (treatment, 0.1)]
+
+async def client(host, port, rng, mix, deadline, latencies, errors):
+    """Send requests over one keep-alive connection until the deadline."""
+    reader, writer = await asyncio.open_connection(host, port)
+    factories = [factory for factory, _ in mix]
+    weights = [weight for _, weight in mix]
+    try:
+        while time.perf_counter() < deadline:
+            name, method, target, body = rng.choices(factories, weights)[0]()
+            request = (
+                f"{method} {target} HTTP/1.1\r\nHost: {host}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+            ).encode('latin-1') + body
+
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            head = await reader.readuntil(b'\r\n\r\n')
+            status = int(head.split(b' ', 2)[1])
+            length = 0
+            for line in head.split(b'\r\n'):
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':', 1)[1])
+            await reader.readexactly(length)
+            latencies.setdefault(name, []).append(time.perf_counter() - start)
+            if status != 200:
+                errors[name] = errors.get(name, 0) + 1
+    finally:
+        writer.close()
+
+async def run(args):
+    """Run the load test and return per-endpoint statistics."""
+    rng, mix = build_requests(args.kb, args.artifact, args.seed)
+    latencies, errors = {}, {}
+    deadline = time.perf_counter() + args.duration
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        client(args.host, args.port, random.Random(rng.random()), mix, deadline, latencies, errors)
+        for _ in range(args.connections)
+    ))
+    elapsed = time.perf_counter() - started
+
+    report = {}
+    for name, values in sorted(latencies.items()):
+        values.sort()
+        report[name] = {
+            'requests': len(values),
+            'errors': errors.get(name, 0),
+            'rps': len(values) / elapsed,
+            'p50_ms': percentile(values, 0.50) * 1000,
+            'p90_ms': percentile(values, 0.90) * 1000,
+            'p99_ms': percentile(values, 0.99) * 1000,
+            'max_ms': values[-1] * 1000
+        }
+    return report
+
+def main(argv=None):
+    """Run the load test from the command line."""
+    parser = argparse.ArgumentParser(description="Load test the headless JSON API.")
+    parser.add_argument('--host', default='127.0.0.1', help="API host")
+    parser.add_argument('--port', type=int, default=8080, help="API port")
+    parser.add_argument('--connections', type=int, default=16, help="Concurrent keep-alive connections")
+    parser.add_argument('--duration', type=float, default=10.0, help="Test duration in seconds")
+    parser.add_argument('--kb', default='data/kb.json', help="Knowledge base used to generate requests")
+    parser.add_argument('--artifact', default='data/kb.bin', help="Compiled knowledge base, used when fresh")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for the request mix")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return
+    print(f"{'endpoint':<10} {'requests':>9} {'errors':>7} {'rps':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, stats in report.items():
+        print(
+            f"{name:<10} {stats['requests']:>9} {stats['errors']:>7} {stats['rps']:>8.0f} "
+            f"{stats['p50_ms']:>8.2f} {stats['p90_ms']:>8.2f} {stats['p99_ms']:>8.2f} {stats['max_ms']:>8.2f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+#mock_azure_openai.py
+"""
+Local stand-in for the Azure OpenAI chat completions API.
+
+Speaks the subset of the REST API that the AzureOpenAI client uses for chat
+completions, both plain and streamed (server-sent events), so llm_interface,
+the app and the JSON API can be benchmarked offline. Latency, token throughput
+and error rates are configurable, and a seeded random generator keeps runs
+reproducible.
+
+Responses come from a rules file: the first rule whose regex matches the last
+user message is used, and its template can reference the regex's named groups
+as $name. Without a file, built-in rules answer the symptom extraction and
+treatment enhancement prompts.
+
+    {"default": "...", "rules": [{"match": "Disease: (?P<disease>.+)", "response": "About $disease ..."}]}
+
+Usage:
+    python -m tools.mock_azure_openai --port 8081 --latency lognormal:300,0.4 --tokens-per-second 60 --rate-429 0.05
+    AZURE_OPENAI_MOCK_ENDPOINT=http://127.0.0.1:8081 streamlit run app.py
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import time
+import uuid
+from string import Template
+from urllib.parse import urlsplit
+
+MAX_HEADER_BYTES = 16 * 1024
+KEEP_ALIVE_TIMEOUT = 30.0
+
+_PATH = re.compile(r'^/openai/deployments/(?P<deployment>[^/]+)/chat/completions$')
+_TOKEN = re.compile(r'\S+\s*|\s+')
+
+DEFAULT_RULES = {
+    'default': "This is a simulated response from the local mock Azure OpenAI server. "
+               "Please consult a qualified healthcare professional for medical advice.",
+    'rules': [
+        {
+            'match': r'Extract specific medical symptoms',
+            'response': "headache, fever, fatigue"
+        },
+        {
+            'match': r'Enhance this (?P<treatment_type>\w+) treatment description for (?P<disease>[^\n]+?) with',
+            'response': "$treatment_type care for $disease typically combines the base treatment with rest, "
+                        "hydration and follow-up with a practitioner. Benefits depend on the individual, and "
+                        "any treatment should be reviewed with a qualified professional before starting."
+        }
+    ]
+}
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            429: 'Too Many Requests', 500: 'Internal Server Error'}
+
+def parse_distribution(spec):
+    """
+    Parse a latency distribution in milliseconds.
+
+    Accepted forms: fixed:MS, uniform:LOW,HIGH, normal:MEAN,STD, lognormal:MEDIAN,SIGMA.
+
+    Args:
+        spec (str): Distribution spec
+
+    Returns:
+        callable: Function of a random.Random returning a delay in seconds
+
+    Raises:
+        ValueError: If the spec is malformed
+    """
+    kind, _, values = spec.partition(':')
+    try:
+        params = [float(value) for value in values.split(',')] if values else []
+    except ValueError:
+        raise ValueError(f"Invalid distribution parameters: {spec}")
+    arity = {'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2}
+    if kind not in arity or len(params) != arity[kind]:
+        raise ValueError(f"Expected one of fixed:MS, uniform:LOW,HIGH, normal:MEAN,STD, lognormal:MEDIAN,SIGMA, got {spec}")
+
+    if kind == 'fixed':
+        sample = lambda rng: params[0]
+    elif kind == 'uniform':
+        sample = lambda rng: rng.uniform(params[0], params[1])
+    elif kind == 'normal':
+        sample = lambda rng: rng.gauss(params[0], params[1])
+    else:
+        sample = lambda rng: rng.lognormvariate(math.log(params[0]), params[1])
+    return lambda rng: max(sample(rng), 0.0) / 1000
+
+def count_tokens(text):
+    """Approximate the token count of a text (about four characters per token)."""
+    return max(1, len(text) // 4) if text else 0
+
+class MockBehavior:
+    """Latency, throughput, fault and response settings for the mock server."""
+
+    def __init__(self, latency='fixed:0', tokens_per_second=0.0, rate_429=0.0, rate_500=0.0,
+                 rules=None, seed=0):
+        self.latency = parse_distribution(latency)
+        self.tokens_per_second = tokens_per_second
+        self.rate_429 = rate_429
+        self.rate_500 = rate_500
+        rules = rules or DEFAULT_RULES
+        self.default = Template(rules.get('default', DEFAULT_RULES['default']))
+        self.rules = [(re.compile(rule['match']), Template(rule['response'])) for rule in rules.get('rules', [])]
+        self.rng = random.Random(seed)
+        self.stats = {'requests': 0, 'streamed': 0, 'status_429': 0, 'status_500': 0,
+                      'completion_tokens': 0, 'in_flight': 0, 'max_in_flight': 0}
+
+    def respond(self, deployment, prompt):
+        """Render the response text for a prompt."""
+        for pattern, template in self.rules:
+            match = pattern.search(prompt)
+            if match:
+                return template.safe_substitute(match.groupdict(), deployment=deployment)
+        return self.default.safe_substitute(deployment=deployment)
+
+    def fault(self):
+        """Draw an injected error status, or None to serve the request."""
+        draw = self.rng.random()
+        if draw < self.rate_429:
+            return 429
+        if draw < self.rate_429 + self.rate_500:
+            return 500
+        return None
+
+    def token_delay(self):
+        return 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+def _head(status, content_type, extra=(), length=None):
+    lines = [f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}", f"Content-Type: {content_type}"]
+    lines.append(f"Content-Length: {length}" if length is not None else "Transfer-Encoding: chunked")
+    lines.extend(extra)
+    return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1')
+
+def _json_response(status, payload, extra=()):
+    body = json.dumps(payload).encode('utf-8')
+    return _head(status, 'application/json', extra, len(body)) + body
+
+def _error(status, code, message):
+    return {'error': {'code': code, 'message': message}}
+
+async def complete(behavior, deployment, request, writer):
+    """
+    Serve one chat completion, plain or streamed.
+
+    Args:
+        behavior (MockBehavior): Server behaviour
+        deployment (str): Deployment name from the URL
+        request (dict): Chat completion request body
+        writer (StreamWriter): Connection to write the response to
+    """
+    messages = request.get('messages') or []
+    prompt = next((m.get('content') or '' for m in reversed(messages) if m.get('role') == 'user'), '')
+    prompt_tokens = sum(count_tokens(m.get('content') or '') for m in messages)
+    max_tokens = request.get('max_tokens') or 4096
+
+    tokens = _TOKEN.findall(behavior.respond(deployment, prompt))
+    finish_reason = 'length' if len(tokens) > max_tokens else 'stop'
+    tokens = tokens[:max_tokens]
+    usage = {'prompt_tokens': prompt_tokens, 'completion_tokens': len(tokens),
+             'total_tokens': prompt_tokens + len(tokens)}
+    completion_id = f"chatcmpl-{uuid.UUID(int=behavior.rng.getrandbits(128)).hex}"
+    created = int(time.time())
+    behavior.stats['completion_tokens'] += len(tokens)
+
+    # Time to first token
+    await asyncio.sleep(behavior.latency(behavior.rng))
+    token_delay = behavior.token_delay()
+
+    if not request.get('stream'):
+        await asyncio.sleep(token_delay * len(tokens))
+        writer.write(_json_response(200, {
+            'id': completion_id,
+            'object': 'chat.completion',
+            'created': created,
+            'model': deployment,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': ''.join(tokens)},
+                'finish_reason': finish_reason
+            }],
+            'usage': usage
+        }))
+        return
+
+    behavior.stats['streamed'] += 1
+    writer.write(_head(200, 'text/event-stream', ('Cache-Control: no-cache',)))
+
+    def event(payload):
+        data = b"data: " + (payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')) + b"\n\n"
+        return f"{len(data):x}\r\n".encode('latin-1') + data + b"\r\n"
+
+    def chunk(delta, finish=None):
+        return {
+            'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': deployment,
+            'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish}]
+        }
+
+    # Azure opens the stream with a chunk that has no choices (prompt filter results)
+    writer.write(event({'id': '', 'object': '', 'created': 0, 'model': '', 'choices': [],
+                        'prompt_filter_results': [{'prompt_index': 0, 'content_filter_results': {}}]}))
+    writer.write(event(chunk({'role': 'assistant', 'content': ''})))
+    await writer.drain()
+    for token in tokens:
+        if token_delay:
+            await asyncio.sleep(token_delay)
+        writer.write(event(chunk({'content': token})))
+        await writer.drain()
+    writer.write(event(chunk({}, finish_reason)))
+    if (request.get('stream_options') or {}).get('include_usage'):
+        writer.write(event({'id': completion_id, 'object': 'chat.completion.chunk', 'created': created,
+                            'model': deployment, 'choices': [], 'usage': usage}))
+    writer.write(event(b"[DONE]"))
+    writer.write(b"0\r\n\r\n")
+
+async def handle_connection(behavior, reader, writer):
+    """Serve requests on one keep-alive connection."""
+    try:
+        while True:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), KEEP_ALIVE_TIMEOUT)
+            except (asyncio.IncompleteReadError, asyncio.TimeoutError, asyncio.LimitOverrunError, ConnectionError):
+                return
+            lines = head.decode('latin-1').split('\r\n')
+            try:
+                method, target, _ = lines[0].split(' ', 2)
+            except ValueError:
+                return
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(':')
+                if name:
+                    headers[name.strip().lower()] = value.strip()
+            try:
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+            except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+                return
+
+            path = urlsplit(target).path
+            match = _PATH.match(path)
+            if path == '/stats' and method == 'GET':
+                writer.write(_json_response(200, behavior.stats))
+            elif match is None:
+                writer.write(_json_response(404, _error(404, 'NotFound', f"No route for {path}")))
+            elif method != 'POST':
+                writer.write(_json_response(405, _error(405, 'MethodNotAllowed', "Use POST")))
+            else:
+                behavior.stats['requests'] += 1
+                status = behavior.fault()
+                try:
+                    request = json.loads(body or b'{}')
+                except ValueError:
+                    request, status = None, 400
+                if status == 400:
+                    writer.write(_json_response(400, _error(400, 'BadRequest', "Request body must be JSON")))
+                elif status == 429:
+                    behavior.stats['status_429'] += 1
+                    writer.write(_json_response(429, _error(429, '429', "Rate limit is exceeded. Try again in 1 second."),
+                                                ('Retry-After: 1', 'retry-after-ms: 1000')))
+                elif status == 500:
+                    behavior.stats['status_500'] += 1
+                    writer.write(_json_response(500, _error(500, 'InternalServerError', "Injected server error")))
+                else:
+                    behavior.stats['in_flight'] += 1
+                    behavior.stats['max_in_flight'] = max(behavior.stats['max_in_flight'], behavior.stats['in_flight'])
+                    try:
+                        await complete(behavior, match.group('deployment'), request, writer)
+                    finally:
+                        behavior.stats['in_flight'] -= 1
+            await writer.drain()
+            if headers.get('connection', '').lower() == 'close':
+                return
+    except ConnectionError:
+        return
+    finally:
+        writer.close()
+
+async def serve(behavior, host, port):
+    """Run the mock server until cancelled."""
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_connection(behavior, reader, writer),
+        host, port, limit=MAX_HEADER_BYTES
+    )
+    addresses = ', '.join(str(sock.getsockname()) for sock in server.sockets)
+    print(f"Mock Azure OpenAI listening on {addresses}")
+    async with server:
+        await server.serve_forever()
+
+def main(argv=None):
+    """Start the mock server from the command line."""
+    parser = argparse.ArgumentParser(description="Local mock of the Azure OpenAI chat completions API.")
+    parser.add_argument('--host', default='127.0.0.1', help="Interface to bind")
+    parser.add_argument('--port', type=int, default=8081, help="Port to listen on")
+    parser.add_argument('--latency', default='fixed:0',
+                        help="Time to first token in ms: fixed:MS, uniform:LOW,HIGH, normal:MEAN,STD or lognormal:MEDIAN,SIGMA")
+    parser.add_argument('--tokens-per-second', type=float, default=0.0, help="Generation speed; 0 is instant")
+    parser.add_argument('--rate-429', type=float, default=0.0, help="Fraction of requests rejected with 429")
+    parser.add_argument('--rate-500', type=float, default=0.0, help="Fraction of requests failed with 500")
+    parser.add_argument('--responses', default=None, help="JSON rules file with canned or templated responses")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    args = parser.parse_args(argv)
+
+    rules = None
+    if args.responses:
+        with open(args.responses, 'r') as file:
+            rules = json.load(file)
+    try:
+        behavior = MockBehavior(args.latency, args.tokens_per_second, args.rate_429, args.rate_500, rules, args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+    try:
+        asyncio.run(serve(behavior, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#precompute_enhancements.py
+"""
+Offline precomputation of enhanced treatment descriptions.
+
+Generates the LLM enhancement for every disease and treatment type in the
+knowledge base and writes them to a sidecar artifact that the app and the JSON
+API serve without calling the LLM. Entries that are already fresh in an
+existing artifact are kept, so rerunning after a KB edit only regenerates the
+diseases that changed.
+
+Completed enhancements are appended to a JSONL checkpoint as they arrive; an
+interrupted run picks up from the checkpoint. The checkpoint is removed once
+the artifact has been written with no failures, and the command exits with
+status 1 while any enhancement failed, so a rerun retries just those.
+
+Usage:
+    python -m tools.precompute_enhancements --workers 4
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from utils.config import AZURE_API_KEY, AZURE_ENDPOINT, AZURE_DEPLOYMENT, AZURE_API_VERSION
+from utils.kb_manager import read_knowledge_base
+from utils.llm_interface import initialize_azure_client, request_completion, build_enhancement_prompt
+from utils.enhancement_store import (
+    TREATMENT_TYPES, enhancement_hash, kb_content_hash, load_enhancement_store, write_enhancement_store
+)
+
+TREATMENT_FIELDS = {treatment_type: f"{treatment_type}_Treatment" for treatment_type in TREATMENT_TYPES}
+
+def plan_jobs(kb_data):
+    """
+    List every enhancement the knowledge base needs.
+
+    Args:
+        kb_data (list): List of disease entries
+
+    Returns:
+        list: (disease, treatment_type, base_treatment, symptoms, hash) tuples
+    """
+    jobs = []
+    for entry in kb_data:
+        for treatment_type, field in TREATMENT_FIELDS.items():
+            args = (treatment_type, entry[field], entry['Disease'], entry['Symptoms'])
+            jobs.append((entry['Disease'], treatment_type, entry[field], entry['Symptoms'], enhancement_hash(*args)))
+    return jobs
+
+def read_checkpoint(path):
+    """
+    Read completed enhancements from a checkpoint file.
+
+    Args:
+        path (str): Checkpoint path
+
+    Returns:
+        dict: (disease, treatment_type) -> {"hash": ..., "text": ...}
+    """
+    done = {}
+    try:
+        with open(path, 'r') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Torn last line from an interrupted write
+                done[(record['disease'], record['treatment_type'])] = {'hash': record['hash'], 'text': record['text']}
+    except FileNotFoundError:
+        pass
+    return done
+
+def run(kb_data, client, deployment, artifact_path, checkpoint_path, workers, retries=2, limit=None):
+    """
+    Generate missing enhancements and write the artifact.
+
+    At most workers requests are in flight at once. Each completion is
+    checkpointed before the next job is submitted in its place.
+
+    Args:
+        kb_data (list): List of disease entries
+        client (AzureOpenAI): Azure OpenAI client
+        deployment (str): Azure deployment name
+        artifact_path (str): Artifact to update
+        checkpoint_path (str): JSONL checkpoint for resuming
+        workers (int): Maximum concurrent LLM requests
+        retries (int): Extra attempts per failed enhancement
+        limit (int): Generate at most this many enhancements in this run
+
+    Returns:
+        dict: Totals: planned, reused, generated, failed, seconds
+    """
+    start = time.perf_counter()
+    jobs = plan_jobs(kb_data)
+
+    # Reuse fresh entries from the previous artifact and the checkpoint
+    previous = load_enhancement_store(artifact_path)
+    checkpointed = read_checkpoint(checkpoint_path)
+    entries = {}
+    missing = []
+    for disease, treatment_type, base_treatment, symptoms, digest in jobs:
+        known = checkpointed.get((disease, treatment_type))
+        if previous is not None and (known is None or known['hash'] != digest):
+            known = previous.entries.get(disease, {}).get(treatment_type)
+        if known is not None and known['hash'] == digest:
+            entries.setdefault(disease, {})[treatment_type] = known
+        else:
+            missing.append((disease, treatment_type, base_treatment, symptoms, digest))
+    totals = {'planned': len(jobs), 'reused': len(jobs) - len(missing), 'generated': 0, 'failed': 0}
+    if limit is not None:
+        missing = missing[:limit]
+
+    def generate(job):
+        disease, treatment_type, base_treatment, symptoms, _ = job
+        prompt = build_enhancement_prompt(treatment_type, base_treatment, disease, symptoms)
+        for attempt in range(retries + 1):
+            try:
+                return request_completion(client, deployment, prompt, call_site="precompute")
+            except Exception:
+                if attempt == retries:
+                    raise
+                time.sleep(2 ** attempt)
+
+    with open(checkpoint_path, 'a') as checkpoint, ThreadPoolExecutor(max_workers=workers) as pool:
+        queue = iter(missing)
+        in_flight = {}
+        for job in queue:
+            in_flight[pool.submit(generate, job)] = job
+            if len(in_flight) >= workers:
+                break
+        while in_flight:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                disease, treatment_type, _, _, digest = in_flight.pop(future)
+                try:
+                    text = future.result()
+                except Exception as e:
+                    totals['failed'] += 1
+                    print(f"Failed {disease} / {treatment_type}: {type(e).__name__}: {str(e)}", file=sys.stderr)
+                else:
+                    if text:
+                        entries.setdefault(disease, {})[treatment_type] = {'hash': digest, 'text': text}
+                        checkpoint.write(json.dumps({
+                            'disease': disease, 'treatment_type': treatment_type, 'hash': digest, 'text': text
+                        }) + "\n")
+                        checkpoint.flush()
+                        totals['generated'] += 1
+                    else:
+                        totals['failed'] += 1
+                next_job = next(queue, None)
+                if next_job is not None:
+                    in_flight[pool.submit(generate, next_job)] = next_job
+            done = totals['generated'] + totals['failed']
+            if done % 50 == 0:
+                print(f"{done}/{len(missing)} enhancements", file=sys.stderr)
+
+    write_enhancement_store(artifact_path, entries, kb_content_hash(kb_data), deployment)
+    # Failed or skipped jobs are simply missing from the artifact. The checkpoint
+    # stays while something failed, so the next run starts from everything this one got
+    if not totals['failed']:
+        os.remove(checkpoint_path)
+    totals['seconds'] = time.perf_counter() - start
+    return totals
+
+def main(argv=None):
+    """Precompute treatment enhancements from the command line."""
+    parser = argparse.ArgumentParser(description="Precompute enhanced treatment descriptions.")
+    parser.add_argument('--kb', default='data/kb.json', help="Knowledge base file")
+    parser.add_argument('--artifact', default='data/kb.bin', help="Compiled knowledge base, used when fresh")
+    parser.add_argument('--output', default='data/kb.enhancements.json', help="Enhancement artifact to write")
+    parser.add_argument('--checkpoint', default=None, help="Checkpoint file (default: <output>.partial.jsonl)")
+    parser.add_argument('--workers', type=int, default=4, help="Maximum concurrent LLM requests")
+    parser.add_argument('--retries', type=int, default=2, help="Extra attempts per failed enhancement")
+    parser.add_argument('--limit', type=int, default=None, help="Generate at most this many enhancements")
+    args = parser.parse_args(argv)
+
+    # run() retries with its own backoff; client retries on top would multiply the attempts
+    client = initialize_azure_client(AZURE_API_KEY, AZURE_ENDPOINT, AZURE_API_VERSION, max_retries=0)
+    if client is None:
+        parser.error("Azure OpenAI not configured. Please set the required environment variables.")
+
+    totals = run(
+        read_knowledge_base(args.kb, args.artifact),
+        client,
+        AZURE_DEPLOYMENT,
+        args.output,
+        args.checkpoint or f"{args.output}.partial.jsonl",
+        args.workers,
+        args.retries,
+        args.limit
+    )
+    print(
+        f"{totals['planned']} enhancements: {totals['reused']} reused, {totals['generated']} generated, "
+        f"{totals['failed']} failed in {totals['seconds']:.1f}s",
+        file=sys.stderr
+    )
+    if totals['failed']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+#session_load.py
+"""
+Multi-session load harness for the Streamlit app.
+
+Drives N simulated sessions concurrently through scripted user journeys
+against app.py with Streamlit's AppTest, in one process, the way a single
+Streamlit worker serves its sessions from threads. Every widget interaction is
+a full rerun of the script, so the harness records the latency of each rerun
+per journey step, along with process CPU and memory, at each concurrency level.
+
+The AI steps run against an in-process tools.mock_azure_openai server, so no
+Azure credentials are used.
+
+Journey: load the page, add common symptoms, type and add a symptom, analyze,
+open a disease, enable AI mode (enhanced treatments), ask the assistant, go back.
+
+Usage:
+    python -m tools.session_load --sessions 1,2,4,8 --journeys 3 --llm-latency lognormal:200,0.3
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+def percentile(sorted_values, fraction):
+    """Return the nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(fraction * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+def latency_spec(value):
+    """
+    Check a --llm-latency value, reading a plain number as fixed milliseconds.
+
+    Args:
+        value (str): "50", or a distribution such as fixed:50 or lognormal:200,0.3
+
+    Returns:
+        str: Distribution spec for tools.mock_azure_openai
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is neither
+    """
+    from tools.mock_azure_openai import parse_distribution
+
+    try:
+        float(value)
+    except ValueError:
+        spec = value
+    else:
+        spec = f"fixed:{value}"
+    try:
+        parse_distribution(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return spec
+
+def start_mock_llm(latency, tokens_per_second, seed):
+    """
+    Run the mock Azure OpenAI server on a background thread.
+
+    Args:
+        latency (str): Latency distribution spec for the mock
+        tokens_per_second (float): Mock generation speed
+        seed (int): Random seed
+
+    Returns:
+        str: Endpoint URL of the mock server
+    """
+    from tools.mock_azure_openai import MockBehavior, handle_connection
+
+    behavior = MockBehavior(latency, tokens_per_second, seed=seed)
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(
+        lambda reader, writer: handle_connection(behavior, reader, writer), '127.0.0.1', 0
+    ))
+    threading.Thread(target=loop.run_forever, name='mock-llm', daemon=True).start()
+    return f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+def share_streamlit_runtime():
+    """
+    Install one mock Streamlit runtime and script cache shared by all simulated sessions.
+
+    AppTest installs a fresh mock Runtime before each run and removes it after,
+    so a session finishing its rerun would pull the runtime out from under the
+    others; it also recompiles the script every run, and concurrent compiles
+    are not safe on every Python version. Redirecting AppTest's assignments to
+    a stand-in class and handing it a single ScriptCache leaves one shared
+    runtime and one compiled script in place, as in a real server process.
+    """
+    from unittest.mock import MagicMock
+    from streamlit.runtime import Runtime
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = app_test.MediaFileManager(app_test.MemoryMediaFileStorage("/mock/media"))
+    runtime.dataframe_source_mgr = app_test.DataframeSourceManager()
+    runtime.cache_storage_manager = app_test.MemoryCacheStorageManager()
+    registry = app_test.BidiComponentManager()
+    registry.discover_and_register_components(start_file_watching=False)
+    runtime.bidi_component_registry = registry
+    Runtime._instance = runtime
+    app_test.Runtime = type('Runtime', (), {'_instance': None})
+    script_cache = app_test.ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+
+class ResourceSampler(threading.Thread):
+    """Samples process CPU time and resident memory in the background."""
+
+    def __init__(self, interval=0.25):
+        super().__init__(name='resource-sampler', daemon=True)
+        self.interval = interval
+        self.samples = []
+        self._stop_event = threading.Event()
+
+    @staticmethod
+    def rss_bytes():
+        try:
+            with open('/proc/self/statm', 'r') as file:
+                return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError):
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    @staticmethod
+    def cpu_seconds():
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return usage.ru_utime + usage.ru_stime
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.samples.append(self.rss_bytes())
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+def run_journey(seed, timeout):
+    """
+    Drive one session through the scripted journey.
+
+    Args:
+        seed (int): Random seed for symptom and disease choices
+        timeout (float): Seconds allowed per rerun
+
+    Returns:
+        list: (step name, seconds) per rerun
+    """
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    timings = []
+
+    def step(name, action):
+        start = time.perf_counter()
+        action()
+        timings.append((name, time.perf_counter() - start))
+        if at.exception:
+            raise RuntimeError(f"{name}: {at.exception[0].value}")
+
+    def button(buttons, label=None, key_prefix=None):
+        for widget in buttons:
+            if (label is not None and widget.label == label) or (key_prefix and (widget.key or '').startswith(key_prefix)):
+                return widget
+        raise LookupError(f"No button {label or key_prefix}")
+
+    step('load', at.run)
+    for key in rng.sample(range(17), 2):
+        step('add_common_symptom', lambda: at.sidebar.button(key=f"common_{key}").click().run())
+    step('type_symptom', lambda: at.sidebar.text_input(key='symptom_text_input').input(rng.choice(['head', 'fev', 'cou', 'naus'])).run())
+    step('add_symptom', lambda: at.sidebar.button(key='add_direct').click().run())
+    step('analyze', lambda: button(at.sidebar.button, label='Analyze Symptoms').click().run())
+    step('open_disease', lambda: button(at.button, key_prefix='select_').click().run())
+    step('enable_ai_mode', lambda: at.sidebar.toggle[0].set_value(True).run())
+    step('type_question', lambda: at.text_input(key='chat_input').input("What should I eat to recover faster?").run())
+    step('ask_assistant', lambda: button(at.button, label='Ask Assistant').click().run())
+    step('back_to_list', lambda: button(at.button, label='← Back to Disease List').click().run())
+    return timings
+
+def run_level(sessions, journeys, seed, timeout):
+    """
+    Run journeys on a number of concurrent sessions.
+
+    Args:
+        sessions (int): Concurrent sessions
+        journeys (int): Journeys per session
+        seed (int): Base random seed
+        timeout (float): Seconds allowed per rerun
+
+    Returns:
+        dict: Per-step and overall rerun latency, throughput, CPU and memory
+    """
+    def session(index):
+        timings = []
+        for journey in range(journeys):
+            timings.extend(run_journey(seed * 1000003 + index * 1009 + journey, timeout))
+        return timings
+
+    sampler = ResourceSampler()
+    sampler.start()
+    cpu_start = ResourceSampler.cpu_seconds()
+    start = time.perf_counter()
+    failures = []
+    timings = []
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        for future in [pool.submit(session, index) for index in range(sessions)]:
+            try:
+                timings.extend(future.result())
+            except Exception as e:
+                failures.append(f"{type(e).__name__}: {str(e)}")
+    elapsed = time.perf_counter() - start
+    cpu = ResourceSampler.cpu_seconds() - cpu_start
+    sampler.stop()
+
+    by_step = {}
+    for name, seconds in timings:
+        by_step.setdefault(name, []).append(seconds)
+    by_step['all'] = [seconds for _, seconds in timings]
+
+    def summarize(values):
+        values.sort()
+        return {
+            'reruns': len(values),
+            'p50_ms': percentile(values, 0.50) * 1000,
+            'p95_ms': percentile(values, 0.95) * 1000,
+            'p99_ms': percentile(values, 0.99) * 1000,
+            'max_ms': values[-1] * 1000 if values else 0.0
+        }
+
+    return {
+        'sessions': sessions,
+        'seconds': elapsed,
+        'reruns_per_second': len(timings) / elapsed if elapsed else 0.0,
+        'cpu_percent': cpu / elapsed * 100 if elapsed else 0.0,
+        'peak_rss_mb': max(sampler.samples or [ResourceSampler.rss_bytes()]) / (1024 * 1024),
+        'failures': failures,
+        'steps': {name: summarize(values) for name, values in by_step.items()}
+    }
+
+def main(argv=None):
+    """Run the multi-session load harness from the command line."""
+    parser = argparse.ArgumentParser(description="Drive concurrent simulated sessions through app.py.")
+    parser.add_argument('--sessions', default='1,2,4,8', help="Comma-separated concurrency levels")
+    parser.add_argument('--journeys', type=int, default=2, help="Journeys per session at each level")
+    parser.add_argument('--llm-latency', type=latency_spec, default='fixed:50',
+                        help="Mock LLM time to first token in ms: MS, fixed:MS, uniform:LOW,HIGH, normal:MEAN,STD "
+                             "or lognormal:MEDIAN,SIGMA")
+    parser.add_argument('--llm-tokens-per-second', type=float, default=0.0, help="Mock LLM generation speed")
+    parser.add_argument('--timeout', type=float, default=60.0, help="Seconds allowed per rerun")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    # Must be set before utils.config is imported by the app
+    os.environ['AZURE_OPENAI_MOCK_ENDPOINT'] = start_mock_llm(args.llm_latency, args.llm_tokens_per_second, args.seed)
+    os.environ.setdefault('LLM_CACHE_PATH', '')  # Keep the LLM cache in memory
+
+    share_streamlit_runtime()
+
+    # Warm up imports and the shared caches so the first level is not penalised
+    run_journey(args.seed, args.timeout)
+
+    report = []
+    for sessions in [int(level) for level in args.sessions.split(',') if level]:
+        print(f"Running {sessions} concurrent session(s)...", file=sys.stderr)
+        report.append(run_level(sessions, args.journeys, args.seed, args.timeout))
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return
+    for level in report:
+        print(
+            f"\n{level['sessions']} session(s): {level['reruns_per_second']:.1f} reruns/s, "
+            f"CPU {level['cpu_percent']:.0f}%, peak RSS {level['peak_rss_mb']:.0f} MB, "
+            f"{len(level['failures'])} failed journey(s)"
+        )
+        print(f"{'step':<20} {'reruns':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        for name, stats in level['steps'].items():
+            print(
+                f"{name:<20} {stats['reruns']:>7} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} "
+                f"{stats['p99_ms']:>9.1f} {stats['max_ms']:>9.1f}"
+            )
+        for failure in level['failures']:
+            print(f"  failed: {failure}")
+
+if __name__ == "__main__":
+    main()
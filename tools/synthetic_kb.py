@@ -0,0 +1,161 @@
+#synthetic_kb.py
+"""
+Synthetic knowledge base generator for benchmarks.
+
+Scales data/kb.json up to any number of diseases while keeping its schema and
+the shape of its symptom strings: the number of symptoms per disease, the
+separators, the capitalisation and the skewed term frequencies (a few very
+common symptoms such as "fatigue", a long tail of rare ones) are all sampled
+from the source KB. The vocabulary grows sublinearly with the KB size, the way
+a real symptom vocabulary does.
+
+Usage:
+    python -m tools.synthetic_kb --size 10000 -o /tmp/kb_10k.json
+"""
+import argparse
+import json
+import random
+import re
+import sys
+from collections import Counter
+from itertools import accumulate
+
+_SPLIT = re.compile(r'\s*([,;])\s*')
+
+QUALIFIERS = (
+    'mild', 'severe', 'chronic', 'recurrent', 'intermittent', 'persistent', 'sudden', 'nocturnal',
+    'morning', 'progressive', 'localized', 'generalized', 'left-sided', 'right-sided', 'episodic',
+    'exertional', 'postprandial', 'bilateral', 'acute', 'low-grade'
+)
+
+TREATMENT_FIELDS = ('Ayurvedic_Treatment', 'Homeopathic_Treatment', 'Allopathic_Treatment')
+
+def profile_kb(kb_data):
+    """
+    Measure the distributions the generator reproduces.
+
+    Args:
+        kb_data (list): Source disease entries
+
+    Returns:
+        dict: Term frequencies, symptoms per disease, separator and category frequencies, names and treatments
+    """
+    term_counts = Counter()
+    symptom_counts = []
+    separators = Counter()
+    for entry in kb_data:
+        parts = _SPLIT.split(entry['Symptoms'].strip())
+        terms = [part for part in parts[::2] if part]
+        separators.update(parts[1::2])
+        symptom_counts.append(len(terms))
+        for term in terms:
+            term_counts[term.lower()] += 1
+    return {
+        'terms': [term for term, _ in term_counts.most_common()],
+        'term_weights': [count for _, count in term_counts.most_common()],
+        'symptom_counts': symptom_counts,
+        'separators': separators or Counter({',': 1}),
+        'categories': Counter(entry['Category'] for entry in kb_data),
+        'names': [entry['Disease'] for entry in kb_data],
+        'treatments': {field: [entry[field] for entry in kb_data] for field in TREATMENT_FIELDS}
+    }
+
+def build_vocabulary(profile, size, rng):
+    """
+    Build a weighted symptom vocabulary for a KB of the given size.
+
+    The source terms keep their relative frequencies; new terms are qualified
+    variants of source terms and get tail frequencies.
+
+    Args:
+        profile (dict): Output of profile_kb
+        size (int): Number of diseases to generate
+        rng (random.Random): Random generator
+
+    Returns:
+        tuple: (terms, weights)
+    """
+    terms = list(profile['terms'])
+    weights = [float(weight) for weight in profile['term_weights']]
+    source_diseases = len(profile['symptom_counts'])
+    target = int(len(terms) * max(size / source_diseases, 1.0) ** 0.6)
+    seen = set(terms)
+    source_cumulative = list(accumulate(profile['term_weights']))
+    attempts = 0
+    while len(terms) < target and attempts < target * 20:
+        attempts += 1
+        base = rng.choices(profile['terms'], cum_weights=source_cumulative)[0]
+        qualifier = rng.choice(QUALIFIERS)
+        term = f"{qualifier} {base}"
+        if len(terms) >= len(QUALIFIERS) * len(profile['terms']):
+            term = f"{qualifier} {base} {rng.randint(2, 99)}"
+        if term in seen:
+            continue
+        seen.add(term)
+        terms.append(term)
+        # Zipf-like tail: later terms are rarer
+        weights.append(1.0 / (1 + (len(terms) - len(profile['terms'])) ** 0.5))
+    return terms, weights
+
+def generate_kb(size, source_kb, seed=0):
+    """
+    Generate a synthetic knowledge base.
+
+    Args:
+        size (int): Number of diseases
+        source_kb (list): Source disease entries whose distributions are reproduced
+        seed (int): Random seed
+
+    Returns:
+        list: Disease entries with the same keys as kb.json
+    """
+    rng = random.Random(seed)
+    profile = profile_kb(source_kb)
+    terms, weights = build_vocabulary(profile, size, rng)
+    cumulative = list(accumulate(weights))
+    separators, separator_weights = zip(*profile['separators'].items())
+    categories, category_weights = zip(*profile['categories'].items())
+
+    kb_data = []
+    for i in range(size):
+        base_name = profile['names'][i % len(profile['names'])]
+        name = base_name if i < len(profile['names']) else f"{base_name} Type {i // len(profile['names']) + 1}"
+        count = rng.choice(profile['symptom_counts'])
+        chosen = []
+        while len(chosen) < min(count, len(terms)):
+            term = rng.choices(terms, cum_weights=cumulative)[0]
+            if term not in chosen:
+                chosen.append(term)
+        separator = rng.choices(separators, separator_weights)[0]
+        symptoms = f"{separator} ".join(chosen)
+        entry = {
+            'Disease': name,
+            'Category': rng.choices(categories, category_weights)[0],
+            'Symptoms': symptoms[:1].upper() + symptoms[1:]
+        }
+        for field in TREATMENT_FIELDS:
+            entry[field] = rng.choice(profile['treatments'][field])
+        kb_data.append(entry)
+    return kb_data
+
+def main(argv=None):
+    """Generate a synthetic knowledge base from the command line."""
+    parser = argparse.ArgumentParser(description="Generate a synthetic knowledge base.")
+    parser.add_argument('--size', type=int, required=True, help="Number of diseases")
+    parser.add_argument('--source', default='data/kb.json', help="Knowledge base whose distributions are reproduced")
+    parser.add_argument('-o', '--output', default='-', help="Output file ('-' for stdout)")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    args = parser.parse_args(argv)
+
+    with open(args.source, 'r') as file:
+        source_kb = json.load(file)
+    kb_data = generate_kb(args.size, source_kb, args.seed)
+    if args.output == '-':
+        json.dump(kb_data, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, 'w') as file:
+            json.dump(kb_data, file, indent=2)
+
+if __name__ == "__main__":
+    main()
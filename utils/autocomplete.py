@@ -0,0 +1,242 @@
+#autocomplete.py
+"""
+Ranked prefix/infix autocomplete over the symptom vocabulary for the holistic medicine chatbot.
+"""
+import heapq
+import math
+import threading
+import time
+from bisect import bisect_left
+
+# Length of the n-grams used for infix matches
+NGRAM_SIZE = 3
+
+# Half-life of a recorded selection, in seconds
+POPULARITY_HALF_LIFE = 24 * 60 * 60
+
+# How many diseases one fully popular selection is worth when ranking
+POPULARITY_WEIGHT = 1.0
+
+# Share of retired symptoms at which updated() rebuilds the index
+RETIRED_COMPACT_RATIO = 0.5
+
+# Sorts after every character, so [prefix, prefix + _MAX_CHAR) spans all completions
+_MAX_CHAR = chr(0x10FFFF)
+
+class SymptomPopularity:
+    """
+    Thread-safe, exponentially decayed selection counts shared by all sessions.
+    """
+    __slots__ = ('half_life', '_scores', '_lock')
+
+    def __init__(self, half_life=POPULARITY_HALF_LIFE):
+        self.half_life = half_life
+        self._scores = {}
+        self._lock = threading.Lock()
+
+    def _decayed(self, entry, now):
+        score, updated = entry
+        return score * math.pow(0.5, (now - updated) / self.half_life)
+
+    def record(self, symptom_id, now=None):
+        """Record one selection of a symptom."""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._scores.get(symptom_id)
+            score = self._decayed(entry, now) if entry else 0.0
+            self._scores[symptom_id] = (score + 1.0, now)
+
+    def remapped(self, id_map):
+        """
+        Copy the selection counts onto new symptom ids.
+
+        Args:
+            id_map (dict): Old symptom id -> new symptom id; symptoms missing from it are dropped
+
+        Returns:
+            SymptomPopularity: Popularity over the new ids
+        """
+        popularity = SymptomPopularity(self.half_life)
+        with self._lock:
+            popularity._scores = {
+                id_map[symptom_id]: entry for symptom_id, entry in self._scores.items() if symptom_id in id_map
+            }
+        return popularity
+
+    def get(self, symptom_id, now=None):
+        """Return the decayed popularity of a symptom."""
+        entry = self._scores.get(symptom_id)
+        if not entry:
+            return 0.0
+        return self._decayed(entry, time.time() if now is None else now)
+
+class AutocompleteIndex:
+    """
+    Autocomplete index over a symptom vocabulary.
+
+    Prefix matches come from a sorted array searched with bisect; infix matches
+    come from an n-gram index. Results are ranked prefix matches first, then by
+    the number of diseases referencing the symptom plus its recent popularity,
+    then shorter and alphabetically first, so ordering is deterministic.
+
+    Symptom ids are stable across updated(): new symptoms are appended and
+    retired ones keep their id with a disease count of zero.
+    """
+    __slots__ = ('names', 'disease_counts', 'symptoms', 'order', 'symptom_ids', 'ngram_symptoms', 'popularity')
+
+    def __init__(self, symptoms, disease_counts, popularity=None, previous=None):
+        # Every symptom by id, and the live ones in sorted order for bisect
+        self.names = symptoms
+        self.disease_counts = disease_counts
+        self.symptoms = symptoms
+        self.order = range(len(symptoms))
+
+        if previous is not None and previous.names == symptoms:
+            # Same vocabulary: share the lookup structures and keep the popularity
+            self.symptom_ids = previous.symptom_ids
+            self.ngram_symptoms = previous.ngram_symptoms
+            self.popularity = popularity or previous.popularity
+            return
+
+        self.symptom_ids = {symptom: symptom_id for symptom_id, symptom in enumerate(symptoms)}
+        if popularity is None and previous is not None:
+            popularity = previous.popularity.remapped({
+                symptom_id: self.symptom_ids[symptom]
+                for symptom_id, symptom in enumerate(previous.names) if symptom in self.symptom_ids
+            })
+        self.popularity = popularity or SymptomPopularity()
+
+        ngram_symptoms = {}
+        for symptom_id, symptom in enumerate(symptoms):
+            for gram in {symptom[i:i + NGRAM_SIZE] for i in range(len(symptom) - NGRAM_SIZE + 1)}:
+                ngram_symptoms.setdefault(gram, []).append(symptom_id)
+        self.ngram_symptoms = {gram: tuple(ids) for gram, ids in ngram_symptoms.items()}
+
+    def updated(self, symptom_map, added=(), removed=()):
+        """
+        Derive the index for an edited knowledge base from its symptom delta.
+
+        Only the added symptoms are n-grammed; the selection popularity is kept.
+
+        Args:
+            symptom_map (dict): Mapping of symptom -> list of diseases, for the disease counts
+            added (iterable): Symptoms now in use
+            removed (iterable): Symptoms no longer in use
+
+        Returns:
+            AutocompleteIndex: Updated index
+        """
+        new_names = sorted({symptom for symptom in added if symptom and symptom not in self.symptom_ids})
+        names = self.names + tuple(new_names)
+        disease_counts = tuple(len(set(symptom_map.get(symptom, ()))) for symptom in names)
+        retired = disease_counts.count(0)
+        if retired >= RETIRED_COMPACT_RATIO * len(names):
+            return build_autocomplete_index(symptom_map, self)
+
+        index = object.__new__(AutocompleteIndex)
+        index.names = names
+        index.disease_counts = disease_counts
+        index.symptom_ids = dict(self.symptom_ids)
+        index.symptom_ids.update((symptom, symptom_id) for symptom_id, symptom in enumerate(new_names, len(self.names)))
+        index.popularity = self.popularity
+
+        new_grams = {}
+        for symptom_id, symptom in enumerate(new_names, len(self.names)):
+            for gram in {symptom[i:i + NGRAM_SIZE] for i in range(len(symptom) - NGRAM_SIZE + 1)}:
+                new_grams.setdefault(gram, []).append(symptom_id)
+        index.ngram_symptoms = dict(self.ngram_symptoms) if new_grams else self.ngram_symptoms
+        for gram, ids in new_grams.items():
+            index.ngram_symptoms[gram] = index.ngram_symptoms.get(gram, ()) + tuple(ids)
+
+        # Merge the newly live symptoms into the sorted array, dropping the retired ones
+        dead = {self.symptom_ids[symptom] for symptom in removed if symptom in self.symptom_ids}
+        revived = {index.symptom_ids[symptom] for symptom in added if symptom in index.symptom_ids}
+        if not dead and not revived:
+            index.symptoms, index.order = self.symptoms, self.order
+            return index
+        kept = [(symptom, symptom_id) for symptom, symptom_id in zip(self.symptoms, self.order)
+                if symptom_id not in dead and symptom_id not in revived]
+        born = sorted((names[symptom_id], symptom_id) for symptom_id in revived if disease_counts[symptom_id])
+        merged = list(heapq.merge(kept, born))
+        index.symptoms = tuple(symptom for symptom, _ in merged)
+        index.order = tuple(symptom_id for _, symptom_id in merged)
+        return index
+
+    def __len__(self):
+        return len(self.symptoms)
+
+    def prefix_range(self, prefix):
+        """Return the ids of the symptoms starting with a lower-cased prefix."""
+        return self.order[bisect_left(self.symptoms, prefix):bisect_left(self.symptoms, prefix + _MAX_CHAR)]
+
+    def infix_matches(self, text):
+        """Return the ids of symptoms containing a lower-cased string."""
+        if len(text) < NGRAM_SIZE:
+            return [i for i, symptom in zip(self.order, self.symptoms) if text in symptom]
+
+        candidates = None
+        grams = {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+        for gram in sorted(grams, key=lambda g: len(self.ngram_symptoms.get(g, ()))):
+            ids = self.ngram_symptoms.get(gram)
+            if not ids:
+                return []
+            candidates = set(ids) if candidates is None else candidates.intersection(ids)
+            if not candidates:
+                return []
+        return [i for i in candidates if self.disease_counts[i] and text in self.names[i]]
+
+    def record_selection(self, symptom):
+        """
+        Record that a user picked a symptom, boosting it in later suggestions.
+
+        Args:
+            symptom (str): Selected symptom; ignored if not in the vocabulary
+        """
+        symptom_id = self.symptom_ids.get(symptom.lower().strip())
+        if symptom_id is not None:
+            self.popularity.record(symptom_id)
+
+    def suggest(self, partial_input, limit=5):
+        """
+        Suggest symptoms for partial input.
+
+        Args:
+            partial_input (str): Partial symptom input
+            limit (int): Maximum number of suggestions
+
+        Returns:
+            list: Ranked matching symptoms
+        """
+        text = partial_input.lower().strip()
+        if not text or limit <= 0:
+            return []
+
+        now = time.time()
+
+        def rank(symptom_id, tier):
+            weight = self.disease_counts[symptom_id] + POPULARITY_WEIGHT * self.popularity.get(symptom_id, now)
+            symptom = self.names[symptom_id]
+            return (tier, -weight, len(symptom), symptom)
+
+        prefix_ids = self.prefix_range(text)
+        ranked = heapq.nsmallest(limit, (rank(i, 0) for i in prefix_ids))
+        if len(ranked) < limit:
+            infix = (rank(i, 1) for i in self.infix_matches(text) if not self.names[i].startswith(text))
+            ranked.extend(heapq.nsmallest(limit - len(ranked), infix))
+        return [key[-1] for key in ranked]
+
+def build_autocomplete_index(symptom_map, previous=None):
+    """
+    Build the autocomplete index from create_symptom_mapping's symptom map.
+
+    Args:
+        symptom_map (dict): Mapping of symptom -> list of diseases
+        previous (AutocompleteIndex): Index over an earlier version of the knowledge base,
+            whose structures and selection popularity are carried over
+
+    Returns:
+        AutocompleteIndex: Index over every non-empty symptom
+    """
+    symptoms = sorted(symptom for symptom in symptom_map if symptom)
+    disease_counts = tuple(len(set(symptom_map[symptom])) for symptom in symptoms)
+    return AutocompleteIndex(tuple(symptoms), disease_counts, previous=previous)
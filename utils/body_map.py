@@ -3,6 +3,7 @@
 Interactive body map for symptom selection in the holistic medicine chatbot.
 """
 import streamlit as st
+from utils.session_manager import add_symptoms
 
 def render_body_map():
     """
@@ -122,8 +123,7 @@ def render_body_map():
             st.subheader(f"Suggested symptoms for {part.replace('-', ' ').title()}")
             for symptom in st.session_state.suggested_symptoms:
                 if st.button(symptom, key=f"body_map_{symptom}"):
-                    if symptom not in st.session_state.selected_symptoms:
-                        st.session_state.selected_symptoms.append(symptom)
+                    if add_symptoms([symptom]):
                         st.experimental_rerun()
 
 def initialize_body_map_state():
@@ -14,6 +14,61 @@ AZURE_API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
 AZURE_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")
 AZURE_DEPLOYMENT = os.getenv("AZURE_OPENAI_DEPLOYMENT")
 AZURE_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION", "2023-05-15")
+AZURE_MAX_RETRIES = int(os.getenv("AZURE_OPENAI_MAX_RETRIES", "2"))
+
+# Point the client at the local mock server (tools/mock_azure_openai.py) instead of Azure
+AZURE_MOCK_ENDPOINT = os.getenv("AZURE_OPENAI_MOCK_ENDPOINT")
+if AZURE_MOCK_ENDPOINT:
+    AZURE_ENDPOINT = AZURE_MOCK_ENDPOINT
+    AZURE_API_KEY = AZURE_API_KEY or "mock"
+    AZURE_DEPLOYMENT = AZURE_DEPLOYMENT or "mock"
+
+# Maximum number of concurrent treatment enhancement calls per worker
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+
+# LLM response cache configuration (an empty path keeps the cache in memory only)
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite3")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_MB = int(os.getenv("LLM_CACHE_MAX_MB", "64"))
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "512"))
+
+# LLM call telemetry: rolling window in seconds and token budgets per minute (0 disables an alarm)
+LLM_TELEMETRY_WINDOW = float(os.getenv("LLM_TELEMETRY_WINDOW", "900"))
+LLM_BUDGET_SESSION_TOKENS_PER_MINUTE = int(os.getenv("LLM_BUDGET_SESSION_TOKENS_PER_MINUTE", "20000"))
+LLM_BUDGET_TOKENS_PER_MINUTE = int(os.getenv("LLM_BUDGET_TOKENS_PER_MINUTE", "0"))
+LLM_STREAM_INCLUDE_USAGE = os.getenv("LLM_STREAM_INCLUDE_USAGE", "false").lower() in ("1", "true", "yes")  # Needs API version 2024-09-01-preview or later
+
+# Chat memory: prompt tokens for earlier turns, of which up to CHAT_SUMMARY_TOKENS summarize the oldest ones
+CHAT_MEMORY_TOKENS = int(os.getenv("CHAT_MEMORY_TOKENS", "1500"))
+CHAT_SUMMARY_TOKENS = int(os.getenv("CHAT_SUMMARY_TOKENS", "300"))
+
+# Chat retrieval: KB entries found by BM25 for each question and the prompt tokens they may use; 0 entries disables it
+CHAT_RETRIEVAL_TOP_K = int(os.getenv("CHAT_RETRIEVAL_TOP_K", "3"))
+CHAT_RETRIEVAL_TOKENS = int(os.getenv("CHAT_RETRIEVAL_TOKENS", "600"))
+
+# Precomputed treatment enhancements (see tools/precompute_enhancements.py)
+ENHANCEMENT_STORE_PATH = os.getenv("ENHANCEMENT_STORE_PATH", "data/kb.enhancements.json")
+
+# Seconds between checks of kb.json for edits, which are hot reloaded; 0 disables the watcher
+KB_RELOAD_INTERVAL = float(os.getenv("KB_RELOAD_INTERVAL", "2"))
+
+# Category-sharded knowledge base (see utils/kb_shards.py) and how many shards stay in memory
+KB_SHARDS_PATH = os.getenv("KB_SHARDS_PATH", "data/kb_shards")
+KB_SHARD_CACHE_SIZE = int(os.getenv("KB_SHARD_CACHE_SIZE", "4"))
+
+# Symptom matching configuration
+FUZZY_MAX_EDIT_DISTANCE = int(os.getenv("FUZZY_MAX_EDIT_DISTANCE", "2"))
+FUZZY_MIN_SIMILARITY = float(os.getenv("FUZZY_MIN_SIMILARITY", "0.75"))
+SCORING_BACKEND = os.getenv("SCORING_BACKEND", "index")  # "index" or "vector" (NumPy/SciPy)
+ANALYSIS_TOP_K = int(os.getenv("ANALYSIS_TOP_K", "0"))  # Conditions kept per analysis; 0 keeps all
+NL_EXTRACTION_MIN_CONFIDENCE = float(os.getenv("NL_EXTRACTION_MIN_CONFIDENCE", "0.75"))  # Local coverage that skips the LLM; above 1 always asks it
+
+# Rerun stage metrics (Prometheus text format); port 0 and an empty file disable the exporters
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_FILE = os.getenv("METRICS_FILE", "")
+METRICS_FILE_INTERVAL = float(os.getenv("METRICS_FILE_INTERVAL", "5"))
+METRICS_DEBUG_OVERLAY = os.getenv("METRICS_DEBUG_OVERLAY", "false").lower() in ("1", "true", "yes")
 
 # App configuration
 APP_TITLE = "Holistic Medicine Chatbot"
@@ -0,0 +1,167 @@
+#conversation_memory.py
+"""
+Token-budgeted conversation memory for the holistic medicine chatbot.
+
+Chat prompts carry the conversation so far within a fixed token budget: the
+most recent messages verbatim, and everything older as one rolling summary.
+When the verbatim part outgrows its share of the budget, the oldest messages
+are folded into the summary together with the previous summary, so each
+summary update only reads the messages that just left the window. Folding
+frees half the window at a time, so a summary update happens every few turns
+rather than on every question, and prompt size stays capped however long the
+session runs.
+"""
+from utils.llm_telemetry import estimate_tokens
+
+# Estimated tokens for a message's role label and separators
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Longest excerpt of a message kept by the extractive summary, in tokens
+EXCERPT_TOKENS = 40
+
+ROLE_LABELS = {'user': 'User', 'assistant': 'Assistant'}
+
+def message_tokens(message):
+    """Estimate the prompt tokens of one chat message."""
+    return estimate_tokens(message['content']) + MESSAGE_OVERHEAD_TOKENS
+
+def clip_to_tokens(text, max_tokens):
+    """
+    Shorten a text to about max_tokens, cutting at a word boundary.
+
+    Args:
+        text (str): Text to shorten
+        max_tokens (int): Token budget
+
+    Returns:
+        str: Text, with an ellipsis if it was cut
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    clipped = text[:max(max_tokens * 4 - 1, 0)]
+    if ' ' in clipped:
+        clipped = clipped.rsplit(' ', 1)[0]
+    return clipped.rstrip() + '…'
+
+def extractive_summary(summary, messages, max_tokens):
+    """
+    Fold messages into a summary without a model, one short line per message.
+
+    Used when no LLM client is configured or the summary call fails. The
+    oldest lines are dropped once the summary exceeds its budget.
+
+    Args:
+        summary (str): Previous summary
+        messages (list): Chat messages to fold in, oldest first
+        max_tokens (int): Token budget of the summary
+
+    Returns:
+        str: Updated summary
+    """
+    lines = summary.splitlines() if summary else []
+    for message in messages:
+        label = ROLE_LABELS.get(message['role'], message['role'].title())
+        excerpt = ' '.join(message['content'].split())
+        lines.append(f"{label}: {clip_to_tokens(excerpt, EXCERPT_TOKENS)}")
+    while len(lines) > 1 and estimate_tokens('\n'.join(lines)) > max_tokens:
+        lines.pop(0)
+    return clip_to_tokens('\n'.join(lines), max_tokens)
+
+class ConversationMemory:
+    """
+    Rolling summary plus verbatim window over a session's chat history.
+
+    The memory does not copy the history; it only remembers how many leading
+    messages the summary covers, so it stays valid as chat_history grows.
+
+    Args:
+        token_budget (int): Tokens for the whole conversation block of a prompt
+        summary_tokens (int): Part of the budget the summary may use
+    """
+
+    def __init__(self, token_budget, summary_tokens):
+        self.token_budget = token_budget
+        self.summary_tokens = min(summary_tokens, token_budget)
+        self.summary = ""
+        # Number of leading chat_history messages folded into the summary
+        self.summarized = 0
+        self.summary_updates = 0
+
+    @property
+    def window_tokens(self):
+        """Token budget of the verbatim messages."""
+        return self.token_budget - self.summary_tokens
+
+    def reset(self):
+        """Forget the summary, e.g. after the chat history was cleared."""
+        self.summary = ""
+        self.summarized = 0
+
+    def update(self, history, summarize=None):
+        """
+        Fold the oldest verbatim messages into the summary if the window is over budget.
+
+        Args:
+            history (list): Chat messages ({"role", "content"}), oldest first
+            summarize (callable): summarize(summary, messages, max_tokens) -> str;
+                extractive_summary if omitted or if it fails
+
+        Returns:
+            bool: Whether the summary changed
+        """
+        if len(history) < self.summarized:
+            self.reset()
+        recent = history[self.summarized:]
+        sizes = [message_tokens(message) for message in recent]
+        total = sum(sizes)
+        if total <= self.window_tokens:
+            return False
+
+        # Free half the window so the next update is a few turns away
+        fold = 0
+        while fold < len(recent) and total > self.window_tokens // 2:
+            total -= sizes[fold]
+            fold += 1
+
+        folded = recent[:fold]
+        summary = None
+        if summarize is not None:
+            try:
+                summary = summarize(self.summary, folded, self.summary_tokens)
+            except Exception:
+                summary = None
+        if not summary or summary.isspace():
+            summary = extractive_summary(self.summary, folded, self.summary_tokens)
+        self.summary = clip_to_tokens(summary.strip(), self.summary_tokens)
+        self.summarized += fold
+        self.summary_updates += 1
+        return True
+
+    def render(self, history, summarize=None):
+        """
+        Build the conversation block of a prompt.
+
+        Args:
+            history (list): Chat messages to remember, oldest first; exclude the question being asked
+            summarize (callable): Summarizer used if the window has to be folded first
+
+        Returns:
+            str: Summary and recent messages, empty for a new conversation
+        """
+        self.update(history, summarize)
+        parts = []
+        if self.summary:
+            parts.append(f"Summary of the earlier conversation:\n{self.summary}")
+
+        # Newest messages first, in case a single message overflows the window
+        recent = []
+        remaining = self.window_tokens
+        for message in reversed(history[self.summarized:]):
+            remaining -= message_tokens(message)
+            if remaining < 0:
+                break
+            label = ROLE_LABELS.get(message['role'], message['role'].title())
+            recent.append(f"{label}: {message['content']}")
+        if recent:
+            parts.append("Recent messages:\n" + '\n'.join(reversed(recent)))
+        return '\n\n'.join(parts)
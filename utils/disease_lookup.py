@@ -0,0 +1,181 @@
+#disease_lookup.py
+"""
+Constant-time disease lookup and read-only treatment views for the holistic medicine chatbot.
+"""
+import re
+from collections.abc import Mapping
+
+# Treatment info keys mapped to the knowledge base fields they read from
+TREATMENT_FIELDS = {
+    'Ayurvedic': 'Ayurvedic_Treatment',
+    'Homeopathic': 'Homeopathic_Treatment',
+    'Allopathic': 'Allopathic_Treatment',
+    'Category': 'Category',
+    'Symptoms': 'Symptoms'
+}
+
+_WHITESPACE = re.compile(r'\s+')
+_PARENTHESIZED = re.compile(r'\(([^)]*)\)')
+
+def normalize_disease_name(name):
+    """
+    Normalize a disease name for case-insensitive lookup.
+
+    Args:
+        name (str): Disease name or alias
+
+    Returns:
+        str: Case-folded name with collapsed whitespace
+    """
+    return _WHITESPACE.sub(' ', name).strip().casefold()
+
+def disease_aliases(name):
+    """
+    Derive lookup aliases from a disease name.
+
+    "Influenza (Flu)" yields "influenza" and "flu" besides the full name.
+
+    Args:
+        name (str): Disease name from the knowledge base
+
+    Returns:
+        list: Normalized aliases, excluding the full name
+    """
+    aliases = []
+    base = _PARENTHESIZED.sub(' ', name)
+    if base != name:
+        aliases.append(normalize_disease_name(base))
+    for inner in _PARENTHESIZED.findall(name):
+        aliases.append(normalize_disease_name(inner))
+    return [alias for alias in aliases if alias]
+
+class TreatmentView(Mapping):
+    """
+    Read-only treatment information for one disease.
+
+    Reads straight from the underlying KB entry, so no per-request dict is built.
+    Keys are 'Ayurvedic', 'Homeopathic', 'Allopathic', 'Category' and 'Symptoms'.
+    """
+    __slots__ = ('disease_id', '_entry')
+
+    def __init__(self, entry, disease_id=None):
+        self.disease_id = disease_id
+        self._entry = entry
+
+    @property
+    def disease(self):
+        """Name of the disease this view belongs to."""
+        return self._entry['Disease']
+
+    def __getitem__(self, key):
+        return self._entry[TREATMENT_FIELDS[key]]
+
+    def __iter__(self):
+        return iter(TREATMENT_FIELDS)
+
+    def __len__(self):
+        return len(TREATMENT_FIELDS)
+
+    def __repr__(self):
+        return f"TreatmentView({self.disease!r})"
+
+class DiseaseLookup:
+    """
+    Name, alias and id keyed index over the knowledge base.
+
+    Exact names win over case-insensitive names, which win over aliases. When
+    several diseases share a name or alias, the first entry in the KB is used,
+    matching the previous linear scan.
+    """
+    __slots__ = ('views', '_exact', '_normalized', '_name_keys')
+
+    def __init__(self, views, exact, normalized, name_keys=None):
+        self.views = views
+        self._exact = exact
+        self._normalized = normalized
+        # Disease name -> (normalized name, aliases), reused when the KB is reloaded
+        self._name_keys = name_keys or {}
+
+    def __len__(self):
+        return len(self.views)
+
+    def __contains__(self, disease_name):
+        return self.get(disease_name) is not None
+
+    def get(self, disease_name):
+        """
+        Look up a disease by name or alias.
+
+        Args:
+            disease_name (str): Disease name, in any case, or one of its aliases
+
+        Returns:
+            TreatmentView: Treatment view or None if disease not found
+        """
+        if not disease_name:
+            return None
+        disease_id = self._exact.get(disease_name)
+        if disease_id is None:
+            disease_id = self._normalized.get(normalize_disease_name(disease_name))
+            if disease_id is None:
+                return None
+        return self.views[disease_id]
+
+    def by_id(self, disease_id):
+        """
+        Look up a disease by its position in the knowledge base.
+
+        Args:
+            disease_id (int): Disease id
+
+        Returns:
+            TreatmentView: Treatment view
+        """
+        return self.views[disease_id]
+
+def build_disease_lookup(kb_data, extra_aliases=None, previous=None):
+    """
+    Build the disease lookup for a knowledge base.
+
+    Args:
+        kb_data (list): List of disease entries
+        extra_aliases (dict): Optional mapping of alias -> disease name
+        previous (DiseaseLookup): Lookup over an earlier version of the knowledge base; its
+            tables are reused when the disease names are unchanged, and only new names are
+            normalized otherwise
+
+    Returns:
+        DiseaseLookup: Lookup over kb_data
+    """
+    if previous is not None and not extra_aliases and len(previous.views) == len(kb_data):
+        views = tuple(TreatmentView(entry, disease_id) for disease_id, entry in enumerate(kb_data))
+        if all(view.disease == old.disease for view, old in zip(views, previous.views)):
+            return DiseaseLookup(views, previous._exact, previous._normalized, previous._name_keys)
+
+    previous_keys = previous._name_keys if previous is not None else {}
+    views = []
+    exact = {}
+    names = {}
+    aliases = {}
+    name_keys = {}
+
+    for disease_id, entry in enumerate(kb_data):
+        name = entry['Disease']
+        views.append(TreatmentView(entry, disease_id))
+        exact.setdefault(name, disease_id)
+        keys = name_keys.get(name) or previous_keys.get(name)
+        if keys is None:
+            keys = (normalize_disease_name(name), tuple(disease_aliases(name)))
+        name_keys[name] = keys
+        names.setdefault(keys[0], disease_id)
+        for alias in keys[1]:
+            aliases.setdefault(alias, disease_id)
+
+    for alias, name in (extra_aliases or {}).items():
+        disease_id = exact.get(name, names.get(normalize_disease_name(name)))
+        if disease_id is not None:
+            aliases[normalize_disease_name(alias)] = disease_id
+
+    # Full names take precedence over aliases
+    aliases.update(names)
+    return DiseaseLookup(tuple(views), exact, aliases, name_keys)
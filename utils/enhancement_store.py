@@ -0,0 +1,129 @@
+#enhancement_store.py
+"""
+Precomputed treatment enhancements for the holistic medicine chatbot.
+
+The sidecar artifact (data/kb.enhancements.json by default) holds one enhanced
+description per disease and treatment type, together with a hash of the exact
+prompt it was generated from. An entry is only served while its hash matches
+the current KB content and prompt template, so editing a disease invalidates
+just that disease's entries.
+"""
+import hashlib
+import json
+import os
+import time
+
+from utils.llm_interface import build_enhancement_prompt
+
+FORMAT_VERSION = 1
+
+TREATMENT_TYPES = ('Ayurvedic', 'Homeopathic', 'Allopathic')
+
+def enhancement_hash(treatment_type, base_treatment, disease, symptoms):
+    """
+    Hash the inputs of one enhancement.
+
+    Args:
+        treatment_type (str): Type of treatment
+        base_treatment (str): Original treatment description
+        disease (str): Disease name
+        symptoms (str): Disease symptoms
+
+    Returns:
+        str: Hex digest of the enhancement prompt
+    """
+    prompt = build_enhancement_prompt(treatment_type, base_treatment, disease, symptoms)
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+def kb_content_hash(kb_data):
+    """
+    Hash the parts of the knowledge base that enhancements depend on.
+
+    Args:
+        kb_data (list): List of disease entries
+
+    Returns:
+        str: Hex digest over every disease's name, symptoms and treatments
+    """
+    digest = hashlib.sha256()
+    for entry in kb_data:
+        for field in ('Disease', 'Symptoms', 'Ayurvedic_Treatment', 'Homeopathic_Treatment', 'Allopathic_Treatment'):
+            digest.update(entry[field].encode('utf-8'))
+            digest.update(b'\0')
+    return digest.hexdigest()
+
+class EnhancementStore:
+    """
+    Read-only view over a precomputed enhancement artifact.
+    """
+    __slots__ = ('entries', 'kb_hash', 'deployment', 'generated_at')
+
+    def __init__(self, entries, kb_hash=None, deployment=None, generated_at=None):
+        self.entries = entries
+        self.kb_hash = kb_hash
+        self.deployment = deployment
+        self.generated_at = generated_at
+
+    def __len__(self):
+        return sum(len(treatments) for treatments in self.entries.values())
+
+    def get(self, disease, treatment_type, base_treatment, symptoms):
+        """
+        Get a precomputed enhancement if it is still fresh.
+
+        Args:
+            disease (str): Disease name
+            treatment_type (str): Type of treatment
+            base_treatment (str): Current base treatment description
+            symptoms (str): Current disease symptoms
+
+        Returns:
+            str: Enhanced description or None if missing or stale
+        """
+        entry = self.entries.get(disease, {}).get(treatment_type)
+        if not entry:
+            return None
+        if entry['hash'] != enhancement_hash(treatment_type, base_treatment, disease, symptoms):
+            return None
+        return entry['text']
+
+def load_enhancement_store(path):
+    """
+    Load an enhancement artifact.
+
+    Args:
+        path (str): Path to the artifact
+
+    Returns:
+        EnhancementStore: Store, or None if the file is missing or has another format version
+    """
+    try:
+        with open(path, 'r') as file:
+            data = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if data.get('version') != FORMAT_VERSION:
+        return None
+    return EnhancementStore(data['entries'], data.get('kb_hash'), data.get('deployment'), data.get('generated_at'))
+
+def write_enhancement_store(path, entries, kb_hash, deployment):
+    """
+    Atomically write an enhancement artifact.
+
+    Args:
+        path (str): Destination path
+        entries (dict): disease -> treatment type -> {"hash": ..., "text": ...}
+        kb_hash (str): kb_content_hash of the KB the entries were generated for
+        deployment (str): Azure deployment that generated them
+    """
+    data = {
+        'version': FORMAT_VERSION,
+        'kb_hash': kb_hash,
+        'deployment': deployment,
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'entries': entries
+    }
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as file:
+        json.dump(data, file, indent=1, sort_keys=True)
+    os.replace(temp_path, path)
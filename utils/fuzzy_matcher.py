@@ -0,0 +1,245 @@
+#fuzzy_matcher.py
+"""
+Typo-tolerant matching of user symptoms against the knowledge base vocabulary.
+"""
+import difflib
+import re
+from collections import Counter
+
+# Default maximum edit distance between a user symptom and a KB symptom
+MAX_EDIT_DISTANCE = 2
+
+# Words this short only tolerate a single edit, otherwise everything matches
+SHORT_WORD_LENGTH = 4
+
+# Minimum difflib similarity ratio for a candidate to be accepted
+MIN_SIMILARITY = 0.75
+
+# Share of retired entries at which updated() rebuilds the trigram index
+RETIRED_COMPACT_RATIO = 0.5
+
+_WORD = re.compile(r"[a-z][a-z'-]+")
+
+def _padded_trigrams(text):
+    """Return the trigrams of a string padded so that its ends are weighted."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _term_words(term):
+    """Return the words of a term long enough to be vocabulary entries."""
+    return {word for word in _WORD.findall(term) if len(word) >= 3}
+
+def bounded_edit_distance(a, b, max_distance):
+    """
+    Compute the Levenshtein distance between two strings, giving up early.
+
+    Args:
+        a (str): First string
+        b (str): Second string
+        max_distance (int): Largest distance of interest
+
+    Returns:
+        int: Edit distance, or max_distance + 1 if it exceeds max_distance
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if len(a) > len(b):
+        a, b = b, a
+
+    previous = list(range(len(a) + 1))
+    for j, char_b in enumerate(b, 1):
+        current = [j]
+        for i, char_a in enumerate(a, 1):
+            current.append(min(
+                previous[i] + 1,
+                current[i - 1] + 1,
+                previous[i - 1] + (char_a != char_b)
+            ))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1] if previous[-1] <= max_distance else max_distance + 1
+
+class FuzzyMatcher:
+    """
+    Trigram index over a symptom vocabulary with bounded edit-distance verification.
+
+    The vocabulary holds every KB symptom term plus the individual words they
+    are made of, so both whole phrases ("hedache") and words inside phrases
+    ("sever hedache") can be resolved. After updated(), entries of retired
+    terms stay in the trigram index but are no longer matched.
+    """
+    __slots__ = (
+        'vocabulary', 'terms', 'words', 'word_counts', 'trigram_entries', 'gram_counts',
+        'max_distance', 'min_similarity'
+    )
+
+    def __init__(self, vocabulary, terms, words, max_distance=MAX_EDIT_DISTANCE, min_similarity=MIN_SIMILARITY,
+                 word_counts=None, trigram_entries=None, gram_counts=None):
+        self.vocabulary = vocabulary
+        self.terms = terms
+        self.words = words
+        self.max_distance = max_distance
+        self.min_similarity = min_similarity
+        if word_counts is None:
+            word_counts = Counter(word for term in terms for word in _term_words(term))
+        # Word -> number of terms containing it, so updated() knows when a word retires
+        self.word_counts = word_counts
+
+        if trigram_entries is not None:
+            self.trigram_entries = trigram_entries
+            self.gram_counts = gram_counts
+            return
+
+        trigram_entries = {}
+        gram_counts = []
+        for entry_id, entry in enumerate(vocabulary):
+            grams = _padded_trigrams(entry)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                trigram_entries.setdefault(gram, []).append(entry_id)
+        self.gram_counts = tuple(gram_counts)
+        self.trigram_entries = {gram: tuple(ids) for gram, ids in trigram_entries.items()}
+
+    def updated(self, added=(), removed=()):
+        """
+        Derive the matcher for an edited vocabulary from the term delta.
+
+        Only the new entries are trigrammed; retired ones are skipped by match().
+
+        Args:
+            added (iterable): KB symptom terms now in use
+            removed (iterable): KB symptom terms no longer in use
+
+        Returns:
+            FuzzyMatcher: Matcher over the updated terms
+        """
+        added = {term for term in added if term} - self.terms
+        removed = {term for term in removed if term} & self.terms
+        terms = (self.terms - removed) | added
+        word_counts = Counter(self.word_counts)
+        for term in removed:
+            word_counts.subtract(_term_words(term))
+        for term in added:
+            word_counts.update(_term_words(term))
+        words = frozenset(word for word, count in word_counts.items() if count > 0)
+        word_counts = Counter({word: word_counts[word] for word in words})
+
+        new_entries = sorted((added | words) - set(self.vocabulary))
+        vocabulary = self.vocabulary + tuple(new_entries)
+        if len(vocabulary) - len(terms | words) >= RETIRED_COMPACT_RATIO * len(vocabulary):
+            return build_fuzzy_matcher(terms, self.max_distance, self.min_similarity)
+
+        new_grams = {}
+        gram_counts = list(self.gram_counts)
+        for entry_id, entry in enumerate(new_entries, len(self.vocabulary)):
+            grams = _padded_trigrams(entry)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                new_grams.setdefault(gram, []).append(entry_id)
+        trigram_entries = dict(self.trigram_entries)
+        for gram, ids in new_grams.items():
+            trigram_entries[gram] = trigram_entries.get(gram, ()) + tuple(ids)
+        return FuzzyMatcher(
+            vocabulary, frozenset(terms), words, self.max_distance, self.min_similarity,
+            word_counts, trigram_entries, tuple(gram_counts)
+        )
+
+    def _allowed_distance(self, text, max_distance):
+        if max_distance is None:
+            max_distance = self.max_distance
+        return min(max_distance, 1) if len(text) <= SHORT_WORD_LENGTH else max_distance
+
+    def match(self, text, max_distance=None, limit=5):
+        """
+        Find vocabulary entries within a bounded edit distance of the text.
+
+        Args:
+            text (str): User symptom or word
+            max_distance (int): Maximum edit distance; defaults to the matcher's setting
+            limit (int): Maximum number of matches
+
+        Returns:
+            list: (entry, distance) tuples, closest first
+        """
+        text = text.lower().strip()
+        if not text:
+            return []
+        max_distance = self._allowed_distance(text, max_distance)
+
+        # Each edit destroys at most three padded trigrams of either string
+        grams = _padded_trigrams(text)
+        slack = 3 * max_distance
+        min_shared = max(len(grams) - slack, 1)
+
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.trigram_entries.get(gram, ()))
+
+        matches = []
+        for entry_id, count in shared.items():
+            if count < min_shared or count < self.gram_counts[entry_id] - slack:
+                continue
+            entry = self.vocabulary[entry_id]
+            if entry not in self.terms and entry not in self.words:
+                continue  # Retired by updated()
+            distance = bounded_edit_distance(text, entry, max_distance)
+            if distance > max_distance:
+                continue
+            similarity = difflib.SequenceMatcher(None, text, entry).ratio()
+            if distance and similarity < self.min_similarity:
+                continue
+            matches.append((distance, -similarity, entry))
+
+        matches.sort()
+        return [(entry, distance) for distance, _, entry in matches[:limit]]
+
+    def correct(self, symptom):
+        """
+        Resolve a misspelled user symptom to the closest canonical KB wording.
+
+        The whole symptom is matched first; failing that, each unknown word is
+        replaced by its closest vocabulary word.
+
+        Args:
+            symptom (str): User symptom
+
+        Returns:
+            str: Corrected, lower-cased symptom or None if nothing close was found
+        """
+        text = symptom.lower().strip()
+        matches = self.match(text, limit=1)
+        if matches:
+            return matches[0][0]
+
+        changed = False
+        def replace(word_match):
+            nonlocal changed
+            word = word_match.group(0)
+            if word in self.words:
+                return word
+            candidates = [entry for entry, _ in self.match(word, limit=5) if entry in self.words]
+            if not candidates:
+                return word
+            changed = True
+            return candidates[0]
+
+        corrected = _WORD.sub(replace, text)
+        return corrected if changed else None
+
+def build_fuzzy_matcher(terms, max_distance=MAX_EDIT_DISTANCE, min_similarity=MIN_SIMILARITY):
+    """
+    Build the fuzzy matcher for a symptom vocabulary.
+
+    Args:
+        terms (iterable): Lower-cased KB symptom terms
+        max_distance (int): Default maximum edit distance
+        min_similarity (float): Minimum difflib similarity ratio for non-exact matches
+
+    Returns:
+        FuzzyMatcher: Matcher over the terms and their words
+    """
+    terms = frozenset(term for term in terms if term)
+    word_counts = Counter(word for term in terms for word in _term_words(term))
+    vocabulary = tuple(sorted(terms | word_counts.keys()))
+    return FuzzyMatcher(vocabulary, terms, frozenset(word_counts), max_distance, min_similarity, word_counts)
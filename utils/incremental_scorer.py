@@ -0,0 +1,124 @@
+#incremental_scorer.py
+"""
+Incremental per-session disease scoring for the holistic medicine chatbot.
+
+Instead of rescoring the whole knowledge base after every symptom change, a
+session keeps the per-disease match counts of its selected symptoms. Adding or
+removing one symptom only touches the diseases that symptom matches, and the
+diseases are kept in buckets by match count so the best k can be read off
+without sorting every matched disease.
+"""
+import heapq
+from utils.symptom_analyzer import match_symptom, disease_result
+
+class IncrementalScorer:
+    """
+    Match counts of one session's symptoms, producing the same results as find_diseases.
+
+    Args:
+        symptom_index (SymptomIndex): Index over the knowledge base
+        fuzzy_matcher (FuzzyMatcher): Optional matcher used to resolve misspelled symptoms
+        vector_scorer (VectorScorer): Optional sparse-matrix backend to match symptoms with instead of the index
+    """
+    __slots__ = ('symptom_index', 'fuzzy_matcher', 'vector_scorer', 'symptoms', 'counts', 'buckets', '_matches')
+
+    def __init__(self, symptom_index, fuzzy_matcher=None, vector_scorer=None):
+        self.symptom_index = symptom_index
+        self.fuzzy_matcher = fuzzy_matcher
+        self.vector_scorer = vector_scorer
+        self.symptoms = []
+        self.counts = {}
+        # Match count -> ids of the diseases with that count
+        self.buckets = {}
+        # Normalized symptom -> matched disease ids, for removal without re-matching
+        self._matches = {}
+
+    def __len__(self):
+        return len(self.symptoms)
+
+    def _move(self, disease_id, old_count, new_count):
+        if old_count:
+            bucket = self.buckets[old_count]
+            bucket.discard(disease_id)
+            if not bucket:
+                del self.buckets[old_count]
+        if new_count:
+            self.counts[disease_id] = new_count
+            self.buckets.setdefault(new_count, set()).add(disease_id)
+        else:
+            del self.counts[disease_id]
+
+    def add(self, symptom):
+        """
+        Add one symptom, updating only the diseases it matches.
+
+        Args:
+            symptom (str): User symptom
+        """
+        symptom = symptom.lower().strip()
+        matched = self._matches.get(symptom)
+        if matched is None:
+            if self.vector_scorer is not None:
+                matched = self.vector_scorer.match(symptom, self.fuzzy_matcher)
+            else:
+                matched = match_symptom(self.symptom_index, symptom, self.fuzzy_matcher)
+            matched = self._matches[symptom] = frozenset(matched)
+        self.symptoms.append(symptom)
+        for disease_id in matched:
+            count = self.counts.get(disease_id, 0)
+            self._move(disease_id, count, count + 1)
+
+    def remove(self, symptom):
+        """
+        Remove one occurrence of a symptom, updating only the diseases it matched.
+
+        Args:
+            symptom (str): User symptom previously added
+
+        Returns:
+            bool: Whether the symptom was present
+        """
+        symptom = symptom.lower().strip()
+        if symptom not in self.symptoms:
+            return False
+        self.symptoms.remove(symptom)
+        matched = self._matches[symptom] if symptom in self.symptoms else self._matches.pop(symptom)
+        for disease_id in matched:
+            count = self.counts[disease_id]
+            self._move(disease_id, count, count - 1)
+        return True
+
+    def clear(self):
+        """Remove all symptoms."""
+        self.symptoms.clear()
+        self.counts.clear()
+        self.buckets.clear()
+        self._matches.clear()
+
+    def top(self, k=None):
+        """
+        Get the best matching diseases.
+
+        Args:
+            k (int): Number of diseases to return; all matched diseases if omitted
+
+        Returns:
+            dict: find_diseases-style dict, highest score first and KB order among ties
+        """
+        if not self.symptoms:
+            return {}
+        index = self.symptom_index
+        results = {}
+        for count in sorted(self.buckets, reverse=True):
+            bucket = self.buckets[count]
+            remaining = None if k is None else k - len(results)
+            if remaining is not None and remaining < len(bucket):
+                disease_ids = heapq.nsmallest(remaining, bucket)
+            else:
+                disease_ids = sorted(bucket)
+            score = count / len(self.symptoms) * 100
+            for disease_id in disease_ids:
+                results[index.names[disease_id]] = disease_result(index, disease_id, score)
+            if k is not None and len(results) >= k:
+                break
+        return results
@@ -0,0 +1,321 @@
+#kb_compiler.py
+"""
+Compiled binary knowledge base artifact for the holistic medicine chatbot.
+
+The compiler turns kb.json into a single versioned file that every worker can
+memory-map instead of parsing JSON into its own list of dicts:
+
+    header | string offsets | records | term string ids | disease term offsets | disease term ids | string blob
+
+All strings are interned into one UTF-8 blob addressed by an offset array, so
+disease names, categories, symptom terms and treatment texts are referred to
+by integer ids. Records are decoded lazily, one field at a time.
+"""
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+from functools import lru_cache
+
+from utils.symptom_index import split_symptom_terms
+
+MAGIC = b'HMKB'
+FORMAT_VERSION = 1
+
+# Fields stored for every disease, in on-disk order
+RECORD_FIELDS = (
+    'Disease',
+    'Category',
+    'Symptoms',
+    'Ayurvedic_Treatment',
+    'Homeopathic_Treatment',
+    'Allopathic_Treatment'
+)
+_FIELD_POSITIONS = {field: position for position, field in enumerate(RECORD_FIELDS)}
+
+# magic, version, field count, diseases, strings, terms, disease terms, blob size,
+# source size, source mtime (ns), source sha256, payload sha256
+_HEADER = struct.Struct('<4sHHIIIIQQQ32s32s')
+
+class KBArtifactError(Exception):
+    """Raised when a compiled knowledge base artifact is missing or corrupt."""
+
+def _uint32_array(values):
+    """Return a little-endian uint32 array."""
+    data = array('I', values)
+    if sys.byteorder != 'little':
+        data.byteswap()
+    return data
+
+def _source_stamp(file_path):
+    """Return (size, mtime_ns, sha256) for a source file."""
+    stat = os.stat(file_path)
+    return stat.st_size, stat.st_mtime_ns, _source_digest(file_path, stat.st_size, stat.st_mtime_ns)
+
+@lru_cache(maxsize=16)
+def _source_digest(file_path, size, mtime_ns):
+    """Hash a source file; cached per (path, size, mtime) so reruns do not re-read it."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+def compile_knowledge_base(kb_data, artifact_path, source_path=None):
+    """
+    Compile knowledge base entries into a binary artifact.
+
+    Args:
+        kb_data (iterable): Disease entries
+        artifact_path (str): Destination path of the artifact
+        source_path (str): kb.json the entries came from, recorded for freshness checks
+
+    Returns:
+        int: Number of diseases written
+    """
+    string_ids = {}
+    blob = bytearray()
+    string_offsets = [0]
+
+    def intern(text):
+        string_id = string_ids.get(text)
+        if string_id is None:
+            string_id = string_ids[text] = len(string_offsets) - 1
+            blob.extend(text.encode('utf-8'))
+            string_offsets.append(len(blob))
+        return string_id
+
+    records = []
+    term_strings = []
+    term_ids = {}
+    disease_term_offsets = [0]
+    disease_term_ids = []
+
+    for entry in kb_data:
+        records.extend(intern(entry[field]) for field in RECORD_FIELDS)
+
+        seen = set()
+        for term in split_symptom_terms(entry['Symptoms'].lower()):
+            term_id = term_ids.get(term)
+            if term_id is None:
+                term_id = term_ids[term] = len(term_strings)
+                term_strings.append(intern(term))
+            if term_id not in seen:
+                seen.add(term_id)
+                disease_term_ids.append(term_id)
+        disease_term_offsets.append(len(disease_term_ids))
+
+    payload = b''.join((
+        _uint32_array(string_offsets).tobytes(),
+        _uint32_array(records).tobytes(),
+        _uint32_array(term_strings).tobytes(),
+        _uint32_array(disease_term_offsets).tobytes(),
+        _uint32_array(disease_term_ids).tobytes(),
+        bytes(blob)
+    ))
+
+    if source_path:
+        source_size, source_mtime, source_sha = _source_stamp(source_path)
+    else:
+        source_size, source_mtime, source_sha = 0, 0, bytes(32)
+
+    header = _HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        len(RECORD_FIELDS),
+        len(disease_term_offsets) - 1,
+        len(string_offsets) - 1,
+        len(term_strings),
+        len(disease_term_ids),
+        len(blob),
+        source_size,
+        source_mtime,
+        source_sha,
+        hashlib.sha256(payload).digest()
+    )
+
+    # Write to a temporary file first so readers never map a half-written artifact
+    temp_path = f"{artifact_path}.tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(header)
+        file.write(payload)
+    os.replace(temp_path, artifact_path)
+    return len(disease_term_offsets) - 1
+
+class KBRecord(Mapping):
+    """Read-only view of one disease entry in a compiled knowledge base."""
+    __slots__ = ('_kb', '_disease_id')
+
+    def __init__(self, kb, disease_id):
+        self._kb = kb
+        self._disease_id = disease_id
+
+    def __getitem__(self, field):
+        position = _FIELD_POSITIONS.get(field)
+        if position is None:
+            raise KeyError(field)
+        return self._kb.field(self._disease_id, position)
+
+    def __iter__(self):
+        return iter(RECORD_FIELDS)
+
+    def __len__(self):
+        return len(RECORD_FIELDS)
+
+    def __repr__(self):
+        return f"KBRecord({self._kb.field(self._disease_id, 0)!r})"
+
+class CompiledKnowledgeBase(Sequence):
+    """
+    Memory-mapped, array-backed knowledge base.
+
+    Behaves like the list of entry dicts returned by load_knowledge_base:
+    indexing yields KBRecord mappings keyed by the kb.json field names.
+    """
+    __slots__ = (
+        'path', 'checksum', 'source_stamp', '_mmap', '_string_offsets', '_records',
+        '_term_strings', '_disease_term_offsets', '_disease_term_ids', '_blob'
+    )
+
+    def __init__(self, path, verify=True, expected_checksum=None):
+        self.path = path
+        with open(path, 'rb') as file:
+            try:
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:  # Empty file
+                raise KBArtifactError(f"Empty knowledge base artifact: {path}") from e
+
+        if len(self._mmap) < _HEADER.size:
+            raise KBArtifactError(f"Truncated knowledge base artifact: {path}")
+        (magic, version, field_count, n_diseases, n_strings, n_terms, n_disease_terms,
+         blob_size, source_size, source_mtime, source_sha, checksum) = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise KBArtifactError(f"Not a knowledge base artifact: {path}")
+        if version != FORMAT_VERSION or field_count != len(RECORD_FIELDS):
+            raise KBArtifactError(f"Unsupported knowledge base artifact version {version}: {path}")
+
+        view = memoryview(self._mmap)[_HEADER.size:]
+        if verify and hashlib.sha256(view).digest() != checksum:
+            raise KBArtifactError(f"Checksum mismatch in knowledge base artifact: {path}")
+        self.checksum = checksum.hex()
+        if expected_checksum is not None and self.checksum != expected_checksum:
+            raise KBArtifactError(f"Knowledge base artifact changed since it was opened: {path}")
+        self.source_stamp = (source_size, source_mtime, source_sha)
+
+        position = 0
+        sections = []
+        for count in (n_strings + 1, n_diseases * len(RECORD_FIELDS), n_terms, n_diseases + 1, n_disease_terms):
+            sections.append(self._uint32_view(view[position:position + 4 * count]))
+            position += 4 * count
+        (self._string_offsets, self._records, self._term_strings,
+         self._disease_term_offsets, self._disease_term_ids) = sections
+        self._blob = view[position:position + blob_size]
+        if len(self._blob) != blob_size:
+            raise KBArtifactError(f"Truncated knowledge base artifact: {path}")
+
+    @staticmethod
+    def _uint32_view(section):
+        """Expose a section as uint32 values without copying when possible."""
+        if sys.byteorder == 'little':
+            return section.cast('I')
+        data = array('I', bytes(section))
+        data.byteswap()
+        return data
+
+    def __reduce__(self):
+        # Pickling (process pools) and Streamlit cache hashing only carry the path and checksum
+        return (CompiledKnowledgeBase, (self.path, False, self.checksum))
+
+    def __len__(self):
+        return len(self._disease_term_offsets) - 1
+
+    def __getitem__(self, disease_id):
+        if isinstance(disease_id, slice):
+            return [KBRecord(self, i) for i in range(*disease_id.indices(len(self)))]
+        if disease_id < 0:
+            disease_id += len(self)
+        if not 0 <= disease_id < len(self):
+            raise IndexError("disease id out of range")
+        return KBRecord(self, disease_id)
+
+    def string(self, string_id):
+        """Decode an interned string by id."""
+        return str(self._blob[self._string_offsets[string_id]:self._string_offsets[string_id + 1]], 'utf-8')
+
+    def field(self, disease_id, position):
+        """Decode one field of a disease entry."""
+        return self.string(self._records[disease_id * len(RECORD_FIELDS) + position])
+
+    def symptom_terms(self, disease_id):
+        """
+        Get the precomputed, lower-cased symptom terms of a disease.
+
+        Args:
+            disease_id (int): Position of the disease in the knowledge base
+
+        Returns:
+            list: Symptom terms in KB order
+        """
+        start = self._disease_term_offsets[disease_id]
+        stop = self._disease_term_offsets[disease_id + 1]
+        return [self.string(self._term_strings[term_id]) for term_id in self._disease_term_ids[start:stop]]
+
+    def is_fresh(self, source_path):
+        """
+        Check whether the artifact was compiled from the current source file.
+
+        Args:
+            source_path (str): Path to kb.json
+
+        Returns:
+            bool: True if the source is unchanged or unavailable
+        """
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            return True  # Artifact-only deployment
+        size, mtime, sha = self.source_stamp
+        if (stat.st_size, stat.st_mtime_ns) == (size, mtime):
+            return True
+        return stat.st_size == size and _source_digest(source_path, stat.st_size, stat.st_mtime_ns) == sha
+
+def open_compiled_kb(artifact_path, verify=True):
+    """
+    Memory-map a compiled knowledge base artifact.
+
+    Args:
+        artifact_path (str): Path to the artifact
+        verify (bool): Whether to verify the payload checksum
+
+    Returns:
+        CompiledKnowledgeBase: Lazily decoded knowledge base
+    """
+    return CompiledKnowledgeBase(artifact_path, verify=verify)
+
+def main(argv=None):
+    """Compile kb.json into a binary artifact from the command line."""
+    parser = argparse.ArgumentParser(description="Compile the knowledge base into a binary artifact.")
+    parser.add_argument('source', nargs='?', default='data/kb.json', help="Knowledge base JSON or JSONL file")
+    parser.add_argument('artifact', nargs='?', default='data/kb.bin', help="Artifact to write")
+    parser.add_argument('--strict', action='store_true', help="Stop at the first malformed record instead of skipping it")
+    args = parser.parse_args(argv)
+
+    # Imported here since kb_stream depends on this module's RECORD_FIELDS
+    from utils.kb_stream import iter_kb_records, KBRecordError
+    errors = None if args.strict else []
+    try:
+        count = compile_knowledge_base(iter_kb_records(args.source, errors), args.artifact, args.source)
+    except KBRecordError as e:
+        sys.exit(f"{args.source}: {e}")
+    for error in errors or ():
+        print(f"{args.source}: skipped {error}", file=sys.stderr)
+    print(f"Compiled {count} diseases from {args.source} into {args.artifact}")
+    if errors:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
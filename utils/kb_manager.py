@@ -2,30 +2,130 @@
 """
 Knowledge base loading and processing for the holistic medicine chatbot.
 """
-import json
-import re
 import streamlit as st
+from utils.kb_compiler import open_compiled_kb, KBArtifactError
+from utils.disease_lookup import TreatmentView
+from utils.kb_shards import open_sharded_kb
+from utils.kb_stream import StreamedKnowledgeBase
+from utils.config import KB_RELOAD_INTERVAL, KB_SHARDS_PATH, KB_SHARD_CACHE_SIZE
+from utils.symptom_index import split_symptom_terms
+from utils.kb_reload import KnowledgeBaseWatcher
 
 @st.cache_data
 def load_knowledge_base(file_path='data/kb.json'):
     """
-    Load the knowledge base from a JSON file.
+    Load the knowledge base from a JSON array or JSONL file.
+    
+    Treatment texts are kept compressed and decompressed on access.
     
     Args:
         file_path (str): Path to the knowledge base file
         
     Returns:
-        list: List of disease entries
+        list: Sequence of disease entries
     """
     try:
-        with open(file_path, 'r') as file:
-            data = json.load(file)
-        return data
+        return StreamedKnowledgeBase(file_path)
     except FileNotFoundError:
         st.error(f"Knowledge base file not found. Please make sure {file_path} is in the same directory as the app.")
         return []
 
-@st.cache_data
+def read_knowledge_base(file_path='data/kb.json', artifact_path='data/kb.bin', shards_path=KB_SHARDS_PATH):
+    """
+    Read the knowledge base without Streamlit caching, for scripts and worker processes.
+    
+    Args:
+        file_path (str): Path to the knowledge base file
+        artifact_path (str): Path to the compiled artifact, used when it is up to date
+        shards_path (str): Directory of the category shards, used when they are up to date
+        
+    Returns:
+        list: Sequence of disease entries
+    """
+    if artifact_path:
+        try:
+            kb_data = open_compiled_kb(artifact_path)
+            if kb_data.is_fresh(file_path):
+                return kb_data
+        except (OSError, KBArtifactError):
+            pass
+    if shards_path:
+        try:
+            kb_data = open_sharded_kb(shards_path, KB_SHARD_CACHE_SIZE)
+            if kb_data.is_fresh(file_path):
+                return kb_data
+        except (OSError, KeyError, KBArtifactError):
+            pass
+    return StreamedKnowledgeBase(file_path)
+
+@st.cache_resource
+def get_kb_watcher(file_path='data/kb.json', artifact_path='data/kb.bin'):
+    """
+    Get the knowledge base watcher shared by all sessions, polling for edits every KB_RELOAD_INTERVAL seconds.
+    
+    Args:
+        file_path (str): Path to the knowledge base file
+        artifact_path (str): Path to the compiled artifact, used when it is up to date
+        
+    Returns:
+        KnowledgeBaseWatcher: Watcher holding the current generation
+    """
+    watcher = KnowledgeBaseWatcher(file_path, artifact_path)
+    if KB_RELOAD_INTERVAL > 0:
+        watcher.start(KB_RELOAD_INTERVAL)
+    return watcher
+
+def _in_script_run():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    return get_script_run_ctx(suppress_warning=True) is not None
+
+def start_kb_snapshot():
+    """Let the current rerun pick up the newest knowledge base generation."""
+    st.session_state.kb_snapshot = {}
+
+def get_kb_generation(file_path='data/kb.json', artifact_path='data/kb.bin'):
+    """
+    Get the knowledge base generation of the current rerun.
+    
+    The first call in a rerun pins the newest generation in the session, so
+    every index used until the next start_kb_snapshot() comes from the same
+    version of the KB even if a reload lands mid-rerun. Outside a Streamlit
+    script run the newest generation is returned.
+    
+    Args:
+        file_path (str): Path to the knowledge base file
+        artifact_path (str): Path to the compiled artifact
+        
+    Returns:
+        KBGeneration: Knowledge base and its indexes
+    """
+    watcher = get_kb_watcher(file_path, artifact_path)
+    if not _in_script_run():
+        return watcher.current
+    snapshot = st.session_state.setdefault('kb_snapshot', {})
+    generation = snapshot.get(file_path)
+    if generation is None:
+        generation = snapshot[file_path] = watcher.current
+    return generation
+
+def get_knowledge_base(file_path='data/kb.json', artifact_path='data/kb.bin'):
+    """
+    Get the knowledge base, preferring an up-to-date compiled artifact over the JSON file.
+    
+    Args:
+        file_path (str): Path to the knowledge base file
+        artifact_path (str): Path to the compiled artifact
+        
+    Returns:
+        list: Sequence of disease entries
+    """
+    generation = get_kb_generation(file_path, artifact_path)
+    if generation.error:
+        st.error(generation.error)
+    return generation.kb_data
+
+# A loaded knowledge base is keyed by its content version rather than hashed entry by entry
+@st.cache_data(hash_funcs={StreamedKnowledgeBase: lambda kb_data: kb_data.version})
 def create_symptom_mapping(kb_data):
     """
     Create mappings of symptoms to diseases and extract all symptoms.
@@ -49,7 +149,7 @@ def create_symptom_mapping(kb_data):
         disease_symptoms[disease] = symptoms
         
         # Extract individual symptoms
-        symptom_list = [s.strip() for s in re.split(r'[,;]', symptoms)]
+        symptom_list = split_symptom_terms(symptoms)
         for symptom in symptom_list:
             all_symptoms.add(symptom)
             if symptom in symptom_map:
@@ -59,44 +159,136 @@ def create_symptom_mapping(kb_data):
     
     return symptom_map, list(all_symptoms), disease_symptoms
 
-def get_treatment_info(kb_data, disease_name):
+def load_symptom_index(file_path='data/kb.json'):
+    """
+    Get the inverted symptom index of the current knowledge base generation.
+    
+    Args:
+        file_path (str): Path to the knowledge base file
+        
+    Returns:
+        SymptomIndex: Index shared by all sessions
+    """
+    return get_kb_generation(file_path).symptom_index
+
+def load_vector_scorer(file_path='data/kb.json'):
+    """
+    Get the sparse-matrix scoring backend of the current knowledge base generation.
+    
+    Args:
+        file_path (str): Path to the knowledge base file
+        
+    Returns:
+        VectorScorer: Scorer shared by all sessions, or None unless SCORING_BACKEND is "vector"
+    """
+    return get_kb_generation(file_path).vector_scorer()
+
+def load_symptom_extractor(file_path='data/kb.json'):
+    """
+    Get the local symptom extractor of the current knowledge base generation.
+    
+    Args:
+        file_path (str): Path to the knowledge base file
+        
+    Returns:
+        SymptomExtractor: Extractor shared by all sessions
+    """
+    return get_kb_generation(file_path).symptom_extractor()
+
+def load_kb_retriever(file_path='data/kb.json'):
+    """
+    Get the BM25 retriever of the current knowledge base generation, building it on first use.
+    
+    Args:
+        file_path (str): Path to the knowledge base file
+        
+    Returns:
+        KBRetriever: Retriever shared by all sessions
+    """
+    return get_kb_generation(file_path).retriever()
+
+def load_disease_lookup(file_path='data/kb.json'):
+    """
+    Get the disease name/alias lookup of the current knowledge base generation.
+    
+    Args:
+        file_path (str): Path to the knowledge base file
+        
+    Returns:
+        DiseaseLookup: Lookup shared by all sessions
+    """
+    return get_kb_generation(file_path).disease_lookup
+
+def get_treatment_info(kb_data, disease_name, disease_lookup=None):
     """
     Get treatment information for a specific disease.
     
     Args:
         kb_data (list): List of disease entries
         disease_name (str): Name of the disease
+        disease_lookup (DiseaseLookup): Prebuilt lookup over kb_data; falls back to a linear scan if omitted
         
     Returns:
-        dict: Treatment information or None if disease not found
+        TreatmentView: Read-only treatment information or None if disease not found
     """
-    for entry in kb_data:
+    if disease_lookup is not None:
+        return disease_lookup.get(disease_name)
+    
+    for disease_id, entry in enumerate(kb_data):
         if entry['Disease'] == disease_name:
-            return {
-                'Ayurvedic': entry['Ayurvedic_Treatment'],
-                'Homeopathic': entry['Homeopathic_Treatment'],
-                'Allopathic': entry['Allopathic_Treatment'],
-                'Category': entry['Category'],
-                'Symptoms': entry['Symptoms']
-            }
+            return TreatmentView(entry, disease_id)
     return None
 
-def suggest_symptoms(all_symptoms, partial_input):
+def load_autocomplete_index(file_path='data/kb.json'):
+    """
+    Get the symptom autocomplete index of the current knowledge base generation.
+    
+    Args:
+        file_path (str): Path to the knowledge base file
+        
+    Returns:
+        AutocompleteIndex: Index shared by all sessions
+    """
+    return get_kb_generation(file_path).autocomplete_index
+
+def load_fuzzy_matcher(file_path='data/kb.json'):
+    """
+    Get the typo-tolerant symptom matcher of the current knowledge base generation.
+    
+    Args:
+        file_path (str): Path to the knowledge base file
+        
+    Returns:
+        FuzzyMatcher: Matcher shared by all sessions
+    """
+    return get_kb_generation(file_path).fuzzy_matcher
+
+def suggest_symptoms(all_symptoms, partial_input, autocomplete_index=None, limit=5, fuzzy_matcher=None):
     """
     Suggest symptoms based on partial input.
     
     Args:
         all_symptoms (list): List of all symptoms
         partial_input (str): Partial symptom input
+        autocomplete_index (AutocompleteIndex): Prebuilt index over all_symptoms; falls back to a scan if omitted
+        limit (int): Maximum number of suggestions
+        fuzzy_matcher (FuzzyMatcher): Optional matcher used to fill up suggestions for misspelled input
         
     Returns:
         list: List of matching symptoms
     """
-    partial_input = partial_input.lower()
-    matches = []
+    if autocomplete_index is not None:
+        matches = autocomplete_index.suggest(partial_input, limit)
+    else:
+        partial_input_lower = partial_input.lower()
+        matches = [symptom for symptom in sorted(all_symptoms) if partial_input_lower in symptom.lower()][:limit]
     
-    for symptom in all_symptoms:
-        if partial_input in symptom.lower():
-            matches.append(symptom)
+    # Fill remaining slots with close spellings of KB symptoms
+    if fuzzy_matcher is not None and len(matches) < limit:
+        for symptom, _ in fuzzy_matcher.match(partial_input, limit=limit):
+            if symptom not in matches and symptom in fuzzy_matcher.terms:
+                matches.append(symptom)
+                if len(matches) == limit:
+                    break
     
-    return matches[:5]  # Return top 5 matches
\ No newline at end of file
+    return matches
\ No newline at end of file
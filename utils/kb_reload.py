@@ -0,0 +1,327 @@
+#kb_reload.py
+"""
+Hot reload of the knowledge base for the holistic medicine chatbot.
+
+A KnowledgeBaseWatcher polls kb.json from a background thread. A change in
+mtime or size triggers a content hash; when the content really changed, the new
+KB is loaded and indexed on the watcher thread, diffed against the current
+generation so only what the edit touched is rebuilt, and then published by
+swapping a single reference. Readers take that reference once (a snapshot) and
+use it throughout, so they never mix indexes from two versions of the KB.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from utils.config import FUZZY_MAX_EDIT_DISTANCE, FUZZY_MIN_SIMILARITY, SCORING_BACKEND, KB_SHARDS_PATH, KB_SHARD_CACHE_SIZE
+from utils.symptom_index import build_symptom_index, update_symptom_index
+from utils.disease_lookup import build_disease_lookup
+from utils.autocomplete import build_autocomplete_index
+from utils.fuzzy_matcher import build_fuzzy_matcher
+from utils.kb_shards import MANIFEST_NAME, fingerprint_record
+
+logger = logging.getLogger(__name__)
+
+class KBGeneration:
+    """
+    One immutable version of the knowledge base and every index built from it.
+
+    Attributes:
+        number (int): Generation number, starting at 1 and increasing with every reload
+        kb_data (list): Sequence of disease entries
+        content_hash (str): SHA-256 of kb.json
+        changes (dict): Diseases added, removed and changed relative to the previous generation,
+            and how much of the symptom index was rebuilt
+    """
+
+    def __init__(self, number, kb_data, content_hash, symptom_index, disease_lookup,
+                 fuzzy_matcher, autocomplete_index, record_hashes, changes, error=None):
+        self.number = number
+        self.kb_data = kb_data
+        self.content_hash = content_hash
+        self.symptom_index = symptom_index
+        self.disease_lookup = disease_lookup
+        self.fuzzy_matcher = fuzzy_matcher
+        self.autocomplete_index = autocomplete_index
+        self.record_hashes = record_hashes
+        self.changes = changes
+        self.error = error
+        self.loaded_at = time.time()
+        self._symptom_mapping = None
+        self._vector_scorer = None
+        self._retriever = None
+        self._symptom_extractor = None
+        self._retriever_lock = threading.Lock()
+
+    def symptom_mapping(self):
+        """
+        Get create_symptom_mapping's result for this generation, derived from the index.
+
+        Returns:
+            tuple: (symptom_map, all_symptoms, disease_symptoms)
+        """
+        if self._symptom_mapping is None:
+            index = self.symptom_index
+            # Retired terms (tombstones) have no postings and are left out
+            symptom_map = {
+                term: [index.names[disease_id] for disease_id in postings]
+                for term, postings in zip(index.terms, index.postings) if postings
+            }
+            self._symptom_mapping = (symptom_map, list(symptom_map), dict(zip(index.names, index.lowered_symptoms)))
+        return self._symptom_mapping
+
+    def vector_scorer(self):
+        """
+        Get the sparse-matrix scoring backend for this generation.
+
+        Returns:
+            VectorScorer: Scorer, or None unless SCORING_BACKEND is "vector"
+        """
+        if SCORING_BACKEND != "vector":
+            return None
+        if self._vector_scorer is None:
+            from utils.vector_scorer import build_vector_scorer
+            self._vector_scorer = build_vector_scorer(self.symptom_index)
+        return self._vector_scorer
+
+    def symptom_extractor(self):
+        """
+        Get the local free-text symptom extractor for this generation.
+
+        Returns:
+            SymptomExtractor: Extractor over the symptom vocabulary
+        """
+        if self._symptom_extractor is None:
+            from utils.symptom_extractor import build_symptom_extractor
+            self._symptom_extractor = build_symptom_extractor(self.symptom_index.vocabulary)
+        return self._symptom_extractor
+
+    def retriever(self):
+        """
+        Get the BM25 index over this generation's records, built on first use.
+
+        Returns:
+            KBRetriever: Retriever for chat context
+        """
+        # Building may read every treatment text, so concurrent sessions wait for one build
+        with self._retriever_lock:
+            if self._retriever is None:
+                from utils.kb_retriever import build_kb_retriever
+                self._retriever = build_kb_retriever(self.kb_data)
+        return self._retriever
+
+def _record_hashes(kb_data):
+    """Fingerprint every disease entry by name, from the manifest when the KB is sharded."""
+    if hasattr(kb_data, 'record_fingerprints'):
+        return kb_data.record_fingerprints()
+    return {entry['Disease']: fingerprint_record(entry) for entry in kb_data}
+
+def build_generation(kb_data, content_hash, previous=None, error=None):
+    """
+    Index a version of the knowledge base, reusing what is unchanged from the previous generation.
+
+    Args:
+        kb_data (list): Sequence of disease entries
+        content_hash (str): Hash of the source the entries were read from
+        previous (KBGeneration): Current generation to diff against
+        error (str): Load error to report alongside an empty knowledge base
+
+    Returns:
+        KBGeneration: New generation
+    """
+    record_hashes = _record_hashes(kb_data)
+    if previous is None:
+        symptom_index, rebuilt = build_symptom_index(kb_data), 'full'
+        changes = {'added': len(record_hashes), 'removed': 0, 'changed': 0, 'rebuilt': rebuilt}
+    else:
+        symptom_index, rebuilt = update_symptom_index(previous.symptom_index, kb_data)
+        old_hashes = previous.record_hashes
+        changes = {
+            'added': sum(1 for name in record_hashes if name not in old_hashes),
+            'removed': sum(1 for name in old_hashes if name not in record_hashes),
+            'changed': sum(1 for name, digest in record_hashes.items() if old_hashes.get(name, digest) != digest),
+            'rebuilt': rebuilt
+        }
+
+    # Term-level structures follow the index: reused, updated from the term delta, or rebuilt
+    term_changes = None if rebuilt == 'full' else symptom_index.term_changes(previous.symptom_index)
+    if term_changes is None:
+        fuzzy_matcher = build_fuzzy_matcher(symptom_index.live_terms(), FUZZY_MAX_EDIT_DISTANCE, FUZZY_MIN_SIMILARITY)
+    elif term_changes == ((), ()):
+        fuzzy_matcher = previous.fuzzy_matcher
+    else:
+        fuzzy_matcher = previous.fuzzy_matcher.updated(*term_changes)
+
+    generation = KBGeneration(
+        1 if previous is None else previous.number + 1,
+        kb_data,
+        content_hash,
+        symptom_index,
+        build_disease_lookup(kb_data, previous=None if previous is None else previous.disease_lookup),
+        fuzzy_matcher,
+        None,
+        record_hashes,
+        changes,
+        error
+    )
+    if rebuilt == 'none':
+        generation.autocomplete_index = previous.autocomplete_index
+        generation._symptom_mapping = previous._symptom_mapping
+        generation._symptom_extractor = previous._symptom_extractor
+    elif term_changes is None:
+        symptom_map, _, _ = generation.symptom_mapping()
+        generation.autocomplete_index = build_autocomplete_index(
+            symptom_map, None if previous is None else previous.autocomplete_index
+        )
+    else:
+        symptom_map, _, _ = generation.symptom_mapping()
+        generation.autocomplete_index = previous.autocomplete_index.updated(symptom_map, *term_changes)
+    return generation
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class KnowledgeBaseWatcher:
+    """
+    Watches kb.json and publishes a new KBGeneration whenever its content changes.
+
+    The first generation is built synchronously. Later ones are built by
+    check(), normally on the polling thread started by start(), while readers
+    keep using the current generation. A KB that fails to load or validate is
+    logged and skipped, and the current generation stays in place until the
+    file changes again.
+
+    Args:
+        file_path (str): Path to the knowledge base file
+        artifact_path (str): Path to the compiled artifact, used when it is up to date
+        shards_path (str): Directory of the category shards, used when they are up to date
+    """
+
+    def __init__(self, file_path='data/kb.json', artifact_path='data/kb.bin', shards_path=KB_SHARDS_PATH):
+        self.file_path = file_path
+        self.artifact_path = artifact_path
+        self.shards_path = shards_path
+        self.last_error = None
+        self._signature = None
+        self._failed_hash = None
+        self._build_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.current = self._load_initial()
+
+    def _manifest_path(self):
+        return os.path.join(self.shards_path, MANIFEST_NAME) if self.shards_path else None
+
+    def _signatures(self):
+        return (
+            _file_signature(self.file_path),
+            _file_signature(self.artifact_path) if self.artifact_path else None,
+            _file_signature(self._manifest_path()) if self.shards_path else None
+        )
+
+    def _content_hash(self):
+        """Hash kb.json, or the source stamp of an artifact- or shard-only deployment."""
+        if os.path.exists(self.file_path):
+            return _file_hash(self.file_path)
+        if self.artifact_path and os.path.exists(self.artifact_path):
+            from utils.kb_compiler import open_compiled_kb
+            return open_compiled_kb(self.artifact_path, verify=False).source_stamp[2].hex()
+        from utils.kb_shards import open_sharded_kb
+        return open_sharded_kb(self.shards_path, KB_SHARD_CACHE_SIZE).version
+
+    def _read(self):
+        from utils.kb_manager import read_knowledge_base
+        return read_knowledge_base(self.file_path, self.artifact_path, self.shards_path)
+
+    def _load_initial(self):
+        self._signature = self._signatures()
+        try:
+            content_hash = self._content_hash()
+            return build_generation(self._read(), content_hash)
+        except FileNotFoundError:
+            error = f"Knowledge base file not found. Please make sure {self.file_path} is in the same directory as the app."
+        except Exception as e:
+            error = f"Knowledge base {self.file_path} could not be loaded: {type(e).__name__}: {str(e)}"
+        self.last_error = error
+        return build_generation([], None, error=error)
+
+    def check(self):
+        """
+        Reload the knowledge base if it changed.
+
+        Returns:
+            bool: Whether a new generation was published
+        """
+        signature = self._signatures()
+        if signature == self._signature or not any(signature):
+            return False
+        if not self._build_lock.acquire(blocking=False):
+            return False  # Another thread is already rebuilding
+        try:
+            content_hash = self._content_hash()
+            if content_hash in (self.current.content_hash, self._failed_hash):
+                self._signature = signature
+                return False
+
+            start = time.perf_counter()
+            try:
+                kb_data = self._read()
+                previous = self.current if self.current.content_hash is not None else None
+                generation = build_generation(kb_data, content_hash, previous)
+            except Exception as e:
+                # Typically a half-written file; retried when it changes again
+                self._failed_hash = content_hash
+                self._signature = signature
+                self.last_error = f"{type(e).__name__}: {str(e)}"
+                logger.warning("Keeping knowledge base generation %d, reload failed: %s", self.current.number, self.last_error)
+                return False
+
+            if self._signatures() != signature:
+                return False  # Modified while loading; the next check reloads it
+            self._signature = signature
+            self.last_error = None
+            self.current = generation
+            logger.info(
+                "Knowledge base generation %d: %d diseases (%d added, %d removed, %d changed, %s reindex) in %.0f ms",
+                generation.number, len(generation.kb_data), generation.changes['added'], generation.changes['removed'],
+                generation.changes['changed'], generation.changes['rebuilt'], (time.perf_counter() - start) * 1000
+            )
+            return True
+        finally:
+            self._build_lock.release()
+
+    def start(self, interval):
+        """
+        Poll for changes from a daemon thread.
+
+        Args:
+            interval (float): Seconds between checks
+        """
+        def poll():
+            while not self._stop_event.wait(interval):
+                try:
+                    self.check()
+                except Exception:
+                    logger.exception("Knowledge base reload check failed")
+
+        self._thread = threading.Thread(target=poll, name='kb-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the polling thread."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
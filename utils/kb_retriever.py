@@ -0,0 +1,307 @@
+#kb_retriever.py
+"""
+BM25 retrieval over the knowledge base for the holistic medicine chatbot.
+
+Every record's disease name, symptoms and treatment texts are tokenized into one
+bag of words, with name and symptom words counted more than treatment words
+(BM25F-style field weights). The BM25 weight of every (disease, term) pair is
+computed once at build time and stored in a sparse disease x term matrix in
+compressed-column form, so a query only adds up the columns of its terms and
+partitions out the best k, a few milliseconds even at 100k diseases.
+
+The weighted word counts are the only part that needs the treatment texts.
+The sharder saves them next to its manifest, so a sharded KB gets its index
+without loading a shard.
+
+Hits are rendered as short snippets rather than whole records: the header of
+the disease and, from each treatment list, the items that mention the query
+first, all within a token budget for the prompt.
+"""
+import re
+from array import array
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+
+from utils.llm_telemetry import estimate_tokens
+from utils.symptom_vocabulary import singularize
+
+# BM25 term-frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# How many times a word counts in each field
+FIELD_WEIGHTS = (
+    ('Disease', 3),
+    ('Symptoms', 2),
+    ('Category', 1),
+    ('Ayurvedic_Treatment', 1),
+    ('Homeopathic_Treatment', 1),
+    ('Allopathic_Treatment', 1)
+)
+
+TREATMENT_LABELS = (
+    ('Ayurvedic_Treatment', 'Ayurvedic'),
+    ('Homeopathic_Treatment', 'Homeopathic'),
+    ('Allopathic_Treatment', 'Allopathic')
+)
+
+STOPWORDS = frozenset({
+    'a', 'about', 'an', 'and', 'any', 'are', 'as', 'at', 'be', 'best', 'can', 'could', 'do', 'does', 'for',
+    'from', 'get', 'good', 'have', 'help', 'how', 'i', 'if', 'in', 'is', 'it', 'its', 'me', 'my', 'of', 'on',
+    'or', 'should', 'so', 'some', 'than', 'that', 'the', 'their', 'there', 'these', 'this', 'to', 'too',
+    'was', 'what', 'when', 'which', 'who', 'why', 'will', 'with', 'would', 'you', 'your'
+})
+
+# Tokens for a snippet's treatment list, before the items that mention the query run out
+SNIPPET_FIELD_TOKENS = 40
+
+_WORD = re.compile(r'[a-z0-9]+')
+# Commas that are not inside parentheses separate treatment items
+_ITEM_SEPARATOR = re.compile(r',\s*(?![^()]*\))')
+
+def tokenize(text, stems=None):
+    """
+    Split text into normalized search terms.
+
+    Args:
+        text (str): Text to tokenize
+        stems (dict): Memo of word -> term shared across calls
+
+    Returns:
+        list: Terms, lower case and singular, without stopwords
+    """
+    if stems is None:
+        stems = {}
+    terms = []
+    for word in _WORD.findall(text.lower()):
+        term = stems.get(word)
+        if term is None:
+            term = stems[word] = '' if word in STOPWORDS else singularize(word)
+        if term:
+            terms.append(term)
+    return terms
+
+class KBRetriever:
+    """
+    BM25 index over the knowledge base.
+
+    Args:
+        kb_data (list): Sequence of disease entries the index was built from
+        term_ids (dict): Term -> column of the impact matrix
+        impacts (scipy.sparse.csc_matrix): Disease x term BM25 weights
+    """
+    __slots__ = ('kb_data', 'term_ids', 'indptr', 'indices', 'data', '_stems')
+
+    def __init__(self, kb_data, term_ids, impacts):
+        self.kb_data = kb_data
+        self.term_ids = term_ids
+        self.indptr = impacts.indptr
+        self.indices = impacts.indices
+        self.data = impacts.data
+        self._stems = {}
+
+    def __len__(self):
+        return len(self.kb_data)
+
+    def search(self, query, k=3, exclude=()):
+        """
+        Find the diseases most relevant to a query.
+
+        Args:
+            query (str): Free-text query, e.g. the user's chat question
+            k (int): Number of diseases to return
+            exclude (iterable): Disease ids to leave out
+
+        Returns:
+            list: (disease_id, score) pairs, best first
+        """
+        columns = [self.term_ids[term] for term in set(tokenize(query, self._stems)) if term in self.term_ids]
+        if not columns or k <= 0:
+            return []
+
+        if len(columns) == 1:
+            start, end = self.indptr[columns[0]], self.indptr[columns[0] + 1]
+            candidates = self.indices[start:end]
+            scores = self.data[start:end].astype(np.float64)
+        else:
+            dense = np.zeros(len(self.kb_data))
+            for column in columns:
+                start, end = self.indptr[column], self.indptr[column + 1]
+                dense[self.indices[start:end]] += self.data[start:end]
+            candidates = np.flatnonzero(dense)
+            scores = dense[candidates]
+
+        if exclude:
+            keep = ~np.isin(candidates, np.fromiter(exclude, dtype=candidates.dtype))
+            candidates, scores = candidates[keep], scores[keep]
+        if len(candidates) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            candidates, scores = candidates[top], scores[top]
+        # Best first, KB order among ties
+        order = np.lexsort((candidates, -scores))
+        return [(int(candidates[i]), float(scores[i])) for i in order]
+
+    def snippet(self, disease_id, query, max_tokens=SNIPPET_FIELD_TOKENS):
+        """
+        Render a disease as a short context snippet.
+
+        Args:
+            disease_id (int): Disease to render
+            query (str): Query whose terms decide which treatment items come first
+            max_tokens (int): Token budget of each treatment list
+
+        Returns:
+            str: Multi-line snippet
+        """
+        entry = self.kb_data[disease_id]
+        query_terms = set(tokenize(query, self._stems))
+        lines = [f"{entry['Disease']} ({entry['Category']}). Symptoms: {entry['Symptoms']}"]
+        for field, label in TREATMENT_LABELS:
+            items = [item.strip() for item in _ITEM_SEPARATOR.split(entry[field]) if item.strip()]
+            # Items mentioning the query first, otherwise in KB order
+            items.sort(key=lambda item: query_terms.isdisjoint(tokenize(item, self._stems)))
+            selected = []
+            used = 0
+            for item in items:
+                used += estimate_tokens(item) + 1
+                if selected and used > max_tokens:
+                    break
+                selected.append(item)
+            text = ', '.join(selected) + (', …' if len(selected) < len(items) else '')
+            lines.append(f"{label}: {text}")
+        return '\n'.join(lines)
+
+    def context(self, query, k=3, max_tokens=600, exclude=()):
+        """
+        Build a prompt context block from the best matching diseases.
+
+        Args:
+            query (str): Free-text query
+            k (int): Maximum number of diseases
+            max_tokens (int): Token budget of the whole block
+            exclude (iterable): Disease ids to leave out, e.g. one already in the prompt
+
+        Returns:
+            str: Snippets separated by blank lines, empty if nothing matched
+        """
+        snippets = []
+        used = 0
+        for disease_id, _ in self.search(query, k, exclude):
+            snippet = self.snippet(disease_id, query)
+            used += estimate_tokens(snippet) + 1
+            if used > max_tokens:
+                break
+            snippets.append(snippet)
+        return '\n\n'.join(snippets)
+
+class WordCounts:
+    """
+    Field-weighted word counts of disease entries, gathered one entry at a time.
+
+    Raw words are kept rather than terms, so the stemming in tokenize() can
+    change without invalidating saved counts.
+    """
+    __slots__ = ('rows', 'word_ids', 'counts', 'words', '_word_ids')
+
+    def __init__(self):
+        self.rows = array('i')
+        self.word_ids = array('i')
+        self.counts = array('i')
+        self.words = []
+        self._word_ids = {}
+
+    def add(self, disease_id, entry):
+        """
+        Count the words of one entry.
+
+        Args:
+            disease_id (int): Position of the disease in the knowledge base
+            entry (Mapping): Disease entry
+        """
+        weighted = Counter()
+        for field, weight in FIELD_WEIGHTS:
+            weighted.update(_WORD.findall(entry[field].lower()) * weight)
+        word_ids = self._word_ids
+        for word in weighted:
+            if word not in word_ids:
+                word_ids[word] = len(self.words)
+                self.words.append(word)
+        self.rows.extend([disease_id] * len(weighted))
+        self.word_ids.extend(map(word_ids.__getitem__, weighted))
+        self.counts.extend(weighted.values())
+
+    def save(self, file):
+        """
+        Write the counts in compressed .npz format, about a tenth the size of kb.json.
+
+        Args:
+            file: Binary file object
+        """
+        np.savez_compressed(file, rows=np.asarray(self.rows, dtype=np.int32), word_ids=np.asarray(self.word_ids, dtype=np.int32),
+                            counts=np.asarray(self.counts, dtype=np.int32), words=np.array(self.words, dtype=str))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read counts written by save().
+
+        Args:
+            path (str): .npz file
+
+        Returns:
+            WordCounts: Counts; further add() calls are not supported
+        """
+        counts = cls()
+        with np.load(path) as arrays:
+            counts.rows = arrays['rows']
+            counts.word_ids = arrays['word_ids']
+            counts.counts = arrays['counts']
+            counts.words = arrays['words'].tolist()
+        return counts
+
+def build_kb_retriever(kb_data):
+    """
+    Build the BM25 index of a knowledge base.
+
+    Args:
+        kb_data (list): Sequence of disease entries; a sharded KB supplies its saved word counts
+
+    Returns:
+        KBRetriever: Retriever over the entries
+    """
+    word_counts = kb_data.word_counts() if hasattr(kb_data, 'word_counts') else None
+    if word_counts is None:
+        word_counts = WordCounts()
+        entries = kb_data.iter_by_shard() if hasattr(kb_data, 'iter_by_shard') else enumerate(kb_data)
+        for disease_id, entry in entries:
+            word_counts.add(disease_id, entry)
+
+    # One mapping of the distinct words to terms keeps the per-word work out of Python
+    stems = {}
+    term_ids = {}
+    word_terms = np.empty(len(word_counts.words), dtype=np.int64)
+    for word_id, word in enumerate(word_counts.words):
+        term = tokenize(word, stems)
+        word_terms[word_id] = term_ids.setdefault(term[0], len(term_ids)) if term else -1
+
+    columns = word_terms[np.asarray(word_counts.word_ids, dtype=np.int64)]
+    kept = columns >= 0
+    n = len(kb_data)
+    # Words of one disease that share a term ("pain", "pains") are summed here
+    matrix = sparse.csc_matrix(
+        (np.asarray(word_counts.counts, dtype=np.float64)[kept],
+         (np.asarray(word_counts.rows, dtype=np.int64)[kept], columns[kept])),
+        shape=(n, len(term_ids))
+    )
+    matrix.sum_duplicates()
+
+    lengths = np.bincount(matrix.indices, weights=matrix.data, minlength=n)
+    document_frequency = np.diff(matrix.indptr)
+    idf = np.log1p((n - document_frequency + 0.5) / (document_frequency + 0.5))
+    norms = BM25_K1 * (1 - BM25_B + BM25_B * lengths / max(lengths.mean(), 1.0)) if n else lengths
+    term_of_entry = np.repeat(np.arange(len(term_ids)), document_frequency)
+    tf = matrix.data
+    matrix.data = (idf[term_of_entry] * tf * (BM25_K1 + 1) / (tf + norms[matrix.indices])).astype(np.float32)
+    return KBRetriever(kb_data, term_ids, matrix)
@@ -0,0 +1,407 @@
+#kb_shards.py
+"""
+Category-sharded knowledge base for the holistic medicine chatbot.
+
+The sharder splits kb.json into one JSON file per category plus a small
+manifest holding, for every disease, only what indexing needs (name, category,
+symptoms) and where its full record lives:
+
+    kb_shards/manifest.json
+    kb_shards/respiratory.<version>.json
+    kb_shards/digestive.<version>.json
+    ...
+    kb_shards/word-counts.<version>.npz
+
+The manifest is loaded eagerly, so the symptom index, autocomplete and lookup
+tables are built without reading any shard, and the BM25 retriever is built
+from the saved word counts. A shard's records, which carry the
+long *_Treatment texts, are read on first access and kept in a bounded LRU, so
+resident memory follows the categories sessions actually open.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+
+from utils.kb_compiler import RECORD_FIELDS, KBArtifactError, _source_stamp, _source_digest
+from utils.kb_retriever import WordCounts
+from utils.kb_stream import iter_kb_records, KBRecordError
+
+FORMAT_VERSION = 1
+
+MANIFEST_NAME = 'manifest.json'
+
+# Fields served from the manifest without touching a shard
+MANIFEST_FIELDS = ('Disease', 'Category', 'Symptoms')
+
+_SLUG = re.compile(r'[^a-z0-9]+')
+
+def fingerprint_record(entry):
+    """
+    Fingerprint a disease entry, stable across processes.
+
+    Args:
+        entry (Mapping): Disease entry
+
+    Returns:
+        str: Hex digest over every record field
+    """
+    return hashlib.sha1('\x1f'.join(entry[field] for field in RECORD_FIELDS).encode('utf-8')).hexdigest()
+
+def _shard_name(category, used):
+    """Derive a unique file-name stem for a category."""
+    slug = _SLUG.sub('-', category.lower()).strip('-') or 'uncategorized'
+    name = slug
+    suffix = 2
+    while name in used:
+        name = f"{slug}-{suffix}"
+        suffix += 1
+    used.add(name)
+    return name
+
+def write_kb_shards(kb_data, directory, source_path=None):
+    """
+    Split knowledge base entries into per-category shards and a manifest.
+
+    Shards and the retriever's word counts are written under versioned names
+    before the manifest is atomically replaced, so readers of the previous
+    manifest keep finding their files. Files older than the previous version
+    are removed.
+
+    Args:
+        kb_data (iterable): Disease entries
+        directory (str): Shard directory, created if missing
+        source_path (str): kb.json the entries came from, recorded for freshness checks
+
+    Returns:
+        dict: Numbers of diseases and shards written
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    try:
+        with open(manifest_path, 'r') as file:
+            previous = json.load(file)
+        previous_files = {shard['file'] for shard in previous['shards']}
+        if 'word_counts' in previous:
+            previous_files.add(previous['word_counts'])
+    except (OSError, ValueError, KeyError):
+        previous_files = set()
+
+    # Records are appended to one temporary file per category as they stream in;
+    # the files get their versioned names once every fingerprint is known
+    shard_ids = {}
+    shard_files = []
+    shard_counts = []
+    diseases = []
+    word_counts = WordCounts()
+    digest = hashlib.sha256()
+    try:
+        for entry in kb_data:
+            record = {field: entry[field] for field in RECORD_FIELDS}
+            word_counts.add(len(diseases), record)
+            shard_id = shard_ids.get(record['Category'])
+            if shard_id is None:
+                shard_id = shard_ids[record['Category']] = len(shard_files)
+                file = open(os.path.join(directory, f".shard-{shard_id}.tmp"), 'w')
+                shard_files.append(file)
+                shard_counts.append(0)
+                file.write(json.dumps({'format_version': FORMAT_VERSION, 'category': record['Category']})[:-1])
+                file.write(', "records": [')
+            fingerprint = fingerprint_record(record)
+            digest.update(fingerprint.encode('ascii'))
+            # The category is implied by the shard
+            diseases.append([record['Disease'], record['Symptoms'], shard_id, shard_counts[shard_id], fingerprint])
+            shard_files[shard_id].write((', ' if shard_counts[shard_id] else '') + json.dumps(record))
+            shard_counts[shard_id] += 1
+        for file in shard_files:
+            file.write(']}')
+    finally:
+        for file in shard_files:
+            file.close()
+
+    version = digest.hexdigest()[:12]
+    used = set()
+    shards = []
+    for category, shard_id in shard_ids.items():
+        file_name = f"{_shard_name(category, used)}.{version}.json"
+        shards.append({'file': file_name, 'category': category, 'count': shard_counts[shard_id]})
+        os.replace(shard_files[shard_id].name, os.path.join(directory, file_name))
+    word_counts_file = f"word-counts.{version}.npz"
+    temp_path = os.path.join(directory, '.word-counts.tmp')
+    with open(temp_path, 'wb') as file:
+        word_counts.save(file)
+    os.replace(temp_path, os.path.join(directory, word_counts_file))
+
+    if source_path:
+        source_size, source_mtime, source_sha = _source_stamp(source_path)
+    else:
+        source_size, source_mtime, source_sha = 0, 0, bytes(32)
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'version': version,
+        'source': {'size': source_size, 'mtime_ns': source_mtime, 'sha256': source_sha.hex()},
+        'shards': shards,
+        'word_counts': word_counts_file,
+        'diseases': diseases
+    }
+    temp_path = f"{manifest_path}.tmp"
+    with open(temp_path, 'w') as file:
+        json.dump(manifest, file)
+    os.replace(temp_path, manifest_path)
+
+    keep = previous_files | {shard['file'] for shard in shards} | {word_counts_file}
+    for name in os.listdir(directory):
+        if name.endswith(('.json', '.npz', '.tmp')) and name != MANIFEST_NAME and name not in keep:
+            os.remove(os.path.join(directory, name))
+    return {'diseases': len(diseases), 'shards': len(shards)}
+
+class ShardedRecord(Mapping):
+    """Read-only view of one disease entry; treatment fields load its shard on demand."""
+    __slots__ = ('_kb', '_disease_id')
+
+    def __init__(self, kb, disease_id):
+        self._kb = kb
+        self._disease_id = disease_id
+
+    def __getitem__(self, field):
+        return self._kb.field(self._disease_id, field)
+
+    def __iter__(self):
+        return iter(RECORD_FIELDS)
+
+    def __len__(self):
+        return len(RECORD_FIELDS)
+
+    def __repr__(self):
+        return f"ShardedRecord({self._kb.names[self._disease_id]!r})"
+
+class ShardedKnowledgeBase(Sequence):
+    """
+    Knowledge base backed by a manifest and lazily loaded category shards.
+
+    Behaves like the list of entry dicts returned by load_knowledge_base:
+    indexing yields ShardedRecord mappings keyed by the kb.json field names.
+
+    Args:
+        directory (str): Shard directory
+        cache_shards (int): Maximum number of shards kept in memory
+    """
+
+    def __init__(self, directory, cache_shards=4):
+        self.directory = directory
+        self.cache_shards = max(cache_shards, 1)
+        try:
+            with open(os.path.join(directory, MANIFEST_NAME), 'r') as file:
+                manifest = json.load(file)
+        except ValueError as e:
+            raise KBArtifactError(f"Unreadable knowledge base manifest in {directory}: {str(e)}") from e
+        if manifest.get('format_version') != FORMAT_VERSION:
+            raise KBArtifactError(f"Unsupported knowledge base manifest version in {directory}")
+
+        self.version = manifest['version']
+        source = manifest['source']
+        self.source_stamp = (source['size'], source['mtime_ns'], bytes.fromhex(source['sha256']))
+        self.shard_files = tuple(shard['file'] for shard in manifest['shards'])
+        self.shard_categories = tuple(shard['category'] for shard in manifest['shards'])
+        # Absent from manifests written before the retriever's counts were saved
+        self.word_counts_file = manifest.get('word_counts')
+        diseases = manifest['diseases']
+        self.names = tuple(disease[0] for disease in diseases)
+        self.symptoms = tuple(disease[1] for disease in diseases)
+        self.shard_ids = tuple(disease[2] for disease in diseases)
+        self.offsets = tuple(disease[3] for disease in diseases)
+        self.fingerprints = tuple(disease[4] for disease in diseases)
+
+        self._shards = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def __reduce__(self):
+        # Process pools reopen the manifest instead of pickling loaded shards
+        return (ShardedKnowledgeBase, (self.directory, self.cache_shards))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, disease_id):
+        if isinstance(disease_id, slice):
+            return [ShardedRecord(self, i) for i in range(*disease_id.indices(len(self)))]
+        if disease_id < 0:
+            disease_id += len(self)
+        if not 0 <= disease_id < len(self):
+            raise IndexError("disease id out of range")
+        return ShardedRecord(self, disease_id)
+
+    def field(self, disease_id, field):
+        """
+        Read one field of a disease entry.
+
+        Args:
+            disease_id (int): Position of the disease in the knowledge base
+            field (str): kb.json field name
+
+        Returns:
+            str: Field value
+        """
+        if field == 'Disease':
+            return self.names[disease_id]
+        if field == 'Category':
+            return self.shard_categories[self.shard_ids[disease_id]]
+        if field == 'Symptoms':
+            return self.symptoms[disease_id]
+        if field not in RECORD_FIELDS:
+            raise KeyError(field)
+        return self.shard(self.shard_ids[disease_id])[self.offsets[disease_id]][field]
+
+    def shard(self, shard_id):
+        """
+        Get the records of a shard, loading it on first access.
+
+        Args:
+            shard_id (int): Shard position in the manifest
+
+        Returns:
+            list: Full disease records of the shard
+        """
+        with self._lock:
+            records = self._shards.get(shard_id)
+            if records is not None:
+                self._shards.move_to_end(shard_id)
+                self.hits += 1
+                return records
+
+        # Read outside the lock so other shards stay available meanwhile
+        path = os.path.join(self.directory, self.shard_files[shard_id])
+        try:
+            with open(path, 'r') as file:
+                records = json.load(file)['records']
+        except (OSError, ValueError, KeyError) as e:
+            raise KBArtifactError(f"Unreadable knowledge base shard {path}: {str(e)}") from e
+
+        with self._lock:
+            if shard_id not in self._shards:
+                self.loads += 1
+                self._shards[shard_id] = records
+                while len(self._shards) > self.cache_shards:
+                    self._shards.popitem(last=False)
+                    self.evictions += 1
+            return self._shards[shard_id]
+
+    def iter_by_shard(self):
+        """
+        Iterate over every entry one shard at a time, reading each shard once.
+
+        Full scans in disease order would reload shards over and over, since
+        categories are interleaved in kb.json.
+
+        Yields:
+            tuple: (disease_id, record dict)
+        """
+        by_shard = [[] for _ in self.shard_files]
+        for disease_id, shard_id in enumerate(self.shard_ids):
+            by_shard[shard_id].append(disease_id)
+        for shard_id, disease_ids in enumerate(by_shard):
+            records = self.shard(shard_id)
+            for disease_id in disease_ids:
+                yield disease_id, records[self.offsets[disease_id]]
+
+    def word_counts(self):
+        """
+        Read the word counts the retriever is built from, without loading any shard.
+
+        Returns:
+            WordCounts: Saved counts, or None if the manifest has none
+        """
+        if self.word_counts_file is None:
+            return None
+        path = os.path.join(self.directory, self.word_counts_file)
+        try:
+            return WordCounts.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            raise KBArtifactError(f"Unreadable knowledge base word counts {path}: {str(e)}") from e
+
+    def record_fingerprints(self):
+        """
+        Get the fingerprint of every entry without loading any shard.
+
+        Returns:
+            dict: Disease name -> fingerprint_record() digest
+        """
+        return dict(zip(self.names, self.fingerprints))
+
+    def stats(self):
+        """
+        Report shard cache usage.
+
+        Returns:
+            dict: Shards total and resident, hits, loads and evictions
+        """
+        with self._lock:
+            return {
+                'shards': len(self.shard_files),
+                'resident': len(self._shards),
+                'hits': self.hits,
+                'loads': self.loads,
+                'evictions': self.evictions
+            }
+
+    def is_fresh(self, source_path):
+        """
+        Check whether the shards were written from the current source file.
+
+        Args:
+            source_path (str): Path to kb.json
+
+        Returns:
+            bool: True if the source is unchanged or unavailable
+        """
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            return True  # Shard-only deployment
+        size, mtime, sha = self.source_stamp
+        if (stat.st_size, stat.st_mtime_ns) == (size, mtime):
+            return True
+        return stat.st_size == size and _source_digest(source_path, stat.st_size, stat.st_mtime_ns) == sha
+
+def open_sharded_kb(directory, cache_shards=4):
+    """
+    Open a sharded knowledge base, reading only its manifest.
+
+    Args:
+        directory (str): Shard directory
+        cache_shards (int): Maximum number of shards kept in memory
+
+    Returns:
+        ShardedKnowledgeBase: Lazily loaded knowledge base
+    """
+    return ShardedKnowledgeBase(directory, cache_shards)
+
+def main(argv=None):
+    """Split kb.json into category shards from the command line."""
+    parser = argparse.ArgumentParser(description="Split the knowledge base into per-category shards.")
+    parser.add_argument('source', nargs='?', default='data/kb.json', help="Knowledge base JSON or JSONL file")
+    parser.add_argument('directory', nargs='?', default='data/kb_shards', help="Shard directory to write")
+    parser.add_argument('--strict', action='store_true', help="Stop at the first malformed record instead of skipping it")
+    args = parser.parse_args(argv)
+
+    errors = None if args.strict else []
+    try:
+        totals = write_kb_shards(iter_kb_records(args.source, errors), args.directory, args.source)
+    except KBRecordError as e:
+        sys.exit(f"{args.source}: {e}")
+    for error in errors or ():
+        print(f"{args.source}: skipped {error}", file=sys.stderr)
+    print(f"Wrote {totals['diseases']} diseases from {args.source} into {totals['shards']} shards in {args.directory}")
+    if errors:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+#kb_stream.py
+"""
+Streaming knowledge base reader for the holistic medicine chatbot.
+
+json.load needs the whole file as one string plus every parsed dict at once,
+several times the file size at peak. This reader accepts either the usual JSON
+array or JSONL (one disease object per line), decodes one record at a time from
+a bounded buffer, validates it, and yields it, so index and artifact builders
+can consume a KB of any size in a single pass. Malformed records are reported
+with the line they start on.
+
+StreamedKnowledgeBase keeps that bound after loading: it holds the fields
+indexing needs (name, category, symptoms) as they are, and the long
+*_Treatment texts zlib-compressed a page of records at a time, decoding a page
+only when one of its treatments is read.
+"""
+import hashlib
+import json
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+
+from utils.kb_compiler import RECORD_FIELDS
+
+# Characters read from the file per refill
+CHUNK_SIZE = 1 << 20
+
+# Records whose treatment texts are compressed together
+PAGE_RECORDS = 64
+
+# Fields kept uncompressed, as indexing reads them for every entry
+RESIDENT_FIELDS = ('Disease', 'Category', 'Symptoms')
+
+PAGED_FIELDS = tuple(field for field in RECORD_FIELDS if field not in RESIDENT_FIELDS)
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+class KBRecordError(ValueError):
+    """Raised for a knowledge base record that cannot be parsed or is missing fields."""
+
+    def __init__(self, line_no, message):
+        super().__init__(f"line {line_no}: {message}")
+        self.line_no = line_no
+        self.message = message
+
+def validate_record(record):
+    """
+    Check that a decoded value is a complete disease entry.
+
+    Args:
+        record: Decoded JSON value
+
+    Returns:
+        dict: Entry reduced to the expected fields
+
+    Raises:
+        ValueError: If the value is not an object or a field is missing, not a string or empty
+    """
+    if not isinstance(record, dict):
+        raise ValueError(f"expected a disease object, got {type(record).__name__}")
+    missing = [field for field in RECORD_FIELDS if field not in record]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    wrong = [field for field in RECORD_FIELDS if not isinstance(record[field], str)]
+    if wrong:
+        raise ValueError(f"{', '.join(wrong)} must be a string")
+    if not record['Disease'].strip():
+        raise ValueError("empty Disease")
+    return {field: record[field] for field in RECORD_FIELDS}
+
+def _truncated(error, buffer):
+    """Whether a decode error may just be the buffer ending mid-value."""
+    return error.pos >= len(buffer) - 6 or error.msg.startswith('Unterminated string')
+
+class _ArrayReader:
+    """Decodes the elements of a top-level JSON array from a file, one at a time."""
+
+    def __init__(self, file, chunk_size):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        # Line number at self.counted, advanced lazily by line()
+        self.line_no = 1
+        self.counted = 0
+
+    def line(self):
+        self.line_no += self.buffer.count('\n', self.counted, self.pos)
+        self.counted = self.pos
+        return self.line_no
+
+    def fill(self):
+        """Drop consumed text and read the next chunk; False at end of file."""
+        self.line()
+        chunk = self.file.read(self.chunk_size)
+        self.eof = not chunk
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = self.counted = 0
+        return not self.eof
+
+    def peek(self):
+        """Skip whitespace and return the next character, or '' at end of file."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, chars, what):
+        char = self.peek()
+        if char not in chars or not char:
+            raise KBRecordError(self.line(), f"expected {what}, found {char!r}" if char else f"expected {what}, found end of file")
+        self.pos += 1
+        return char
+
+    def decode(self):
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                if self.eof or not _truncated(e, self.buffer):
+                    line_no = self.line() + self.buffer.count('\n', self.pos, e.pos)
+                    raise KBRecordError(line_no, e.msg) from e
+                self.fill()
+                continue
+            if end == len(self.buffer) and not self.eof:
+                self.fill()  # A number may continue in the next chunk
+                continue
+            self.pos = end
+            return value
+
+    def __iter__(self):
+        """Yield (line_no, value) for every element."""
+        self.expect('[', "'['")
+        if self.peek() == ']':
+            self.pos += 1
+        else:
+            while True:
+                self.peek()
+                line_no = self.line()
+                yield line_no, self.decode()
+                if self.expect(',]', "',' or ']'") == ']':
+                    break
+        if self.peek():
+            raise KBRecordError(self.line(), "unexpected data after the array")
+
+def _iter_jsonl(file):
+    """Yield (line_no, value or ValueError) for every non-blank line."""
+    for line_no, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError as e:
+            yield line_no, e
+
+def iter_kb_records(file_path, errors=None, chunk_size=CHUNK_SIZE):
+    """
+    Stream validated disease entries from a JSON array or JSONL file.
+
+    The format is detected from the first character. In JSONL a malformed line
+    only loses that record; in an array a syntax error ends the stream, since
+    the rest of the file cannot be located reliably.
+
+    Args:
+        file_path (str): Knowledge base file
+        errors (list): Receives a KBRecordError per malformed record, which is then
+            skipped; if omitted the first one is raised
+        chunk_size (int): Characters read per refill of the array parser
+
+    Yields:
+        dict: Disease entries reduced to the expected fields, in file order
+
+    Raises:
+        KBRecordError: For a malformed record when errors is None, or an array syntax error
+    """
+    with open(file_path, 'r', encoding='utf-8') as file:
+        reader = _ArrayReader(file, chunk_size)
+        if reader.peek() == '[':
+            values = iter(reader)
+        else:
+            file.seek(0)
+            values = _iter_jsonl(file)
+
+        for line_no, value in values:
+            try:
+                if isinstance(value, ValueError):
+                    raise value
+                record = validate_record(value)
+            except ValueError as e:
+                error = KBRecordError(line_no, getattr(e, 'msg', None) or str(e))
+                if errors is None:
+                    raise error from e
+                errors.append(error)
+                continue
+            yield record
+
+class StreamedRecord(Mapping):
+    """Read-only view of one disease entry; treatment fields are decompressed on demand."""
+    __slots__ = ('_kb', '_disease_id')
+
+    def __init__(self, kb, disease_id):
+        self._kb = kb
+        self._disease_id = disease_id
+
+    def __getitem__(self, field):
+        return self._kb.field(self._disease_id, field)
+
+    def __iter__(self):
+        return iter(RECORD_FIELDS)
+
+    def __len__(self):
+        return len(RECORD_FIELDS)
+
+    def __repr__(self):
+        return f"StreamedRecord({self._kb.names[self._disease_id]!r})"
+
+class StreamedKnowledgeBase(Sequence):
+    """
+    Knowledge base read from a JSON array or JSONL file, with its treatment texts compressed.
+
+    One streaming pass keeps the name, category and symptoms of every entry
+    and compresses the treatment fields PAGE_RECORDS records at a time, about a
+    quarter of their size. A page is decompressed when one of its treatments is
+    read and kept in a bounded LRU. Nothing is read from the file again, so
+    edits to it never affect a loaded knowledge base.
+
+    Behaves like the list of entry dicts json.load would give: indexing yields
+    StreamedRecord mappings keyed by the kb.json field names.
+
+    Args:
+        file_path (str): Knowledge base file
+        errors (list): Receives a KBRecordError per malformed record, which is then
+            skipped; if omitted the first one is raised
+        cache_pages (int): Maximum number of decompressed pages kept in memory
+        chunk_size (int): Characters read per refill of the array parser
+    """
+
+    def __init__(self, file_path, errors=None, cache_pages=8, chunk_size=CHUNK_SIZE):
+        from utils.kb_shards import fingerprint_record
+
+        self.file_path = file_path
+        self.cache_pages = max(cache_pages, 1)
+        names, categories, symptoms, fingerprints = [], [], [], []
+        compressed = []
+        page = []
+        digest = hashlib.sha256()
+        for record in iter_kb_records(file_path, errors, chunk_size):
+            names.append(record['Disease'])
+            categories.append(record['Category'])
+            symptoms.append(record['Symptoms'])
+            fingerprint = fingerprint_record(record)
+            fingerprints.append(fingerprint)
+            digest.update(fingerprint.encode('ascii'))
+            page.append([record[field] for field in PAGED_FIELDS])
+            if len(page) == PAGE_RECORDS:
+                compressed.append(zlib.compress(json.dumps(page).encode('utf-8'), 1))
+                page = []
+        if page:
+            compressed.append(zlib.compress(json.dumps(page).encode('utf-8'), 1))
+        self.names = tuple(names)
+        self.categories = tuple(categories)
+        self.symptoms = tuple(symptoms)
+        self.fingerprints = tuple(fingerprints)
+        self.compressed = tuple(compressed)
+        # Identifies the content, e.g. for Streamlit's argument hashing
+        self.version = digest.hexdigest()[:12]
+        self._reset_cache()
+
+    def _reset_cache(self):
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def __getstate__(self):
+        # Pickled copies (st.cache_data, process pools) start with an empty page cache
+        state = self.__dict__.copy()
+        for key in ('_pages', '_lock', 'hits', 'loads', 'evictions'):
+            del state[key]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._reset_cache()
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, disease_id):
+        if isinstance(disease_id, slice):
+            return [StreamedRecord(self, i) for i in range(*disease_id.indices(len(self)))]
+        if disease_id < 0:
+            disease_id += len(self)
+        if not 0 <= disease_id < len(self):
+            raise IndexError("disease id out of range")
+        return StreamedRecord(self, disease_id)
+
+    def field(self, disease_id, field):
+        """
+        Read one field of a disease entry.
+
+        Args:
+            disease_id (int): Position of the disease in the knowledge base
+            field (str): kb.json field name
+
+        Returns:
+            str: Field value
+        """
+        if field == 'Disease':
+            return self.names[disease_id]
+        if field == 'Category':
+            return self.categories[disease_id]
+        if field == 'Symptoms':
+            return self.symptoms[disease_id]
+        if field not in RECORD_FIELDS:
+            raise KeyError(field)
+        return self.page(disease_id // PAGE_RECORDS)[disease_id % PAGE_RECORDS][PAGED_FIELDS.index(field)]
+
+    def page(self, page_id):
+        """
+        Get the treatment texts of a page, decompressing them on first access.
+
+        Args:
+            page_id (int): Page number; page n holds disease ids n * PAGE_RECORDS onwards
+
+        Returns:
+            list: Per disease, the PAGED_FIELDS values in order
+        """
+        with self._lock:
+            records = self._pages.get(page_id)
+            if records is not None:
+                self._pages.move_to_end(page_id)
+                self.hits += 1
+                return records
+            records = json.loads(zlib.decompress(self.compressed[page_id]))
+            self.loads += 1
+            self._pages[page_id] = records
+            while len(self._pages) > self.cache_pages:
+                self._pages.popitem(last=False)
+                self.evictions += 1
+            return records
+
+    def record_fingerprints(self):
+        """
+        Get the fingerprint of every entry without decompressing any page.
+
+        Returns:
+            dict: Disease name -> fingerprint_record() digest
+        """
+        return dict(zip(self.names, self.fingerprints))
+
+    def stats(self):
+        """
+        Report page cache usage.
+
+        Returns:
+            dict: Pages total and resident, hits, loads and evictions
+        """
+        with self._lock:
+            return {
+                'pages': len(self.compressed),
+                'resident': len(self._pages),
+                'hits': self.hits,
+                'loads': self.loads,
+                'evictions': self.evictions
+            }
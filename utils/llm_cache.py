@@ -0,0 +1,165 @@
+#llm_cache.py
+"""
+Two-tier cache for LLM responses: an in-process LRU in front of an on-disk SQLite store.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+)
+"""
+
+def make_cache_key(deployment, prompt, **params):
+    """
+    Build a cache key from the deployment, a hash of the prompt and the call parameters.
+
+    Args:
+        deployment (str): Azure deployment name
+        prompt (str): Prompt sent to the model
+        **params: Parameters that change the completion (max_tokens, temperature, ...)
+
+    Returns:
+        str: Hex digest identifying the request
+    """
+    prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+    material = json.dumps({'deployment': deployment, 'prompt': prompt_hash, 'params': params}, sort_keys=True)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+class LLMResponseCache:
+    """
+    Thread-safe LLM response cache.
+
+    Lookups check the in-process LRU first, then SQLite. Entries of both tiers
+    expire ttl seconds after they were stored, and the least recently used disk
+    entries are evicted once the stored text exceeds max_bytes. Hit and miss
+    counters are kept per tier.
+    """
+
+    def __init__(self, path=None, ttl=7 * 24 * 3600, max_bytes=64 * 1024 * 1024, memory_entries=512):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        self._db = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(_SCHEMA)
+            self._db.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed)")
+
+    def _remember(self, key, value, created):
+        # Memory entries carry their expiry time, so they age out with the disk copy
+        self._memory[key] = (value, created + self.ttl)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """
+        Look up a cached response.
+
+        Args:
+            key (str): Key from make_cache_key
+
+        Returns:
+            str: Cached response or None on a miss
+        """
+        with self._lock:
+            now = time.time()
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires = entry
+                if now <= expires:
+                    self._memory.move_to_end(key)
+                    self._counters['memory_hits'] += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value, created FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row and now - row[1] <= self.ttl:
+                    self._db.execute("UPDATE llm_cache SET accessed = ? WHERE key = ?", (now, key))
+                    self._remember(key, row[0], row[1])
+                    self._counters['disk_hits'] += 1
+                    return row[0]
+                if row:
+                    self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+
+            self._counters['misses'] += 1
+            return None
+
+    def set(self, key, value):
+        """
+        Store a response in both tiers.
+
+        Args:
+            key (str): Key from make_cache_key
+            value (str): Response text
+        """
+        with self._lock:
+            now = time.time()
+            self._remember(key, value, now)
+            self._counters['stores'] += 1
+            if self._db is None:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode('utf-8')), now, now)
+            )
+            self._evict(now)
+
+    def _evict(self, now):
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        self._counters['evictions'] += self._db.execute(
+            "DELETE FROM llm_cache WHERE created < ?", (now - self.ttl,)
+        ).rowcount
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        while total > self.max_bytes:
+            rows = self._db.execute("SELECT key, size FROM llm_cache ORDER BY accessed LIMIT 64").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._memory.pop(key, None)
+                self._counters['evictions'] += 1
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+
+    def stats(self):
+        """
+        Get hit/miss counters.
+
+        Returns:
+            dict: Counters plus the overall hit rate
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats['memory_entries'] = len(self._memory)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
@@ -2,17 +2,33 @@
 """
 Azure OpenAI integration for the holistic medicine chatbot.
 """
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import streamlit as st
 from openai import AzureOpenAI
+from utils.config import (
+    LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_MAX_MB, LLM_CACHE_MEMORY_ENTRIES, LLM_MAX_CONCURRENCY,
+    ENHANCEMENT_STORE_PATH, AZURE_MAX_RETRIES, LLM_STREAM_INCLUDE_USAGE, NL_EXTRACTION_MIN_CONFIDENCE
+)
+from utils.llm_cache import LLMResponseCache, make_cache_key
+from utils.llm_telemetry import TELEMETRY, LLMCallRecord, current_session_id, estimate_tokens
 
-def initialize_azure_client(api_key, endpoint, api_version):
+SYSTEM_PROMPT = "You are a helpful medical assistant."
+TEMPERATURE = 0.7
+
+# Bounded pool shared by all sessions, capping concurrent enhancement calls to Azure
+_ENHANCEMENT_POOL = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix='enhance')
+
+def initialize_azure_client(api_key, endpoint, api_version, max_retries=AZURE_MAX_RETRIES):
     """
     Initialize the Azure OpenAI client.
     
     Args:
         api_key (str): Azure OpenAI API key
-        endpoint (str): Azure OpenAI endpoint
+        endpoint (str): Azure OpenAI endpoint (or the local mock server)
         api_version (str): Azure OpenAI API version
+        max_retries (int): Retries on 429/5xx responses and connection errors
         
     Returns:
         AzureOpenAI: Initialized client or None if unsuccessful
@@ -22,7 +38,8 @@ def initialize_azure_client(api_key, endpoint, api_version):
             client = AzureOpenAI(
                 api_key=api_key,
                 api_version=api_version,
-                azure_endpoint=endpoint
+                azure_endpoint=endpoint,
+                max_retries=max_retries
             )
             return client
         else:
@@ -31,49 +48,230 @@ def initialize_azure_client(api_key, endpoint, api_version):
         st.error(f"Error initializing Azure OpenAI client: {str(e)}")
         return None
 
-def get_llm_response(client, deployment, prompt, max_tokens=1000):
+@st.cache_resource
+def get_llm_cache():
     """
-    Get a response from the Azure OpenAI model.
+    Get the LLM response cache shared by all sessions.
+    
+    Returns:
+        LLMResponseCache: Configured cache
+    """
+    return LLMResponseCache(
+        path=LLM_CACHE_PATH or None,
+        ttl=LLM_CACHE_TTL,
+        max_bytes=LLM_CACHE_MAX_MB * 1024 * 1024,
+        memory_entries=LLM_CACHE_MEMORY_ENTRIES
+    )
+
+@st.cache_resource
+def load_enhancement_store(path, mtime=None):
+    """
+    Load precomputed treatment enhancements, shared by all sessions.
+    
+    Args:
+        path (str): Path to the enhancement artifact
+        mtime (int): Modification time of the artifact, so regenerated files are reloaded
+        
+    Returns:
+        EnhancementStore: Store or None if unavailable
+    """
+    from utils.enhancement_store import load_enhancement_store as read_enhancement_store
+    return read_enhancement_store(path)
+
+def get_enhancement_store(path=ENHANCEMENT_STORE_PATH):
+    """
+    Get the precomputed enhancement store if the artifact exists.
+    
+    Args:
+        path (str): Path to the enhancement artifact
+        
+    Returns:
+        EnhancementStore: Store or None if there is no artifact
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    return load_enhancement_store(path, mtime)
+
+def request_completion(client, deployment, prompt, max_tokens=1000, cache=None, call_site="other", session_id=None):
+    """
+    Request a chat completion, raising on failure.
     
     Args:
         client (AzureOpenAI): Azure OpenAI client
         deployment (str): Azure deployment name
         prompt (str): Prompt to send to the model
         max_tokens (int): Maximum tokens in the response
+        cache (LLMResponseCache): Optional cache; successful responses are stored and reused
+        call_site (str): Feature making the call, for telemetry (extraction, enhancement, chat, ...)
+        session_id (str): Streamlit session id for telemetry; defaults to the calling thread's session
         
     Returns:
         str: Model response
     """
+    record = LLMCallRecord(call_site, session_id or current_session_id(), deployment, max_tokens)
+    start = time.perf_counter()
     try:
-        if not client:
-            return "Azure OpenAI not configured. Please set the required environment variables."
+        if cache is not None:
+            cache_key = make_cache_key(
+                deployment, prompt, system=SYSTEM_PROMPT, max_tokens=max_tokens, temperature=TEMPERATURE
+            )
+            cached = cache.get(cache_key)
+            if cached is not None:
+                record.cache_hit = True
+                return cached
         
         # Using chat completions with proper format (messages array)
         response = client.chat.completions.create(
             model=deployment,
             messages=[
-                {"role": "system", "content": "You are a helpful medical assistant."},
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
             max_tokens=max_tokens,
-            temperature=0.7,
+            temperature=TEMPERATURE,
         )
-        return response.choices[0].message.content.strip()
+        content = response.choices[0].message.content.strip()
+        if response.usage is not None:
+            record.prompt_tokens = response.usage.prompt_tokens
+            record.completion_tokens = response.usage.completion_tokens
+        else:
+            record.prompt_tokens = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(prompt)
+            record.completion_tokens = estimate_tokens(content)
+            record.usage_estimated = True
+        if cache is not None and content:
+            cache.set(cache_key, content)
+        return content
+    except Exception as e:
+        record.error = type(e).__name__
+        raise
+    finally:
+        record.wall_time = time.perf_counter() - start
+        if not record.cache_hit and record.error is None:
+            record.ttft = record.wall_time  # Non-streaming: the first token arrives with the whole response
+        TELEMETRY.record(record)
+
+def get_llm_response(client, deployment, prompt, max_tokens=1000, cache=None, call_site="other"):
+    """
+    Get a response from the Azure OpenAI model.
+    
+    Args:
+        client (AzureOpenAI): Azure OpenAI client
+        deployment (str): Azure deployment name
+        prompt (str): Prompt to send to the model
+        max_tokens (int): Maximum tokens in the response
+        cache (LLMResponseCache): Optional cache; successful responses are stored and reused
+        call_site (str): Feature making the call, for telemetry
+        
+    Returns:
+        str: Model response
+    """
+    try:
+        if not client:
+            return "Azure OpenAI not configured. Please set the required environment variables."
+        
+        return request_completion(client, deployment, prompt, max_tokens, cache, call_site)
     except Exception as e:
         return f"Error getting LLM response: {str(e)}"
 
-def process_natural_language_symptoms(client, deployment, user_input):
+def stream_llm_response(client, deployment, prompt, max_tokens=1000, call_site="chat"):
+    """
+    Stream a response from the Azure OpenAI model token by token.
+    
+    The HTTP stream is closed when the generator is closed, so a caller that
+    stops iterating (e.g. the user navigated away) cancels the generation.
+    
+    Args:
+        client (AzureOpenAI): Azure OpenAI client
+        deployment (str): Azure deployment name
+        prompt (str): Prompt to send to the model
+        max_tokens (int): Maximum tokens in the response
+        call_site (str): Feature making the call, for telemetry
+        
+    Yields:
+        str: Incremental pieces of the model response
+    """
+    if not client:
+        yield "Azure OpenAI not configured. Please set the required environment variables."
+        return
+    
+    record = LLMCallRecord(call_site, current_session_id(), deployment, max_tokens)
+    start = time.perf_counter()
+    try:
+        stream = client.chat.completions.create(
+            model=deployment,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=max_tokens,
+            temperature=TEMPERATURE,
+            stream=True,
+            **({"stream_options": {"include_usage": True}} if LLM_STREAM_INCLUDE_USAGE else {}),
+        )
+    except Exception as e:
+        record.error = type(e).__name__
+        record.wall_time = time.perf_counter() - start
+        TELEMETRY.record(record)
+        yield f"Error getting LLM response: {str(e)}"
+        return
+    
+    completion = []
+    try:
+        for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                record.prompt_tokens = chunk.usage.prompt_tokens
+                record.completion_tokens = chunk.usage.completion_tokens
+            # Azure sends chunks without choices (e.g. content filter results)
+            if chunk.choices and chunk.choices[0].delta.content:
+                if record.ttft is None:
+                    record.ttft = time.perf_counter() - start
+                completion.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+    except Exception as e:
+        record.error = type(e).__name__
+        yield f"\n\nError getting LLM response: {str(e)}"
+    finally:
+        stream.close()
+        record.wall_time = time.perf_counter() - start
+        if not record.completion_tokens:
+            # No usage chunk (older API versions, or the caller stopped early)
+            record.prompt_tokens = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(prompt)
+            record.completion_tokens = estimate_tokens(''.join(completion))
+            record.usage_estimated = True
+        TELEMETRY.record(record)
+
+def process_natural_language_symptoms(client, deployment, user_input, cache=None, extractor=None,
+                                      min_confidence=NL_EXTRACTION_MIN_CONFIDENCE):
     """
     Extract symptoms from natural language description.
     
+    Known symptoms are matched locally first. The LLM is only asked when they
+    explain less than min_confidence of the description. Without a client the
+    local matches are returned, or the configuration error if there are none.
+    
     Args:
         client (AzureOpenAI): Azure OpenAI client
         deployment (str): Azure deployment name
         user_input (str): User's natural language description
+        cache (LLMResponseCache): Optional cache for repeated descriptions
+        extractor (SymptomExtractor): Optional local extractor over the KB vocabulary
+        min_confidence (float): Local confidence at which the LLM is skipped
         
     Returns:
         tuple: (extracted_symptoms, error)
     """
+    local_symptoms = []
+    negated_keys = set()
+    if extractor is not None:
+        extraction = extractor.extract(user_input)
+        # Without a client, local matches are the answer unless there are none
+        if extraction.confidence >= min_confidence or (not client and extraction.symptoms):
+            return extraction.symptoms, None
+        local_symptoms = extraction.symptoms
+        negated_keys = {extractor.vocabulary.key(symptom) for symptom in extraction.negated}
+    
     if not client:
         return [], "Azure OpenAI not configured. Please set the required environment variables."
     
@@ -87,32 +285,68 @@ def process_natural_language_symptoms(client, deployment, user_input):
         Symptoms:
         """
         
-        response = get_llm_response(client, deployment, prompt)
+        response = get_llm_response(client, deployment, prompt, cache=cache, call_site="extraction")
         extracted_symptoms = [s.strip() for s in response.split(',')]
+        if extractor is not None:
+            # Keep the local matches, and drop symptoms the user said they do not have
+            extracted_symptoms = local_symptoms + [
+                symptom for symptom in extracted_symptoms
+                if symptom and extractor.vocabulary.key(symptom) not in negated_keys
+            ]
         return extracted_symptoms, None
     except Exception as e:
         return [], f"Error processing symptoms: {str(e)}"
 
-def enhance_treatment_description(client, deployment, treatment_type, base_treatment, disease, symptoms):
+def summarize_conversation(client, deployment, summary, messages, max_tokens, cache=None):
     """
-    Enhance treatment description with more details.
+    Fold chat messages into a rolling conversation summary.
+    
+    Only the previous summary and the messages leaving the verbatim window are
+    sent, so the cost of an update does not grow with the session.
     
     Args:
         client (AzureOpenAI): Azure OpenAI client
         deployment (str): Azure deployment name
+        summary (str): Previous summary, empty for the first update
+        messages (list): Chat messages to fold in, oldest first
+        max_tokens (int): Token budget of the summary
+        cache (LLMResponseCache): Optional cache
+        
+    Returns:
+        str: Updated summary, or None without a client
+    """
+    if not client:
+        return None
+    
+    transcript = '\n'.join(f"{message['role'].title()}: {message['content']}" for message in messages)
+    prompt = f"""
+        Update the summary of a conversation between a user and a holistic medicine health assistant
+        with the new messages below. Keep the user's symptoms, conditions, treatments discussed, questions
+        and any advice given; drop pleasantries. Write at most {max_tokens * 3 // 4} words of plain text.
+        
+        Current summary: {summary or "(none)"}
+        
+        New messages:
+        {transcript}
+        
+        Updated summary:
+        """
+    return request_completion(client, deployment, prompt, max_tokens=max_tokens, cache=cache, call_site="summary")
+
+def build_enhancement_prompt(treatment_type, base_treatment, disease, symptoms):
+    """
+    Build the prompt used to enhance a treatment description.
+    
+    Args:
         treatment_type (str): Type of treatment (Ayurvedic, Homeopathic, Allopathic)
         base_treatment (str): Original treatment description
         disease (str): Disease name
         symptoms (str): Disease symptoms
         
     Returns:
-        str: Enhanced treatment description
+        str: Prompt text
     """
-    if not client:
-        return base_treatment
-    
-    try:
-        prompt = f"""
+    return f"""
         Enhance this {treatment_type} treatment description for {disease} with more detailed explanations, 
         including potential benefits and considerations. Keep the response under 250 words, be factual, 
         and maintain a professional tone.
@@ -123,8 +357,84 @@ def enhance_treatment_description(client, deployment, treatment_type, base_treat
         
         Enhanced treatment explanation:
         """
+
+def enhance_treatment_description(client, deployment, treatment_type, base_treatment, disease, symptoms, cache=None,
+                                  session_id=None):
+    """
+    Enhance treatment description with more details.
+    
+    Args:
+        client (AzureOpenAI): Azure OpenAI client
+        deployment (str): Azure deployment name
+        treatment_type (str): Type of treatment (Ayurvedic, Homeopathic, Allopathic)
+        base_treatment (str): Original treatment description
+        disease (str): Disease name
+        symptoms (str): Disease symptoms
+        cache (LLMResponseCache): Optional cache; enhancements are effectively static per disease
+        session_id (str): Streamlit session id for telemetry when called from a worker thread
         
-        enhanced_description = get_llm_response(client, deployment, prompt)
+    Returns:
+        str: Enhanced treatment description
+    """
+    if not client:
+        return base_treatment
+    
+    try:
+        prompt = build_enhancement_prompt(treatment_type, base_treatment, disease, symptoms)
+        enhanced_description = request_completion(
+            client, deployment, prompt, cache=cache, call_site="enhancement", session_id=session_id
+        )
         return enhanced_description or base_treatment
     except Exception:
-        return base_treatment
\ No newline at end of file
+        return base_treatment
+
+def enhance_treatment_descriptions(client, deployment, treatment_info, disease, treatment_types, cache=None):
+    """
+    Enhance several treatment descriptions concurrently.
+    
+    All requested types are dispatched at once to a bounded thread pool, so the
+    total wait is roughly one LLM round trip instead of one per type.
+    
+    Args:
+        client (AzureOpenAI): Azure OpenAI client
+        deployment (str): Azure deployment name
+        treatment_info (Mapping): Treatment information with one key per treatment type and 'Symptoms'
+        disease (str): Disease name
+        treatment_types (list): Treatment types to enhance (Ayurvedic, Homeopathic, Allopathic)
+        cache (LLMResponseCache): Optional response cache
+        
+    Yields:
+        tuple: (treatment_type, description) in completion order; failed types yield the base text
+    """
+    if not client:
+        for treatment_type in treatment_types:
+            yield treatment_type, treatment_info[treatment_type]
+        return
+    
+    # Pool threads have no Streamlit context, so pass the session along for telemetry
+    session_id = current_session_id()
+    futures = {
+        _ENHANCEMENT_POOL.submit(
+            enhance_treatment_description,
+            client,
+            deployment,
+            treatment_type,
+            treatment_info[treatment_type],
+            disease,
+            treatment_info['Symptoms'],
+            cache,
+            session_id
+        ): treatment_type
+        for treatment_type in treatment_types
+    }
+    try:
+        for future in as_completed(futures):
+            treatment_type = futures[future]
+            try:
+                yield treatment_type, future.result()
+            except Exception:
+                yield treatment_type, treatment_info[treatment_type]
+    finally:
+        # Drop queued work if the caller stops early (e.g. the script is rerun)
+        for future in futures:
+            future.cancel()
\ No newline at end of file
@@ -0,0 +1,271 @@
+#llm_telemetry.py
+"""
+Structured telemetry for LLM calls in the holistic medicine chatbot.
+
+Every call made through llm_interface is recorded with its call site
+(extraction, enhancement, chat, ...), wall time, time to first token, token
+usage, cache hit and error class. Records are kept in a rolling window for
+aggregates, folded into cumulative counters for Prometheus, and checked against
+token budgets so a runaway session or feature raises an alarm.
+"""
+import logging
+import threading
+import time
+from collections import deque
+
+from utils.config import (
+    LLM_TELEMETRY_WINDOW, LLM_BUDGET_SESSION_TOKENS_PER_MINUTE, LLM_BUDGET_TOKENS_PER_MINUTE
+)
+from utils.rerun_metrics import Histogram, BUCKETS, METRIC_PREFIX
+
+logger = logging.getLogger(__name__)
+
+# Seconds before the same budget alarm can fire again
+ALARM_COOLDOWN = 60.0
+
+def estimate_tokens(text):
+    """Estimate the token count of a text (about four characters per token)."""
+    return (len(text) + 3) // 4 if text else 0
+
+def current_session_id():
+    """
+    Get the Streamlit session id of the calling thread.
+
+    Returns:
+        str: Session id, or None outside a Streamlit script thread
+    """
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx(suppress_warning=True)
+    except ImportError:
+        return None
+    return ctx.session_id if ctx is not None else None
+
+class LLMCallRecord:
+    """Telemetry of one LLM call."""
+    __slots__ = (
+        'call_site', 'session_id', 'deployment', 'max_tokens', 'started', 'wall_time', 'ttft',
+        'prompt_tokens', 'completion_tokens', 'usage_estimated', 'cache_hit', 'error'
+    )
+
+    def __init__(self, call_site, session_id=None, deployment=None, max_tokens=None):
+        self.call_site = call_site
+        self.session_id = session_id
+        self.deployment = deployment
+        self.max_tokens = max_tokens
+        self.started = time.time()
+        self.wall_time = None
+        self.ttft = None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.usage_estimated = False
+        self.cache_hit = False
+        self.error = None
+
+    @property
+    def total_tokens(self):
+        return self.prompt_tokens + self.completion_tokens
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(fraction * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+class LLMTelemetry:
+    """
+    Thread-safe LLM call telemetry shared by the whole process.
+
+    Args:
+        window (float): Seconds of records kept for rolling aggregates
+        session_tokens_per_minute (int): Per-session token budget; 0 disables the alarm
+        tokens_per_minute (int): Process-wide token budget; 0 disables the alarm
+    """
+
+    def __init__(self, window=900.0, session_tokens_per_minute=0, tokens_per_minute=0):
+        self.window = window
+        self.session_tokens_per_minute = session_tokens_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.records = deque()
+        # (recorded at, started, session id, tokens) of calls recorded in the last
+        # minute, so budget checks do not scan the whole window
+        self._last_minute = deque()
+        self.alarms = deque(maxlen=100)
+        self.counters = {}
+        self.latency = {}
+        self._last_alarm = {}
+        self._lock = threading.Lock()
+
+    def record(self, record):
+        """
+        Store a finished call and check the token budgets.
+
+        Args:
+            record (LLMCallRecord): Finished call
+        """
+        now = time.time()
+        outcome = 'cache_hit' if record.cache_hit else ('error' if record.error else 'ok')
+        with self._lock:
+            self.records.append(record)
+            while self.records and self.records[0].started < now - self.window:
+                self.records.popleft()
+            if record.total_tokens:
+                self._last_minute.append((now, record.started, record.session_id, record.total_tokens))
+            # A call recorded over a minute ago also started over a minute ago
+            while self._last_minute and self._last_minute[0][0] < now - 60:
+                self._last_minute.popleft()
+
+            for key, amount in (
+                (('calls', record.call_site, outcome), 1),
+                (('tokens', record.call_site, 'prompt'), record.prompt_tokens),
+                (('tokens', record.call_site, 'completion'), record.completion_tokens)
+            ):
+                self.counters[key] = self.counters.get(key, 0) + amount
+            if record.error:
+                key = ('errors', record.call_site, record.error)
+                self.counters[key] = self.counters.get(key, 0) + 1
+            if not record.cache_hit and record.wall_time is not None:
+                histogram = self.latency.get(record.call_site)
+                if histogram is None:
+                    histogram = self.latency[record.call_site] = Histogram()
+                histogram.observe(record.wall_time)
+
+            alarms = self._check_budgets(record, now)
+            self.alarms.extend(alarms)
+            for alarm in alarms:
+                key = ('alarms', alarm['kind'], '')
+                self.counters[key] = self.counters.get(key, 0) + 1
+        for alarm in alarms:
+            logger.warning(
+                "LLM token budget exceeded (%s): %d tokens in the last minute, budget %d, session %s",
+                alarm['kind'], alarm['tokens'], alarm['budget'], alarm['session_id']
+            )
+
+    def _check_budgets(self, record, now):
+        """Return new alarms for budgets exceeded in the last minute. Caller holds the lock."""
+        if not record.total_tokens:
+            return []
+        checks = []
+        if self.session_tokens_per_minute and record.session_id is not None:
+            checks.append(('session_tokens_per_minute', record.session_id, self.session_tokens_per_minute))
+        if self.tokens_per_minute:
+            checks.append(('tokens_per_minute', None, self.tokens_per_minute))
+
+        alarms = []
+        for kind, session_id, budget in checks:
+            tokens = sum(
+                tokens for _, started, call_session_id, tokens in self._last_minute
+                if started >= now - 60 and (session_id is None or call_session_id == session_id)
+            )
+            if tokens > budget and now - self._last_alarm.get((kind, session_id), 0.0) >= ALARM_COOLDOWN:
+                self._last_alarm[(kind, session_id)] = now
+                alarms.append({'kind': kind, 'session_id': session_id, 'tokens': tokens, 'budget': budget, 'time': now})
+        return alarms
+
+    def session_tokens_last_minute(self, session_id):
+        """
+        Count tokens a session used in the last minute.
+
+        Args:
+            session_id (str): Streamlit session id
+
+        Returns:
+            int: Prompt plus completion tokens
+        """
+        cutoff = time.time() - 60
+        with self._lock:
+            return sum(
+                tokens for _, started, call_session_id, tokens in self._last_minute
+                if started >= cutoff and call_session_id == session_id
+            )
+
+    def aggregates(self):
+        """
+        Summarize the calls in the rolling window per call site.
+
+        Returns:
+            dict: Call site -> calls, errors, error classes, cache hit rate, latency and TTFT
+                  percentiles, token totals and tokens per minute
+        """
+        with self._lock:
+            records = list(self.records)
+        span_minutes = max(self.window, 60.0) / 60
+
+        by_site = {}
+        for record in records:
+            by_site.setdefault(record.call_site, []).append(record)
+
+        summary = {}
+        for call_site, site_records in sorted(by_site.items()):
+            live = [r for r in site_records if not r.cache_hit]
+            wall = sorted(r.wall_time for r in live if r.wall_time is not None and not r.error)
+            ttft = sorted(r.ttft for r in live if r.ttft is not None)
+            errors = {}
+            for r in site_records:
+                if r.error:
+                    errors[r.error] = errors.get(r.error, 0) + 1
+            prompt_tokens = sum(r.prompt_tokens for r in site_records)
+            completion_tokens = sum(r.completion_tokens for r in site_records)
+            summary[call_site] = {
+                'calls': len(site_records),
+                'errors': sum(errors.values()),
+                'error_classes': errors,
+                'cache_hit_rate': (len(site_records) - len(live)) / len(site_records),
+                'p50_ms': _percentile(wall, 0.50) * 1000,
+                'p95_ms': _percentile(wall, 0.95) * 1000,
+                'ttft_p50_ms': _percentile(ttft, 0.50) * 1000,
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'max_completion_tokens': max((r.completion_tokens for r in live), default=0),
+                'tokens_per_minute': (prompt_tokens + completion_tokens) / span_minutes
+            }
+        return summary
+
+    def render_prometheus(self):
+        """
+        Render the cumulative counters and latency histograms in the Prometheus text format.
+
+        Returns:
+            str: Exposition text
+        """
+        names = {
+            'calls': (f"{METRIC_PREFIX}_llm_calls_total", "LLM calls by call site and outcome.", 'outcome'),
+            'tokens': (f"{METRIC_PREFIX}_llm_tokens_total", "LLM tokens by call site and kind.", 'kind'),
+            'errors': (f"{METRIC_PREFIX}_llm_errors_total", "Failed LLM calls by call site and error class.", 'error'),
+        }
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            latency = sorted(self.latency.items())
+            for metric, (name, help_text, label) in names.items():
+                lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} counter"])
+                for (kind, call_site, value), count in counters:
+                    if kind == metric:
+                        lines.append(f'{name}{{call_site="{call_site}",{label}="{value}"}} {count}')
+            name = f"{METRIC_PREFIX}_llm_budget_alarms_total"
+            lines.extend([f"# HELP {name} Token budget alarms raised.", f"# TYPE {name} counter"])
+            for (kind, budget, _), count in counters:
+                if kind == 'alarms':
+                    lines.append(f'{name}{{budget="{budget}"}} {count}')
+
+            name = f"{METRIC_PREFIX}_llm_call_seconds"
+            lines.extend([f"# HELP {name} Wall time of uncached LLM calls.", f"# TYPE {name} histogram"])
+            for call_site, histogram in latency:
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{call_site="{call_site}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{call_site="{call_site}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{name}_sum{{call_site="{call_site}"}} {histogram.total}')
+                lines.append(f'{name}_count{{call_site="{call_site}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+# Process-wide telemetry, shared by the app, the JSON API and offline jobs
+TELEMETRY = LLMTelemetry(
+    window=LLM_TELEMETRY_WINDOW,
+    session_tokens_per_minute=LLM_BUDGET_SESSION_TOKENS_PER_MINUTE,
+    tokens_per_minute=LLM_BUDGET_TOKENS_PER_MINUTE
+)
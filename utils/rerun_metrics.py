@@ -0,0 +1,259 @@
+#rerun_metrics.py
+"""
+Per-rerun stage timing for the holistic medicine chatbot.
+
+Every rerun of app.main() gets a RerunTrace with a unique rerun id; each stage
+of the script is timed as a span on it. Finished traces are folded into
+per-stage histograms in a process-wide MetricsRegistry, which renders them in
+the Prometheus text exposition format for a local /metrics endpoint or a
+textfile-collector file.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import streamlit as st
+from utils.config import METRICS_HOST, METRICS_PORT, METRICS_FILE, METRICS_FILE_INTERVAL
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRIC_PREFIX = 'holistic'
+
+class RerunTrace:
+    """Timed spans of one script rerun."""
+    __slots__ = ('rerun_id', 'started', 'spans', 'duration')
+
+    def __init__(self):
+        self.rerun_id = uuid.uuid4().hex[:12]
+        self.started = time.perf_counter()
+        self.spans = []
+        self.duration = None
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Time a stage of the rerun.
+
+        The span is recorded even if the stage exits through an exception,
+        including the control-flow exceptions raised by st.rerun() and st.stop().
+
+        Args:
+            name (str): Stage name
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append((name, time.perf_counter() - start))
+
+class Histogram:
+    """Cumulative Prometheus-style histogram."""
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+    def quantile(self, fraction):
+        """Estimate a quantile as the upper bound of the bucket that contains it."""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float('inf')
+
+class MetricsRegistry:
+    """
+    Thread-safe stage histograms shared by all sessions.
+
+    Args:
+        recent (int): Number of finished traces kept for inspection
+        file_path (str): Optional file the exposition text is written to after reruns
+        file_interval (float): Minimum seconds between file writes
+    """
+
+    def __init__(self, recent=100, file_path=None, file_interval=5.0):
+        self.histograms = {}
+        self.reruns = 0
+        self.failed_reruns = 0
+        self.recent = deque(maxlen=recent)
+        self.file_path = file_path
+        self.file_interval = file_interval
+        self.collectors = []
+        self._last_write = 0.0
+        self._lock = threading.Lock()
+
+    def add_collector(self, collector):
+        """
+        Append another metric source to the exposition text.
+
+        Args:
+            collector (callable): Function returning Prometheus text
+        """
+        self.collectors.append(collector)
+
+    def start_rerun(self):
+        """
+        Start tracing a rerun.
+
+        Returns:
+            RerunTrace: New trace
+        """
+        return RerunTrace()
+
+    def finish_rerun(self, trace, failed=False):
+        """
+        Fold a finished trace into the histograms.
+
+        Args:
+            trace (RerunTrace): Trace to record
+            failed (bool): Whether the rerun ended in an unexpected exception
+        """
+        trace.duration = time.perf_counter() - trace.started
+        with self._lock:
+            for name, seconds in trace.spans + [('total', trace.duration)]:
+                histogram = self.histograms.get(name)
+                if histogram is None:
+                    histogram = self.histograms[name] = Histogram()
+                histogram.observe(seconds)
+            self.reruns += 1
+            self.failed_reruns += failed
+            self.recent.append(trace)
+            write_file = self.file_path and time.monotonic() - self._last_write >= self.file_interval
+            if write_file:
+                self._last_write = time.monotonic()
+        if write_file:
+            self.write_file(self.file_path)
+
+    def summary(self):
+        """
+        Summarize each stage.
+
+        Returns:
+            dict: Stage -> {"count", "mean_ms", "p50_ms", "p99_ms"}, quantiles estimated from the buckets
+        """
+        with self._lock:
+            return {
+                name: {
+                    'count': histogram.count,
+                    'mean_ms': histogram.total / histogram.count * 1000 if histogram.count else 0.0,
+                    'p50_ms': histogram.quantile(0.50) * 1000,
+                    'p99_ms': histogram.quantile(0.99) * 1000
+                }
+                for name, histogram in self.histograms.items()
+            }
+
+    def render_prometheus(self):
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Exposition text
+        """
+        lines = [
+            f"# HELP {METRIC_PREFIX}_rerun_stage_seconds Time spent in each stage of a Streamlit rerun.",
+            f"# TYPE {METRIC_PREFIX}_rerun_stage_seconds histogram"
+        ]
+        with self._lock:
+            for name in sorted(self.histograms):
+                histogram = self.histograms[name]
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{METRIC_PREFIX}_rerun_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{METRIC_PREFIX}_rerun_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{METRIC_PREFIX}_rerun_stage_seconds_sum{{stage="{name}"}} {histogram.total}')
+                lines.append(f'{METRIC_PREFIX}_rerun_stage_seconds_count{{stage="{name}"}} {histogram.count}')
+            lines.extend([
+                f"# HELP {METRIC_PREFIX}_reruns_total Streamlit reruns completed.",
+                f"# TYPE {METRIC_PREFIX}_reruns_total counter",
+                f"{METRIC_PREFIX}_reruns_total {self.reruns}",
+                f"# HELP {METRIC_PREFIX}_rerun_failures_total Streamlit reruns that raised an unexpected exception.",
+                f"# TYPE {METRIC_PREFIX}_rerun_failures_total counter",
+                f"{METRIC_PREFIX}_rerun_failures_total {self.failed_reruns}"
+            ])
+        return "\n".join(lines) + "\n" + "".join(collector() for collector in self.collectors)
+
+    def write_file(self, path):
+        """
+        Atomically write the exposition text to a file (e.g. for a textfile collector).
+
+        Args:
+            path (str): Destination path
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w') as file:
+            file.write(self.render_prometheus())
+        os.replace(temp_path, path)
+
+def start_metrics_server(registry, host, port):
+    """
+    Serve GET /metrics from a daemon thread.
+
+    Args:
+        registry (MetricsRegistry): Registry to expose
+        host (str): Interface to bind
+        port (int): Port to listen on
+
+    Returns:
+        ThreadingHTTPServer: Running server
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
+
+@st.cache_resource
+def get_metrics_registry():
+    """
+    Get the rerun metrics registry shared by all sessions, starting the configured exporters.
+    
+    Returns:
+        MetricsRegistry: Process-wide registry
+    """
+    from utils.llm_telemetry import TELEMETRY
+    
+    registry = MetricsRegistry(file_path=METRICS_FILE or None, file_interval=METRICS_FILE_INTERVAL)
+    registry.add_collector(TELEMETRY.render_prometheus)
+    if METRICS_PORT:
+        try:
+            start_metrics_server(registry, METRICS_HOST, METRICS_PORT)
+        except OSError as e:
+            # Another worker already owns the port
+            st.warning(f"Metrics endpoint not started on {METRICS_HOST}:{METRICS_PORT}: {str(e)}")
+    return registry
@@ -5,6 +5,10 @@ Streamlit session state management for the holistic medicine chatbot.
 import streamlit as st
 import re
 from utils.symptom_analyzer import symptom_preprocess
+from utils.kb_manager import load_autocomplete_index, load_symptom_index, load_fuzzy_matcher, load_vector_scorer
+from utils.incremental_scorer import IncrementalScorer
+from utils.conversation_memory import ConversationMemory
+from utils.config import ANALYSIS_TOP_K, CHAT_MEMORY_TOKENS, CHAT_SUMMARY_TOKENS
 
 def initialize_session_state():
     """
@@ -12,6 +16,8 @@ def initialize_session_state():
     """
     if 'selected_symptoms' not in st.session_state:
         st.session_state.selected_symptoms = []
+    if 'selected_symptom_keys' not in st.session_state:
+        st.session_state.selected_symptom_keys = []
     if 'detected_diseases' not in st.session_state:
         st.session_state.detected_diseases = {}
     if 'selected_disease' not in st.session_state:
@@ -20,6 +26,8 @@ def initialize_session_state():
         st.session_state.treatment_view = None
     if 'chat_history' not in st.session_state:
         st.session_state.chat_history = []
+    if 'chat_memory' not in st.session_state:
+        st.session_state.chat_memory = ConversationMemory(CHAT_MEMORY_TOKENS, CHAT_SUMMARY_TOKENS)
     if 'llm_mode' not in st.session_state:
         st.session_state.llm_mode = False
     if 'symptom_input' not in st.session_state:
@@ -32,38 +40,103 @@ def set_symptom_input(value):
     """Update symptom input value in session state."""
     st.session_state.symptom_input = value
 
+def _selected_symptom_keys():
+    """Get the vocabulary keys of the selected symptoms, rebuilding them if they are out of step."""
+    keys = st.session_state.setdefault('selected_symptom_keys', [])
+    vocabulary = load_symptom_index().vocabulary
+    # Ids are only comparable within one vocabulary, which a KB reload may replace
+    if len(keys) != len(st.session_state.selected_symptoms) or st.session_state.get('selected_symptom_vocabulary') is not vocabulary:
+        keys[:] = [vocabulary.key(symptom) for symptom in st.session_state.selected_symptoms]
+        st.session_state.selected_symptom_vocabulary = vocabulary
+    return keys
+
+def get_symptom_scorer():
+    """
+    Get the session's incremental scorer, rebuilding it if the symptom index changed or it is out of step.
+    
+    With SCORING_BACKEND set to "vector", the scorer matches symptoms through
+    the sparse-matrix backend.
+    
+    Returns:
+        IncrementalScorer: Scorer holding the selected symptoms
+    """
+    symptom_index = load_symptom_index()
+    vector_scorer = load_vector_scorer()
+    scorer = st.session_state.get('symptom_scorer')
+    if (scorer is None or scorer.symptom_index is not symptom_index or scorer.vector_scorer is not vector_scorer
+            or len(scorer) != len(st.session_state.selected_symptoms)):
+        scorer = IncrementalScorer(symptom_index, load_fuzzy_matcher(), vector_scorer)
+        for symptom in st.session_state.selected_symptoms:
+            scorer.add(symptom)
+        st.session_state.symptom_scorer = scorer
+    return scorer
+
+def update_detected_diseases():
+    """Refresh the detected diseases from the live top-k of the incremental scorer."""
+    st.session_state.detected_diseases = get_symptom_scorer().top(ANALYSIS_TOP_K or None)
+
+def add_symptoms(symptoms):
+    """
+    Add symptoms to the selected list, skipping any that normalize to an already selected symptom.
+    
+    Args:
+        symptoms (list): Symptoms to add
+        
+    Returns:
+        list: Symptoms that were added
+    """
+    vocabulary = load_symptom_index().vocabulary
+    keys = _selected_symptom_keys()
+    scorer = get_symptom_scorer()
+    added = []
+    for symptom in symptoms:
+        if not symptom:
+            continue
+        key = vocabulary.key(symptom)
+        if key not in keys:
+            keys.append(key)
+            st.session_state.selected_symptoms.append(symptom)
+            scorer.add(symptom)
+            added.append(symptom)
+    if added:
+        update_detected_diseases()
+    return added
+
 def add_symptom():
     """Add current symptom input to selected symptoms list."""
     if st.session_state.symptom_input:
         # Process potential compound symptoms
-        new_symptoms = symptom_preprocess(st.session_state.symptom_input)
-        
-        for symptom in new_symptoms:
-            if symptom and symptom not in st.session_state.selected_symptoms:
-                st.session_state.selected_symptoms.append(symptom)
+        add_symptoms(symptom_preprocess(st.session_state.symptom_input))
         
         st.session_state.symptom_input = ""
 
 def add_suggested_symptom():
     """Add the selected suggestion to symptoms list."""
-    if st.session_state.selected_suggestion and st.session_state.selected_suggestion not in st.session_state.selected_symptoms:
-        st.session_state.selected_symptoms.append(st.session_state.selected_suggestion)
+    if st.session_state.selected_suggestion and add_symptoms([st.session_state.selected_suggestion]):
+        load_autocomplete_index().record_selection(st.session_state.selected_suggestion)
         st.session_state.symptom_input = ""
         st.session_state.selected_suggestion = ""
 
 def add_common_symptom(symptom):
     """Add a common predefined symptom to the list."""
-    if symptom not in st.session_state.selected_symptoms:
-        st.session_state.selected_symptoms.append(symptom)
+    add_symptoms([symptom])
 
 def remove_symptom(symptom):
     """Remove a symptom from the selected list."""
     if symptom in st.session_state.selected_symptoms:
-        st.session_state.selected_symptoms.remove(symptom)
+        keys = _selected_symptom_keys()
+        scorer = get_symptom_scorer()
+        position = st.session_state.selected_symptoms.index(symptom)
+        del st.session_state.selected_symptoms[position]
+        del keys[position]
+        scorer.remove(symptom)
+        update_detected_diseases()
 
 def clear_symptoms():
     """Clear all selected symptoms and related state."""
     st.session_state.selected_symptoms = []
+    st.session_state.selected_symptom_keys = []
+    st.session_state.symptom_scorer = None
     st.session_state.detected_diseases = {}
     st.session_state.selected_disease = None
 
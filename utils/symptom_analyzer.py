@@ -2,97 +2,118 @@
 """
 Disease prediction and symptom analysis for the holistic medicine chatbot.
 """
-import re
+from utils.symptom_index import build_symptom_index
+from utils.symptom_vocabulary import tokenize_symptoms
 
-def find_diseases(kb_data, input_symptoms):
+def match_symptom(symptom_index, symptom, fuzzy_matcher=None):
+    """
+    Find the diseases matched by one normalized user symptom.
+    
+    Args:
+        symptom_index (SymptomIndex): Index over the knowledge base
+        symptom (str): Lower-cased, stripped user symptom
+        fuzzy_matcher (FuzzyMatcher): Optional matcher used when the symptom matches nothing
+        
+    Returns:
+        set: Ids of the matching diseases
+    """
+    matched = symptom_index.match(symptom)
+    if not matched and fuzzy_matcher is not None:
+        corrected = fuzzy_matcher.correct(symptom)
+        if corrected:
+            matched = symptom_index.match(corrected)
+    return matched
+
+def disease_result(symptom_index, disease_id, score):
+    """
+    Build the result entry of one disease.
+    
+    Args:
+        symptom_index (SymptomIndex): Index over the knowledge base
+        disease_id (int): Position of the disease in the knowledge base
+        score (float): Match percentage
+        
+    Returns:
+        dict: Score, category and full symptom string
+    """
+    return {
+        'score': score,
+        'category': symptom_index.categories[disease_id],
+        'full_symptoms': symptom_index.full_symptoms[disease_id]
+    }
+
+def find_diseases(kb_data, input_symptoms, symptom_index=None, fuzzy_matcher=None, vector_scorer=None):
     """
     Find diseases based on input symptoms.
     
     Args:
         kb_data (list): List of disease entries
         input_symptoms (list): List of symptoms
+        symptom_index (SymptomIndex): Prebuilt index over kb_data; built on the fly if omitted
+        fuzzy_matcher (FuzzyMatcher): Optional matcher used to resolve misspelled symptoms that match nothing
+        vector_scorer (VectorScorer): Optional sparse-matrix backend to score with instead of the index
         
     Returns:
         dict: Dictionary of potential diseases with match scores
     """
+    if vector_scorer is not None:
+        return vector_scorer.score(input_symptoms, fuzzy_matcher)
+    
+    if symptom_index is None:
+        symptom_index = build_symptom_index(kb_data)
+    
     input_symptoms = [s.lower().strip() for s in input_symptoms]
-    potential_diseases = {}
+    if not input_symptoms:  # Avoid division by zero
+        return {}
     
-    for disease in kb_data:
-        disease_name = disease['Disease']
-        disease_symptoms = disease['Symptoms'].lower()
-        
-        # Process disease symptoms to individual terms for better matching
-        disease_symptom_list = []
-        for symptom in re.split(r'[,;]', disease_symptoms):
-            disease_symptom_list.append(symptom.strip())
-        
-        # Count how many of the input symptoms match with this disease
-        match_count = 0
-        for user_symptom in input_symptoms:
-            # Check for exact matches first
-            if user_symptom in disease_symptoms:
-                match_count += 1
-                continue
-                
-            # Check for partial matches within disease symptoms
-            for disease_symptom in disease_symptom_list:
-                if user_symptom in disease_symptom or disease_symptom in user_symptom:
-                    match_count += 1
-                    break
-                    
-        # Calculate match score (percentage of input symptoms matched)
-        if input_symptoms:  # Avoid division by zero
-            match_percentage = (match_count / len(input_symptoms)) * 100
-            if match_percentage > 0:
-                potential_diseases[disease_name] = {
-                    'score': match_percentage,
-                    'category': disease['Category'],
-                    'full_symptoms': disease['Symptoms']
-                }
+    # Count how many of the input symptoms match with each disease,
+    # touching only the diseases that share a term with the query
+    match_counts = {}
+    for user_symptom in input_symptoms:
+        for disease_id in match_symptom(symptom_index, user_symptom, fuzzy_matcher):
+            match_counts[disease_id] = match_counts.get(disease_id, 0) + 1
+    
+    # Calculate match score (percentage of input symptoms matched), in KB order
+    potential_diseases = {}
+    for disease_id in sorted(match_counts):
+        match_percentage = (match_counts[disease_id] / len(input_symptoms)) * 100
+        potential_diseases[symptom_index.names[disease_id]] = disease_result(symptom_index, disease_id, match_percentage)
     
     # Sort by match score (highest first)
     return dict(sorted(potential_diseases.items(), key=lambda item: item[1]['score'], reverse=True))
 
 
+def find_diseases_batch(kb_data, symptom_sets, vector_scorer=None, fuzzy_matcher=None, top_k=None):
+    """
+    Find diseases for many symptom sets at once using sparse matrix products.
+    
+    Args:
+        kb_data (list): List of disease entries
+        symptom_sets (list): List of symptom lists
+        vector_scorer (VectorScorer): Prebuilt scorer over kb_data; built on the fly if omitted
+        fuzzy_matcher (FuzzyMatcher): Optional matcher used to resolve misspelled symptoms
+        top_k (int): Keep only the best top_k diseases per set; all if omitted
+        
+    Returns:
+        list: One find_diseases result dict per symptom set
+    """
+    if vector_scorer is None:
+        from utils.vector_scorer import build_vector_scorer
+        vector_scorer = build_vector_scorer(build_symptom_index(kb_data))
+    return vector_scorer.score_batch(symptom_sets, fuzzy_matcher, top_k)
+
+
 def symptom_preprocess(symptom_text):
     """
     Preprocess symptom text to handle compound symptom entries.
     
+    Commas, semicolons, slashes and run-together capitalized words
+    (e.g. "CoughFeverSore throat") all separate symptoms.
+    
     Args:
         symptom_text (str): Raw symptom text from user
         
     Returns:
         list: List of individual symptoms
     """
-    # Handle common separators
-    if ',' in symptom_text:
-        return [s.strip() for s in symptom_text.split(',')]
-    elif ';' in symptom_text:
-        return [s.strip() for s in symptom_text.split(';')]
-    elif '/' in symptom_text:
-        return [s.strip() for s in symptom_text.split('/')]
-    
-    # Check for capitalization patterns that might indicate separate symptoms
-    # e.g. "CoughFeverSore throat" -> ["Cough", "Fever", "Sore throat"]
-    patterns = re.findall(r'[A-Z][a-z]+', symptom_text)
-    if len(patterns) > 1:
-        # Extract capitalized words as separate symptoms
-        symptoms = []
-        current_pos = 0
-        for pattern in patterns:
-            pattern_pos = symptom_text.find(pattern, current_pos)
-            if pattern_pos > current_pos and current_pos > 0:
-                # There's text between the last pattern and this one
-                symptoms.append(symptom_text[current_pos:pattern_pos].strip())
-            symptoms.append(pattern)
-            current_pos = pattern_pos + len(pattern)
-        
-        # Add any remaining text
-        if current_pos < len(symptom_text):
-            symptoms.append(symptom_text[current_pos:].strip())
-        
-        return [s for s in symptoms if s]
-    
-    # If no clear separation, return as single symptom
-    return [symptom_text]
\ No newline at end of file
+    return tokenize_symptoms(symptom_text)
\ No newline at end of file
@@ -0,0 +1,213 @@
+#symptom_extractor.py
+"""
+Local symptom extraction from free text for the holistic medicine chatbot.
+
+An Aho-Corasick automaton over words is built from the symptom vocabulary: the
+normalization key of every KB symptom plus every synonym that maps to one. A
+description is normalized the same way as symptoms and scanned one clause at
+a time, so no phrase spans punctuation, finding every vocabulary phrase it
+contains; overlapping hits are resolved
+leftmost-longest, and symptoms after a negation ("no fever", "without any
+cough") are set aside. The share of the description's content words that the
+hits cover is the confidence, so a caller can fall back to the LLM only for
+descriptions the vocabulary does not account for.
+"""
+import re
+
+from utils.symptom_vocabulary import singularize
+
+# Words that negate the symptoms after them, up to the end of the clause
+NEGATION_WORDS = frozenset({'no', 'not', 'without', 'never', 'deny', 'nor', 'none'})
+
+# Words that end a clause, and with it a negation's scope
+CLAUSE_WORDS = frozenset({'but', 'however', 'although', 'though', 'yet', 'except'})
+
+# Words that carry no symptom information, left out of the confidence
+FILLER_WORDS = frozenset({
+    'a', 'about', 'after', 'ago', 'all', 'also', 'always', 'am', 'an', 'and', 'any', 'are', 'around', 'as',
+    'at', 'bad', 'badly', 'be', 'been', 'before', 'being', 'bit', 'both', 'by', 'can', 'constant', 'constantly',
+    'could', 'couple', 'day', 'did', 'do', 'does', 'don', 'each', 'evening', 'ever', 'every', 'extremely',
+    'feel', 'feeling', 'felt', 'few', 'for', 'from', 'get', 'getting', 'got', 'had', 'has', 'have', 'having',
+    'he', 'her', 'his', 'hour', 'i', 'im', 'in', 'is', 'it', 'ive', 'just', 'keep', 'kind', 'kinda', 'last',
+    'lately', 'like', 'little', 'll', 'lot', 'm', 'me', 'mild', 'mildly', 'minute', 'month', 'morning', 'much',
+    'my', 'now', 'of', 'off', 'often', 'on', 'or', 'past', 'pretty', 'quite', 're', 'really', 'recently', 's',
+    'says', 'she', 'since', 'slight', 'slightly', 'so', 'some', 'sometime', 'sometimes', 'started', 'starting',
+    'still', 'suffer', 'suffering', 'super', 't', 'terrible', 'than', 'that', 'the', 'them', 'then', 'there',
+    'these', 'they', 'think', 'this', 'time', 'to', 'today', 'tonight', 'too', 'two', 'up', 'us', 've', 'very',
+    'was', 'we', 'week', 'were', 'what', 'when', 'while', 'with', 'year', 'yesterday', 'you', 'your'
+})
+
+_CLAUSE_BREAK = re.compile(r'[.!?;,:()\n]+')
+_NON_WORD = re.compile(r'[\W_]+')
+
+def _normalize_words(text):
+    """Split text into the normalized words symptom keys are made of."""
+    return [singularize(word) for word in _NON_WORD.sub(' ', text.casefold()).split()]
+
+class SymptomExtraction:
+    """
+    Result of extracting symptoms from one description.
+
+    Attributes:
+        symptoms (list): KB symptom terms found, in text order, without duplicates
+        negated (list): KB symptom terms found in a negated clause
+        confidence (float): Share of the content words covered by symptoms, 0 to 1
+        uncovered (list): Content words no symptom accounted for
+    """
+    __slots__ = ('symptoms', 'negated', 'confidence', 'uncovered')
+
+    def __init__(self, symptoms, negated, confidence, uncovered):
+        self.symptoms = symptoms
+        self.negated = negated
+        self.confidence = confidence
+        self.uncovered = uncovered
+
+    def __repr__(self):
+        return f"SymptomExtraction({self.symptoms!r}, confidence={self.confidence:.2f})"
+
+class SymptomExtractor:
+    """
+    Word-level Aho-Corasick automaton over a symptom vocabulary.
+
+    Args:
+        vocabulary (SymptomVocabulary): Vocabulary of the knowledge base
+    """
+    __slots__ = ('vocabulary', 'goto', 'fail', 'outputs')
+
+    def __init__(self, vocabulary):
+        self.vocabulary = vocabulary
+        # Node 0 is the root; goto[node] maps a word to the next node
+        self.goto = [{}]
+        # Patterns ending at each node, including via failure links: (length in words, symptom id)
+        self.outputs = [()]
+
+        # Keys whose terms an edit of the knowledge base retired have no surface forms
+        patterns = {
+            key: symptom_id for symptom_id, key in enumerate(vocabulary.keys) if vocabulary.surface_forms[symptom_id]
+        }
+        for alias, canonical in vocabulary.aliases.items():
+            symptom_id = vocabulary.ids.get(canonical)
+            if symptom_id is not None and vocabulary.surface_forms[symptom_id]:
+                patterns.setdefault(' '.join(_normalize_words(alias)), symptom_id)
+        for phrase, symptom_id in patterns.items():
+            words = phrase.split()
+            if words:
+                self._insert(words, symptom_id)
+        self.fail = self._link()
+
+    def _insert(self, words, symptom_id):
+        node = 0
+        for word in words:
+            child = self.goto[node].get(word)
+            if child is None:
+                child = len(self.goto)
+                self.goto[node][word] = child
+                self.goto.append({})
+                self.outputs.append(())
+            node = child
+        self.outputs[node] = ((len(words), symptom_id),)
+
+    def _link(self):
+        """Compute failure links breadth first and merge outputs along them."""
+        fail = [0] * len(self.goto)
+        # Children of the root fail to the root
+        queue = list(self.goto[0].values())
+        for node in queue:
+            for word, child in self.goto[node].items():
+                state = fail[node]
+                while state and word not in self.goto[state]:
+                    state = fail[state]
+                fail[child] = self.goto[state].get(word, 0)
+                self.outputs[child] = self.outputs[child] + self.outputs[fail[child]]
+                queue.append(child)
+        return fail
+
+    def find(self, words):
+        """
+        Find every vocabulary phrase in a word sequence.
+
+        Args:
+            words (list): Normalized words
+
+        Returns:
+            list: (start, end, symptom id) word spans, overlapping hits included
+        """
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        hits = []
+        node = 0
+        for position, word in enumerate(words):
+            while node and word not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(word, 0)
+            for length, symptom_id in outputs[node]:
+                hits.append((position + 1 - length, position + 1, symptom_id))
+        return hits
+
+    def extract(self, text):
+        """
+        Extract known symptoms from a free-text description.
+
+        Args:
+            text (str): User's description, e.g. "I have a headache and fever"
+
+        Returns:
+            SymptomExtraction: Symptoms found and how much of the text they explain
+        """
+        words = []
+        fillers = []
+        negated_at = []
+        hits = []
+        for clause in _CLAUSE_BREAK.split(text):
+            negating = False
+            clause_start = len(words)
+            for raw in _NON_WORD.sub(' ', clause.casefold()).split():
+                if raw in CLAUSE_WORDS:
+                    negating = False
+                elif raw in NEGATION_WORDS:
+                    negating = True
+                word = singularize(raw)
+                words.append(word)
+                fillers.append(raw in FILLER_WORDS or word in FILLER_WORDS or raw in NEGATION_WORDS
+                               or raw in CLAUSE_WORDS or raw.isdigit())
+                negated_at.append(negating)
+            hits.extend(
+                (clause_start + start, clause_start + end, symptom_id)
+                for start, end, symptom_id in self.find(words[clause_start:])
+            )
+
+        # Leftmost-longest hits that do not overlap
+        covered = [False] * len(words)
+        symptoms = []
+        negated = []
+        # Deduplicated per list, so a symptom denied first and reported later is kept
+        seen_symptoms = set()
+        seen_negated = set()
+        for start, end, symptom_id in sorted(hits, key=lambda hit: (hit[0], hit[0] - hit[1])):
+            if any(covered[start:end]):
+                continue
+            covered[start:end] = [True] * (end - start)
+            found, seen = (negated, seen_negated) if negated_at[start] else (symptoms, seen_symptoms)
+            if symptom_id in seen:
+                continue
+            seen.add(symptom_id)
+            found.append(self.vocabulary.surface_forms[symptom_id][0])
+
+        content = [
+            (word, is_covered) for word, is_covered, filler in zip(words, covered, fillers)
+            if is_covered or not filler
+        ]
+        uncovered = [word for word, is_covered in content if not is_covered]
+        confidence = (len(content) - len(uncovered)) / len(content) if content else 0.0
+        return SymptomExtraction(symptoms, negated, confidence, uncovered)
+
+def build_symptom_extractor(vocabulary):
+    """
+    Build the extractor for a knowledge base's symptom vocabulary.
+
+    Args:
+        vocabulary (SymptomVocabulary): Vocabulary of the knowledge base
+
+    Returns:
+        SymptomExtractor: Extractor over the vocabulary and its synonyms
+    """
+    return SymptomExtractor(vocabulary)
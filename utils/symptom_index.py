@@ -0,0 +1,338 @@
+#symptom_index.py
+"""
+Inverted symptom index used to score diseases without scanning the whole knowledge base.
+"""
+import re
+from utils.symptom_vocabulary import build_symptom_vocabulary
+
+# Separators used between symptoms in the knowledge base 'Symptoms' strings
+SYMPTOM_SEPARATORS = re.compile(r'[,;]')
+
+# Length of the n-grams used to find KB terms that contain a user symptom
+NGRAM_SIZE = 3
+
+# Share of retired terms at which an edited index is rebuilt from scratch instead of updated
+TOMBSTONE_COMPACT_RATIO = 0.5
+
+def split_symptom_terms(symptoms):
+    """
+    Split a lower-cased 'Symptoms' string into individual symptom terms.
+
+    Args:
+        symptoms (str): Lower-cased symptom string from a KB entry
+
+    Returns:
+        list: List of stripped symptom terms
+    """
+    return [s.strip() for s in SYMPTOM_SEPARATORS.split(symptoms)]
+
+def _ngrams(text, size=NGRAM_SIZE):
+    """Return the set of character n-grams of a string."""
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+class SymptomIndex:
+    """
+    Immutable inverted index from normalized symptom terms to diseases.
+
+    Diseases are identified by their position in the knowledge base. Every KB
+    symptom term has a posting list of the diseases that mention it, and every
+    disease keeps the tuple of term ids it was built from. User symptoms that
+    normalize to a vocabulary id also match the terms of that id exactly, and
+    those term ids are memoized per id.
+
+    Term ids are stable across update_symptom_index: new terms are appended,
+    and terms no disease uses any more stay in place with empty postings
+    (tombstones) until the index is compacted by a full build.
+    """
+    __slots__ = (
+        'names', 'categories', 'full_symptoms', 'lowered_symptoms',
+        'disease_terms', 'terms', 'term_ids', 'postings', 'tombstones', 'ngram_terms',
+        'max_term_length', 'vocabulary', '_resolved_terms'
+    )
+
+    def __init__(self, names, categories, full_symptoms, lowered_symptoms,
+                 disease_terms, terms, postings, vocabulary=None, previous=None):
+        self.names = names
+        self.categories = categories
+        self.full_symptoms = full_symptoms
+        self.lowered_symptoms = lowered_symptoms
+        self.disease_terms = disease_terms
+        self.terms = terms
+        self.postings = postings
+        self.tombstones = frozenset(term_id for term_id, diseases in enumerate(postings) if not diseases)
+
+        changes = None if previous is None else self.term_changes(previous)
+        if changes == ((), ()):
+            # Same live terms: share the term-level structures, including memoized matches
+            self.term_ids = previous.term_ids
+            self.max_term_length = previous.max_term_length
+            self.vocabulary = previous.vocabulary
+            self.ngram_terms = previous.ngram_terms
+            self._resolved_terms = previous._resolved_terms
+            return
+
+        if changes is not None:
+            # Terms were appended or retired: extend the previous structures with the delta
+            added, removed = changes
+            new_ids = range(len(previous.terms), len(terms))
+            self.term_ids = dict(previous.term_ids)
+            self.term_ids.update((terms[term_id], term_id) for term_id in new_ids)
+            self.max_term_length = max([previous.max_term_length] + [len(terms[term_id]) for term_id in new_ids])
+            self.vocabulary = previous.vocabulary.updated(added, removed)
+            stale = {self.vocabulary.lookup(term) for term in added + removed}
+            self._resolved_terms = {
+                symptom_id: matches for symptom_id, matches in previous._resolved_terms.items()
+                if symptom_id not in stale
+            }
+            new_grams = {}
+            for term_id in new_ids:
+                for gram in _ngrams(terms[term_id]):
+                    new_grams.setdefault(gram, []).append(term_id)
+            self.ngram_terms = dict(previous.ngram_terms)
+            for gram, ids in new_grams.items():
+                self.ngram_terms[gram] = self.ngram_terms.get(gram, ()) + tuple(ids)
+            return
+
+        self.term_ids = {term: term_id for term_id, term in enumerate(terms)}
+        self.max_term_length = max((len(term) for term in terms), default=0)
+        self.vocabulary = build_symptom_vocabulary(self.live_terms()) if vocabulary is None else vocabulary
+        # Vocabulary id -> matching term ids; bounded by the vocabulary size
+        self._resolved_terms = {}
+
+        ngram_terms = {}
+        for term_id, term in enumerate(terms):
+            for gram in _ngrams(term):
+                ngram_terms.setdefault(gram, []).append(term_id)
+        self.ngram_terms = {gram: tuple(ids) for gram, ids in ngram_terms.items()}
+
+    def __len__(self):
+        return len(self.names)
+
+    def live_terms(self):
+        """Return the terms at least one disease uses, in id order."""
+        if not self.tombstones:
+            return self.terms
+        return tuple(term for term_id, term in enumerate(self.terms) if term_id not in self.tombstones)
+
+    def term_changes(self, previous):
+        """
+        Compare the live terms with those of an index this one was updated from.
+
+        Args:
+            previous (SymptomIndex): Earlier index
+
+        Returns:
+            tuple: (added, removed) term tuples, or None if the term ids are not a
+                continuation of the previous index's
+        """
+        old = len(previous.terms)
+        if self.terms is not previous.terms and (len(self.terms) < old or self.terms[:old] != previous.terms):
+            return None
+        added = tuple(
+            term for term_id, term in enumerate(self.terms[old:], old) if term_id not in self.tombstones
+        ) + tuple(self.terms[term_id] for term_id in sorted(previous.tombstones - self.tombstones))
+        removed = tuple(self.terms[term_id] for term_id in sorted(self.tombstones - previous.tombstones) if term_id < old)
+        return added, removed
+
+    def matching_terms(self, symptom):
+        """
+        Find the KB terms that contain, or are contained in, a user symptom.
+
+        Substring matching applies to the user's own string only. A symptom in
+        the vocabulary also matches every KB term that normalizes to the same
+        id, exactly, so "Headaches", "headache" and synonyms resolve to the
+        same terms without their spellings matching anything else.
+
+        Args:
+            symptom (str): Lower-cased, stripped user symptom
+
+        Returns:
+            frozenset: Ids of the matching terms
+        """
+        matches = self._substring_terms(symptom)
+        symptom_id = self.vocabulary.lookup(symptom)
+        if symptom_id is None:
+            return frozenset(matches)
+
+        exact = self._resolved_terms.get(symptom_id)
+        if exact is None:
+            exact = self._resolved_terms[symptom_id] = frozenset(
+                self.term_ids[form] for form in self.vocabulary.surface_forms[symptom_id]
+                if form in self.term_ids
+            )
+        return exact.union(matches)
+
+    def _substring_terms(self, symptom):
+        """Return the ids of the terms that contain, or are contained in, a symptom string."""
+        matches = set()
+
+        # Terms contained in the symptom: look up every substring of it
+        length = len(symptom)
+        for start in range(length + 1):
+            stop_limit = min(length, start + self.max_term_length)
+            for stop in range(start, stop_limit + 1):
+                term_id = self.term_ids.get(symptom[start:stop])
+                if term_id is not None:
+                    matches.add(term_id)
+
+        # Terms containing the symptom: intersect n-gram posting lists
+        if len(symptom) >= NGRAM_SIZE:
+            candidates = None
+            for gram in sorted(_ngrams(symptom), key=lambda g: len(self.ngram_terms.get(g, ()))):
+                term_ids = self.ngram_terms.get(gram)
+                if not term_ids:
+                    return matches
+                candidates = set(term_ids) if candidates is None else candidates.intersection(term_ids)
+                if not candidates:
+                    return matches
+        else:
+            # Very short input: too few n-grams, check the vocabulary directly
+            candidates = range(len(self.terms))
+
+        for term_id in candidates:
+            if symptom in self.terms[term_id]:
+                matches.add(term_id)
+        return matches
+
+    def match(self, symptom):
+        """
+        Find the diseases matched by a single user symptom.
+
+        A disease matches when the symptom appears in its symptom string or
+        when the symptom and one of the disease's terms contain each other.
+
+        Args:
+            symptom (str): Lower-cased, stripped user symptom
+
+        Returns:
+            set: Ids of the matching diseases
+        """
+        if not symptom:
+            return set(range(len(self.names)))
+
+        diseases = set()
+        for term_id in self.matching_terms(symptom):
+            diseases.update(self.postings[term_id])
+
+        if SYMPTOM_SEPARATORS.search(symptom):
+            # The symptom may span several KB terms, which only the full strings can match
+            diseases.update(
+                disease_id for disease_id, lowered in enumerate(self.lowered_symptoms)
+                if symptom in lowered
+            )
+        return diseases
+
+def build_symptom_index(kb_data):
+    """
+    Build the inverted symptom index for a knowledge base.
+
+    Terms are split exactly like in create_symptom_mapping, so the index
+    covers the same symptom vocabulary.
+
+    Args:
+        kb_data (list): List of disease entries
+
+    Returns:
+        SymptomIndex: Index over the knowledge base
+    """
+    names = []
+    categories = []
+    full_symptoms = []
+    lowered_symptoms = []
+    disease_terms = []
+    term_ids = {}
+    postings = []
+
+    for disease_id, entry in enumerate(kb_data):
+        names.append(entry['Disease'])
+        categories.append(entry['Category'])
+        full_symptoms.append(entry['Symptoms'])
+        lowered = entry['Symptoms'].lower()
+        lowered_symptoms.append(lowered)
+
+        ids = []
+        for term in split_symptom_terms(lowered):
+            term_id = term_ids.get(term)
+            if term_id is None:
+                term_id = term_ids[term] = len(postings)
+                postings.append([])
+            if term_id not in ids:
+                ids.append(term_id)
+                postings[term_id].append(disease_id)
+        disease_terms.append(tuple(ids))
+
+    return SymptomIndex(
+        tuple(names),
+        tuple(categories),
+        tuple(full_symptoms),
+        tuple(lowered_symptoms),
+        tuple(disease_terms),
+        tuple(term_ids),
+        tuple(tuple(p) for p in postings)
+    )
+
+def update_symptom_index(previous, kb_data):
+    """
+    Rebuild the index for an edited knowledge base, redoing only what the edit touched.
+
+    Diseases whose symptom string is unchanged keep their term ids without being
+    split again. Existing terms keep their ids; new terms are appended with
+    their n-grams, and terms no longer used become tombstones, so the term-level
+    structures of the previous index are extended rather than rebuilt. The
+    index is only built from scratch once tombstones reach
+    TOMBSTONE_COMPACT_RATIO of the terms.
+
+    Args:
+        previous (SymptomIndex): Index over the previous version of the knowledge base
+        kb_data (list): List of disease entries
+
+    Returns:
+        tuple: (SymptomIndex, rebuilt) where rebuilt is "none", "postings" (same
+            live terms), "terms" (terms added or retired) or "full"
+    """
+    names = tuple(entry['Disease'] for entry in kb_data)
+    categories = tuple(entry['Category'] for entry in kb_data)
+    full_symptoms = tuple(entry['Symptoms'] for entry in kb_data)
+    if names == previous.names and categories == previous.categories and full_symptoms == previous.full_symptoms:
+        return previous, 'none'
+
+    known_terms = dict(zip(previous.full_symptoms, previous.disease_terms))
+    new_terms = {}
+    lowered_symptoms = []
+    disease_terms = []
+    postings = [[] for _ in previous.terms]
+    for disease_id, symptoms in enumerate(full_symptoms):
+        lowered = symptoms.lower()
+        lowered_symptoms.append(lowered)
+        ids = known_terms.get(symptoms)
+        if ids is None:
+            ids = []
+            for term in split_symptom_terms(lowered):
+                term_id = previous.term_ids.get(term)
+                if term_id is None:
+                    term_id = new_terms.get(term)
+                    if term_id is None:
+                        term_id = new_terms[term] = len(postings)
+                        postings.append([])
+                if term_id not in ids:
+                    ids.append(term_id)
+            ids = tuple(ids)
+        disease_terms.append(ids)
+        for term_id in ids:
+            postings[term_id].append(disease_id)
+
+    retired = sum(1 for diseases in postings if not diseases)
+    if retired and retired >= TOMBSTONE_COMPACT_RATIO * len(postings):
+        return build_symptom_index(kb_data), 'full'
+
+    index = SymptomIndex(
+        names,
+        categories,
+        full_symptoms,
+        tuple(lowered_symptoms),
+        tuple(disease_terms),
+        previous.terms + tuple(new_terms) if new_terms else previous.terms,
+        tuple(tuple(p) for p in postings),
+        previous=previous
+    )
+    return index, 'terms' if new_terms or index.tombstones != previous.tombstones else 'postings'
@@ -0,0 +1,225 @@
+#symptom_vocabulary.py
+"""
+Canonical symptom vocabulary for the holistic medicine chatbot.
+
+Every symptom string, from the knowledge base or typed by a user, goes through
+one normalization pipeline: case folding, punctuation and whitespace cleanup,
+plural stripping and a synonym table. KB symptoms that normalize to the same
+key share one compact integer id, so matching, dedupe and caching can compare
+small integers instead of scanning strings.
+"""
+import re
+
+# Splits compound user input on commas, semicolons and slashes, and between
+# run-together capitalized words ("CoughFeverSore throat")
+SYMPTOM_TOKENIZER = re.compile(r'\s*[,;/]\s*|(?<=[a-z])(?=[A-Z])')
+
+_NON_WORD = re.compile(r'[\W_]+')
+
+# Words that end in "s" without being plurals
+INVARIANT_WORDS = frozenset({
+    'diabetes', 'measles', 'mumps', 'herpes', 'rabies', 'scabies', 'hives', 'shingles',
+    'rickets', 'lupus', 'psoriasis', 'paralysis', 'sepsis', 'stasis', 'arthritis',
+    'bronchitis', 'tuberculosis', 'osteoporosis', 'diagnosis', 'nervous', 'mucus',
+    'various', 'series', 'species', 'news', 'aids', 'less', 'loss', 'numbness', 'dizziness'
+})
+
+# Canonical symptom -> alternative names users or KB authors may use.
+# Both sides are written in normalized form (lower case, singular).
+SYMPTOM_SYNONYMS = {
+    'runny nose': ('rhinorrhea', 'rhinorrhoea', 'running nose', 'nasal discharge', 'drippy nose'),
+    'stuffy nose': ('nasal congestion', 'blocked nose', 'congested nose'),
+    'sore throat': ('throat pain', 'painful throat', 'scratchy throat'),
+    'shortness of breath': ('dyspnea', 'dyspnoea', 'breathlessness', 'difficulty breathing', 'trouble breathing'),
+    'fever': ('pyrexia', 'high temperature', 'feverish'),
+    'headache': ('cephalalgia', 'head pain', 'head ache'),
+    'fatigue': ('tiredness', 'exhaustion', 'lethargy', 'lack of energy'),
+    'nausea': ('queasiness', 'feeling sick', 'nauseous', 'nauseated'),
+    'vomiting': ('emesis', 'throwing up', 'being sick'),
+    'diarrhea': ('diarrhoea', 'loose stool', 'loose motion', 'watery stool'),
+    'cough': ('coughing',),
+    'itching': ('pruritus', 'itchiness', 'itchy skin'),
+    'rash': ('skin rash', 'skin eruption'),
+    'insomnia': ('sleeplessness', 'difficulty sleeping', 'trouble sleeping', 'sleep problem'),
+    'dizziness': ('lightheadedness', 'light headedness', 'giddiness'),
+    'fainting': ('syncope', 'passing out', 'blackout'),
+    'joint pain': ('arthralgia', 'painful joint', 'aching joint'),
+    'muscle pain': ('myalgia', 'muscle ache', 'sore muscle'),
+    'body ache': ('body pain', 'aching body'),
+    'abdominal pain': ('stomach pain', 'stomach ache', 'stomachache', 'belly pain', 'tummy ache', 'tummy pain'),
+    'swelling': ('edema', 'oedema'),
+    'heartburn': ('pyrosis', 'acid reflux'),
+    'loss of appetite': ('reduced appetite', 'poor appetite', 'decreased appetite'),
+    'excessive sweating': ('hyperhidrosis',),
+    'night sweat': ('nocturnal sweating',),
+    'rapid heartbeat': ('tachycardia', 'racing heartbeat', 'fast heartbeat', 'increased heart rate'),
+    'palpitation': ('heart palpitation', 'pounding heart'),
+    'tremor': ('shaking', 'trembling', 'shakiness'),
+    'blurred vision': ('blurry vision',),
+    'frequent urination': ('polyuria',),
+    'increased thirst': ('polydipsia', 'excessive thirst'),
+    'nosebleed': ('epistaxis', 'nose bleed', 'bleeding nose'),
+    'memory loss': ('amnesia', 'forgetfulness'),
+    'indigestion': ('dyspepsia', 'upset stomach'),
+    'jaundice': ('yellow skin', 'yellowing of skin', 'icterus'),
+    'anxiety': ('nervousness', 'anxiousness'),
+    'depression': ('low mood',),
+    'weakness': ('asthenia',)
+}
+
+def tokenize_symptoms(symptom_text):
+    """
+    Split compound symptom text into individual symptoms.
+
+    Args:
+        symptom_text (str): Raw symptom text, e.g. "cough, fever/chills" or "CoughFeverSore throat"
+
+    Returns:
+        list: Stripped, non-empty symptoms in input order
+    """
+    return [s.strip() for s in SYMPTOM_TOKENIZER.split(symptom_text) if s and not s.isspace()]
+
+def singularize(word):
+    """Strip a regular English plural ending from a lower-case word."""
+    if len(word) <= 3 or word in INVARIANT_WORDS:
+        return word
+    if word.endswith('ies') and len(word) > 4:
+        return word[:-3] + 'y'
+    if word.endswith(('sses', 'shes', 'xes', 'zes')) or (word.endswith('ches') and not word.endswith('aches')):
+        return word[:-2]
+    if word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        return word[:-1]
+    return word
+
+def _build_alias_table(synonyms):
+    """Map every normalized alias to its canonical key."""
+    aliases = {}
+    for canonical, names in synonyms.items():
+        for name in names:
+            aliases[name] = canonical
+    return aliases
+
+_DEFAULT_ALIASES = _build_alias_table(SYMPTOM_SYNONYMS)
+
+def normalize_symptom(symptom, aliases=None):
+    """
+    Reduce a symptom string to its canonical normalization key.
+
+    Args:
+        symptom (str): Raw symptom string
+        aliases (dict): Normalized alias -> canonical key; the built-in synonym table if omitted
+
+    Returns:
+        str: Normalization key, empty for a blank symptom
+    """
+    words = _NON_WORD.sub(' ', symptom.casefold()).split()
+    key = ' '.join(singularize(word) for word in words)
+    return (_DEFAULT_ALIASES if aliases is None else aliases).get(key, key)
+
+class SymptomVocabulary:
+    """
+    Immutable mapping between normalized symptoms and compact integer ids.
+
+    Ids are assigned in order of first appearance in the knowledge base. Each id
+    keeps the raw KB symptom terms (its surface forms) that normalize to it.
+    """
+    __slots__ = ('ids', 'keys', 'surface_forms', 'aliases')
+
+    def __init__(self, keys, surface_forms, aliases):
+        self.keys = keys
+        self.ids = {key: symptom_id for symptom_id, key in enumerate(keys)}
+        self.surface_forms = surface_forms
+        self.aliases = aliases
+
+    def __len__(self):
+        return len(self.keys)
+
+    def normalize(self, symptom):
+        """Return the normalization key of a symptom string."""
+        return normalize_symptom(symptom, self.aliases)
+
+    def lookup(self, symptom):
+        """
+        Get the id of a symptom.
+
+        Args:
+            symptom (str): Raw symptom string
+
+        Returns:
+            int: Symptom id, or None if the symptom is not in the knowledge base
+        """
+        return self.ids.get(self.normalize(symptom))
+
+    def key(self, symptom):
+        """
+        Get a dedupe key for any symptom.
+
+        Args:
+            symptom (str): Raw symptom string
+
+        Returns:
+            int or str: Symptom id for KB symptoms, normalization key otherwise
+        """
+        key = self.normalize(symptom)
+        symptom_id = self.ids.get(key)
+        return key if symptom_id is None else symptom_id
+
+    def updated(self, added=(), removed=()):
+        """
+        Derive the vocabulary of an edited knowledge base without renumbering.
+
+        Existing ids keep their numbers; a new key gets the next id. A key whose
+        surface forms are all removed keeps its id, with no forms left.
+
+        Args:
+            added (iterable): Raw KB symptom terms now in use
+            removed (iterable): Raw KB symptom terms no longer in use
+
+        Returns:
+            SymptomVocabulary: Updated vocabulary
+        """
+        keys = list(self.keys)
+        ids = dict(self.ids)
+        surface_forms = list(self.surface_forms)
+        for term in removed:
+            symptom_id = ids.get(normalize_symptom(term, self.aliases))
+            if symptom_id is not None and term in surface_forms[symptom_id]:
+                surface_forms[symptom_id] = tuple(form for form in surface_forms[symptom_id] if form != term)
+        for term in added:
+            key = normalize_symptom(term, self.aliases)
+            if not key:
+                continue
+            symptom_id = ids.get(key)
+            if symptom_id is None:
+                symptom_id = ids[key] = len(keys)
+                keys.append(key)
+                surface_forms.append(())
+            if term not in surface_forms[symptom_id]:
+                surface_forms[symptom_id] = surface_forms[symptom_id] + (term,)
+        return SymptomVocabulary(tuple(keys), tuple(surface_forms), self.aliases)
+
+def build_symptom_vocabulary(terms, synonyms=SYMPTOM_SYNONYMS):
+    """
+    Build the vocabulary of a knowledge base.
+
+    Args:
+        terms (iterable): Raw KB symptom terms
+        synonyms (dict): Canonical symptom -> alternative names
+
+    Returns:
+        SymptomVocabulary: Vocabulary over the terms
+    """
+    aliases = _DEFAULT_ALIASES if synonyms is SYMPTOM_SYNONYMS else _build_alias_table(synonyms)
+    ids = {}
+    surface_forms = []
+    for term in terms:
+        key = normalize_symptom(term, aliases)
+        if not key:
+            continue
+        symptom_id = ids.get(key)
+        if symptom_id is None:
+            symptom_id = ids[key] = len(surface_forms)
+            surface_forms.append([])
+        if term not in surface_forms[symptom_id]:
+            surface_forms[symptom_id].append(term)
+    return SymptomVocabulary(tuple(ids), tuple(tuple(forms) for forms in surface_forms), aliases)
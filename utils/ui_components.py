@@ -6,8 +6,8 @@ import streamlit as st
 import re
 from utils.session_manager import (
     set_symptom_input, add_symptom, add_suggested_symptom, 
-    add_common_symptom, remove_symptom, clear_symptoms,
-    set_selected_disease, set_treatment_view, add_to_chat_history
+    add_common_symptom, add_symptoms, remove_symptom, clear_symptoms,
+    set_selected_disease, set_treatment_view, add_to_chat_history, update_detected_diseases
 )
 from utils.symptom_analyzer import symptom_preprocess
 
@@ -70,9 +70,7 @@ def render_nl_input(client, deployment, process_nl_symptoms_fn):
             if error:
                 st.error(error)
             elif extracted_symptoms:
-                for symptom in extracted_symptoms:
-                    if symptom and symptom not in st.session_state.selected_symptoms:
-                        st.session_state.selected_symptoms.append(symptom)
+                add_symptoms(extracted_symptoms)
                 st.success(f"Extracted symptoms: {', '.join(extracted_symptoms)}")
                 add_to_chat_history("user", nl_symptoms)
                 add_to_chat_history("assistant", f"I've identified these symptoms: {', '.join(extracted_symptoms)}")
@@ -100,8 +98,13 @@ def render_manual_symptom_input(all_symptoms):
     
     # Suggest symptoms as user types
     if new_symptom and len(new_symptom) > 2 and ',' not in new_symptom:
-        from utils.kb_manager import suggest_symptoms
-        suggestions = suggest_symptoms(all_symptoms, new_symptom)
+        from utils.kb_manager import suggest_symptoms, load_autocomplete_index, load_fuzzy_matcher
+        suggestions = suggest_symptoms(
+            all_symptoms,
+            new_symptom,
+            load_autocomplete_index(),
+            fuzzy_matcher=load_fuzzy_matcher()
+        )
         if suggestions:
             selected_suggestion = st.selectbox("Did you mean:", [""] + suggestions, key="suggestion_select")
             st.session_state.selected_suggestion = selected_suggestion
@@ -197,12 +200,9 @@ def render_symptom_actions():
         
         # Analyze symptoms button
         if st.button("Analyze Symptoms", type="primary"):
-            from utils.symptom_analyzer import find_diseases
-            from utils.kb_manager import load_knowledge_base
-            
             with st.spinner("Analyzing your symptoms..."):
-                kb_data = load_knowledge_base()
-                st.session_state.detected_diseases = find_diseases(kb_data, st.session_state.selected_symptoms)
+                # The session's scorer already holds the match counts of the selected symptoms
+                update_detected_diseases()
                 st.session_state.selected_disease = None
                 st.session_state.treatment_view = None
                 st.rerun()
@@ -277,4 +277,43 @@ def render_analysis_results():
             """)
     
     elif st.session_state.detected_diseases == {}:
-        st.warning("No matching conditions found in our database for your symptoms. Please try adding more specific symptoms or consult a healthcare professional.")
\ No newline at end of file
+        st.warning("No matching conditions found in our database for your symptoms. Please try adding more specific symptoms or consult a healthcare professional.")
+
+def render_metrics_overlay(trace, metrics):
+    """
+    Render per-stage timings of the current rerun and the process-wide histograms in the sidebar.
+    
+    Args:
+        trace (RerunTrace): Trace of the current rerun
+        metrics (MetricsRegistry): Process-wide registry
+    """
+    from utils.llm_telemetry import TELEMETRY
+    
+    summary = metrics.summary()
+    with st.sidebar.expander("⏱️ Rerun timings", expanded=False):
+        st.caption(f"Rerun {trace.rerun_id} · {metrics.reruns} reruns recorded")
+        st.table([
+            {
+                "stage": name,
+                "this rerun (ms)": round(seconds * 1000, 2),
+                "mean (ms)": round(summary[name]['mean_ms'], 2) if name in summary else None,
+                "p99 ≤ (ms)": summary[name]['p99_ms'] if name in summary else None
+            }
+            for name, seconds in trace.spans
+        ])
+        
+        llm_calls = TELEMETRY.aggregates()
+        if llm_calls:
+            st.caption("LLM calls (rolling window)")
+            st.table([
+                {
+                    "call site": call_site,
+                    "calls": stats['calls'],
+                    "errors": stats['errors'],
+                    "cache hits": f"{stats['cache_hit_rate']:.0%}",
+                    "p50 (ms)": round(stats['p50_ms']),
+                    "TTFT p50 (ms)": round(stats['ttft_p50_ms']),
+                    "tokens/min": round(stats['tokens_per_minute'])
+                }
+                for call_site, stats in llm_calls.items()
+            ])
\ No newline at end of file
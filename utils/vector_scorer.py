@@ -0,0 +1,183 @@
+#vector_scorer.py
+"""
+Vectorized disease scoring backend for the holistic medicine chatbot.
+
+The knowledge base is held as a sparse disease x symptom-term incidence matrix A.
+A batch of symptom sets becomes a sparse term x symptom query matrix Q, where
+column s marks the KB terms matched by user symptom s. (A @ Q)[d, s] > 0 tells
+whether disease d matches symptom s, and multiplying that by a symptom x set
+membership matrix G gives the per-set match counts in one more product.
+"""
+import numpy as np
+from scipy import sparse
+
+from utils.symptom_index import SYMPTOM_SEPARATORS
+
+class VectorScorer:
+    """
+    Sparse-matrix scorer producing the same results as find_diseases.
+    """
+    __slots__ = ('symptom_index', 'incidence', 'columns')
+
+    def __init__(self, symptom_index, incidence):
+        self.symptom_index = symptom_index
+        self.incidence = incidence
+        # Column-major copy for reading the diseases of a few terms
+        self.columns = incidence.tocsc()
+
+    def _resolve(self, symptom, fuzzy_matcher):
+        """Return (term ids, directly matched disease ids) for one user symptom."""
+        index = self.symptom_index
+        if not symptom:
+            return (), range(len(index))
+
+        term_ids = index.matching_terms(symptom)
+        direct = ()
+        if SYMPTOM_SEPARATORS.search(symptom):
+            # Symptoms spanning several KB terms only match full symptom strings
+            direct = [d for d, lowered in enumerate(index.lowered_symptoms) if symptom in lowered]
+
+        if not term_ids and not direct and fuzzy_matcher is not None:
+            corrected = fuzzy_matcher.correct(symptom)
+            if corrected:
+                return self._resolve(corrected, None)
+        return tuple(term_ids), direct
+
+    def match(self, symptom, fuzzy_matcher=None):
+        """
+        Find the diseases matched by one user symptom.
+
+        Same result as match_symptom, read from the columns of the incidence
+        matrix, so IncrementalScorer can use this backend per symptom.
+
+        Args:
+            symptom (str): Lower-cased, stripped user symptom
+            fuzzy_matcher (FuzzyMatcher): Optional matcher for misspelled symptoms
+
+        Returns:
+            set: Ids of the matching diseases
+        """
+        term_ids, direct = self._resolve(symptom, fuzzy_matcher)
+        indptr, indices = self.columns.indptr, self.columns.indices
+        if len(term_ids) == 1:
+            rows = indices[indptr[term_ids[0]]:indptr[term_ids[0] + 1]]
+        elif term_ids:
+            rows = np.concatenate([indices[indptr[t]:indptr[t + 1]] for t in term_ids])
+        else:
+            rows = ()
+        matched = set(np.asarray(rows).tolist())
+        matched.update(direct)
+        return matched
+
+    def score_batch(self, symptom_sets, fuzzy_matcher=None, top_k=None):
+        """
+        Score many symptom sets with sparse matrix products.
+
+        Args:
+            symptom_sets (list): List of symptom lists
+            fuzzy_matcher (FuzzyMatcher): Optional matcher for misspelled symptoms
+            top_k (int): Keep only the best top_k diseases per set; all if omitted
+
+        Returns:
+            list: One find_diseases-style result dict per symptom set
+        """
+        index = self.symptom_index
+        n_diseases = len(index)
+
+        query_rows, query_cols = [], []
+        direct_rows, direct_cols = [], []
+        set_rows, set_cols = [], []
+        set_sizes = np.zeros(len(symptom_sets), dtype=np.int64)
+        resolved = {}
+
+        column = 0
+        for set_id, input_symptoms in enumerate(symptom_sets):
+            for symptom in input_symptoms:
+                symptom = symptom.lower().strip()
+                if symptom not in resolved:
+                    resolved[symptom] = self._resolve(symptom, fuzzy_matcher)
+                term_ids, direct = resolved[symptom]
+                query_rows.extend(term_ids)
+                query_cols.extend([column] * len(term_ids))
+                direct_rows.extend(direct)
+                direct_cols.extend([column] * len(direct))
+                set_rows.append(column)
+                set_cols.append(set_id)
+                column += 1
+            set_sizes[set_id] = len(input_symptoms)
+
+        n_terms = self.incidence.shape[1]
+        query = sparse.csc_matrix(
+            (np.ones(len(query_rows), dtype=np.int32), (query_rows, query_cols)),
+            shape=(n_terms, column)
+        )
+        hits = self.incidence @ query
+        if direct_rows:
+            hits = hits + sparse.csr_matrix(
+                (np.ones(len(direct_rows), dtype=np.int32), (direct_rows, direct_cols)),
+                shape=(n_diseases, column)
+            )
+        matched = (hits > 0).astype(np.int32)
+
+        membership = sparse.csr_matrix(
+            (np.ones(len(set_rows), dtype=np.int32), (set_rows, set_cols)),
+            shape=(column, len(symptom_sets))
+        )
+        counts = (matched @ membership).tocsc()
+        counts.sort_indices()
+
+        # Percentages for every non-zero count at once
+        set_of_entry = np.repeat(np.arange(len(symptom_sets)), np.diff(counts.indptr))
+        all_scores = counts.data / np.maximum(set_sizes[set_of_entry], 1) * 100
+
+        results = []
+        indptr = counts.indptr.tolist()
+        for set_id in range(len(symptom_sets)):
+            start, stop = indptr[set_id], indptr[set_id + 1]
+            scores = all_scores[start:stop]
+            # Highest score first; ties keep KB order like find_diseases
+            order = np.argsort(-scores, kind='stable')[:top_k]
+            disease_ids = counts.indices[start:stop][order].tolist()
+
+            potential_diseases = {}
+            for disease_id, score in zip(disease_ids, scores[order].tolist()):
+                potential_diseases[index.names[disease_id]] = {
+                    'score': score,
+                    'category': index.categories[disease_id],
+                    'full_symptoms': index.full_symptoms[disease_id]
+                }
+            results.append(potential_diseases)
+        return results
+
+    def score(self, input_symptoms, fuzzy_matcher=None):
+        """
+        Score a single symptom set.
+
+        Args:
+            input_symptoms (list): List of symptoms
+            fuzzy_matcher (FuzzyMatcher): Optional matcher for misspelled symptoms
+
+        Returns:
+            dict: Dictionary of potential diseases with match scores
+        """
+        return self.score_batch([input_symptoms], fuzzy_matcher)[0]
+
+def build_vector_scorer(symptom_index):
+    """
+    Build the sparse incidence matrix for a symptom index.
+
+    Args:
+        symptom_index (SymptomIndex): Index over the knowledge base
+
+    Returns:
+        VectorScorer: Scorer over the same knowledge base
+    """
+    rows, cols = [], []
+    for disease_id, term_ids in enumerate(symptom_index.disease_terms):
+        rows.extend([disease_id] * len(term_ids))
+        cols.extend(term_ids)
+    incidence = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+        shape=(len(symptom_index), len(symptom_index.terms))
+    )
+    return VectorScorer(symptom_index, incidence)